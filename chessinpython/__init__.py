@@ -0,0 +1,82 @@
+from __future__ import annotations
+import importlib
+import os
+
+
+# Chess in Python, as a package:
+#   board            squares, Positions, bitboard helpers, attack tables, move encoding and Zobrist keys
+#   pieces           the Piece classes and the ChessBoard interface
+#   eval             material and piece-square evaluation, and the batch (NumPy) evaluation API
+#   rules            BitboardChessBoard (move generation), GameBoardFactory and GameState
+#   io               binary position and game files, PGN, SAN and opening books
+#   search           the SearchEngine, transposition tables and the tactical test suite
+#   perft            perft and the reference perft suite
+#   parallel         multiprocess root-split perft and search, and Lazy SMP
+#   tablebases       endgame tablebase generation and probing
+#   uci, server      the UCI engine and the JSON-lines game server
+#   match            self-play matches between builds
+#   app              the interactive terminal game
+#   instrumentation  hot-path counters, profiling and the allocation and start-up benchmarks
+#   cache            the precomputed table cache
+#   cli              the command line (python -m chessinpython, or "Chess in Python.py")
+#
+# Importing the package imports none of them: each public name below is looked up in its module the first time it is used, so eg.,
+# chessinpython.GameState only loads the rules, and nothing imports NumPy, asyncio or the process pool until it is needed.
+# perft and instrumentation share their names with their modules, so they are reached through them (chessinpython.perft.perft).
+
+_moduleNames = {
+    "board": ("ALL_CASTLING_RIGHTS", "BISHOP", "BISHOP_DIRECTIONS", "BISHOP_STEPS", "bishopAttacks", "BLACK_INDEX", "BLACK_KINGSIDE",
+              "BLACK_QUEENSIDE", "CAPTURE", "castlingRightsMask", "Colour", "colourIndex", "computeZobristKey", "DIRECTION_STEPS", "DOUBLE_PAWN_PUSH",
+              "EN_PASSANT", "encodeMove", "fenCastlingRights", "fenPieceCodes", "fenPieceLetters", "FILE_A", "FILE_H", "FULL_BOARD", "indexColour",
+              "iterateBits", "KING", "KING_CASTLE", "KING_STEPS", "kingTable", "KNIGHT", "KNIGHT_STEPS", "knightTable", "LIGHT_SQUARES", "moveFlag",
+              "moveFromSquare", "moveToSquare", "moveToString", "moveToUCI", "NO_PIECE", "NOT_FILE_A", "NOT_FILE_AB", "NOT_FILE_GH", "NOT_FILE_H",
+              "PAWN", "pawnAttacks", "pawnAttackTable", "pieceLetters", "Position", "positionFromSquare", "PROMOTION", "PROMOTION_CAPTURE", "QUEEN",
+              "QUEEN_CASTLE", "queenAttacks", "QUIET", "rayAttacks", "rayTable", "ROOK", "ROOK_DIRECTIONS", "ROOK_STEPS", "rookAttacks",
+              "shiftBitboard", "slidingAttacks", "squareFromPosition", "squareName", "squarePositions", "stepAttacks", "WHITE_INDEX",
+              "WHITE_KINGSIDE", "WHITE_QUEENSIDE", "ZOBRIST_SEED", "zobristCastlingKeys", "zobristEnPassantKeys", "zobristPieceKeys", "zobristSideKey"),
+    "pieces": ("BishopPiece", "ChessBoard", "EmptySquare", "emptySquare", "KingPiece", "KnightPiece", "PawnPiece", "Piece", "pieceClasses",
+               "QueenPiece", "RookPiece"),
+    "eval": ("batchEvaluate", "batchInCheck", "bitboardsToArray", "computeEvaluation", "evaluatePosition", "pieceSquareTables", "pieceSquareValues",
+             "pieceValues", "seeValues", "statesToArray"),
+    "rules": ("BitboardChessBoard", "GameBoardFactory", "GameState", "parseUCIMove", "RESULT_BLACK_WINS", "RESULT_DRAW", "RESULT_UNKNOWN",
+              "RESULT_WHITE_WINS", "STANDARD_FEN"),
+    "io": ("BOOK_ENTRY_SIZE", "BOOK_FILE_MAGIC", "bookEntryStruct", "buildOpeningBook", "formatPGN", "GAME_FILE_MAGIC", "GameFileReader",
+           "gameHeaderStruct", "gamePGN", "gameRecord", "moveToSAN", "OpeningBook", "PACKED_POSITION_SIZE", "packedPositionStruct", "packPosition",
+           "parseSAN", "PGNGame", "pgnResults", "pgnResultStrings", "POSITION_FILE_MAGIC", "PositionFileReader", "readPGNGames", "replayGame",
+           "runPGNBenchmark", "sanPattern", "sevenTagRoster", "unpackPosition", "writeGames", "writePGNGames", "writePositions"),
+    "search": ("BOUND_EXACT", "BOUND_LOWER", "BOUND_UPPER", "INFINITE_SCORE", "lazySMPSkipPhase", "lazySMPSkipSize", "MATE_SCORE", "MAX_PLY",
+               "runTacticalBenchmark", "SearchAborted", "SearchEngine", "SharedTranspositionTable", "tacticalConfigurations", "tacticalSuite",
+               "TranspositionTable"),
+    "perft": ("perftDivide", "perftSuite", "runPerft", "runPerftSuite"),
+    "parallel": ("defaultWorkerCount", "lazySMPSearch", "parallelPerftDivide", "parallelRootSearch", "runLazySMPScaling", "runLazySMPSearch",
+                 "runParallelSearch"),
+    "tablebases": ("canonicalSignature", "drawnSignatures", "generateTablebase", "generateTablebases", "signatureCodes", "TABLEBASE_DRAW",
+                   "TABLEBASE_FILE_MAGIC", "TABLEBASE_INVALID", "tablebaseDependencies", "tablebaseIndex", "tablebaseMemory", "Tablebases"),
+    "uci": ("UCIServer",),
+    "server": ("GameServer", "gameStatus", "runServerLoadTest", "ServerGame"),
+    "match": ("eloFromScore", "loadBuild", "loadOpenings", "matchOpenings", "playMatchGame", "runMatch", "sprtLogLikelihoodRatio"),
+    "app": ("ChessApp", "longNotationPattern", "NewGame"),
+    "instrumentation": ("HotPathStats", "Instrumentation", "profileRun", "runAllocationBenchmark", "runStartupBenchmark"),
+    "cache": ("cachedTables", "defaultTableCachePath", "TABLE_CACHE_VERSION", "tableCachePath", "writeTableCache"),
+    "cli": ("main", "parseArguments", "runFromArguments"),
+}
+_nameModules = {name: module for module, names in _moduleNames.items() for name in names}
+
+__all__ = list(_nameModules)
+
+def __getattr__(name : str):
+    if name in _moduleNames:    # chessinpython.search etc., without importing the module first
+        return importlib.import_module(f"{__name__}.{name}")
+    module = _nameModules.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value     # later lookups find it directly
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_moduleNames))
+
+# CIP_INSTRUMENT switches instrumentation on as the package is imported (see instrumentation.py)
+if os.environ.get("CIP_INSTRUMENT"):
+    importlib.import_module(f"{__name__}.instrumentation")
@@ -0,0 +1,179 @@
+from __future__ import annotations
+import re
+import typing
+from .board import Colour, colourIndex, moveToString, pieceLetters, Position, QUEEN, squareFromPosition
+from .pieces import EmptySquare
+from .rules import GameState, RESULT_DRAW, RESULT_WHITE_WINS
+from .io import gameRecord, OpeningBook, writeGames
+from .search import SearchEngine
+
+if typing.TYPE_CHECKING:    # the tablebase code (and its process pool) is only imported when --tablebases is given
+    from .tablebases import Tablebases
+
+
+# Regular Expression for valid moves:
+#   (letter-from-a-to-h) (number-from-1-to-8) hyphen (letter-from-a-to-h) (number-from-1-to-8)
+# (the parentheses around each letter and number capture it in a capture group)
+# So, if there's a match, the capture groups will be:
+#   source_file = match.group(1)
+#   source_rank = match.group(2)
+#   dest_file = match.group(3)
+#   dest_rank = match.group(4)
+#   promotion = match.group(5) (an optional Q, R, B or N after a pawn move to the last rank; a queen when left out)
+longNotationPattern = "^([a-h])([1-8])-([a-h])([1-8])([QRBNqrbn])?$"
+
+
+class NewGame:
+
+    def __init__(self, engineColour : Colour = None, engineTimeLimit : float = 2.0, openingBook : OpeningBook = None, tablebases : Tablebases = None):
+        self.state = GameState()
+        self.whichTurn = Colour.WHITE
+        self.turnCounter = 0 
+        # when engineColour is set, the SearchEngine plays that colour and the human plays the other one
+        self.engineColour = engineColour
+        self.engineTimeLimit = engineTimeLimit
+        self.engine = SearchEngine() if engineColour is not None else None
+        if self.engine is not None:
+            self.engine.tablebases = tablebases
+        self.openingBook = openingBook  # consulted before searching, while the game is still in the book
+        self.isOver = False     # set by gameLoop once the game has been won or drawn
+
+    def moveToNextTurn(self):
+        self.turnCounter += 1
+        if self.turnCounter % 2 == 0:
+            self.whichTurn = Colour.WHITE
+        else:
+            self.whichTurn = Colour.BLACK
+
+    def askForMove(self, message : str) -> typing.Tuple[Position, Position, int]: # global utility function for checking if a piece move is valid
+        # ask the user to input the X position for the piece they want to move
+        print(message)
+        print(f"{str(self.whichTurn)}'s score is: {self.evaluateBoard()}\n")
+        gotValidMove = False
+        while not gotValidMove:
+            userInput = input("Enter your move in Long Chess Notation (eg., b1-a3, or e7-e8N to promote to a knight), or SAVE to save the game: ")
+            if userInput == "SAVE":
+                self.saveGame()
+                continue
+            # re.search() returns re.Match object which evaluates True if userInput matches the regular expression groups in longNotationPattern
+            match = re.search(longNotationPattern, userInput)
+            if not match:
+                print("Incorrect syntax -- try again")
+                continue
+
+            # stores the match.group(1) and match.group(2) from the user's input as a Position object instance. These groups represent the rank and file of the source destination in the form of long algebraic notation.
+            sourceLocation = Position().setByFileRank(match.group(1), match.group(2))
+            # similary to sourceLocation's comment, destLocation stores the matching group(3) and group(4) from the user's input as a Position object instance.
+            destLocation = Position().setByFileRank(match.group(3), match.group(4))
+
+            # userSelection stores the return value for the getPieceFromBoard() method from the ChessBoard Class. 
+            # The .getPieceFromBoard() method takes a Position as it's only argument, and returns the piece contained by the (x, y) board position: (_x property, _y property) of the Position argument
+            userPieceSelection = self.state.gameBoard.getPieceFromBoard(sourceLocation)
+            
+            # check if the piece the user wants to move is their colour
+            if userPieceSelection.colour == self.whichTurn:
+                # return the Positions of the user's sourceLocation and destLocation, and the piece type a pawn promotes to
+                promotionType = pieceLetters.index(match.group(5).upper()) if match.group(5) else QUEEN
+                return (sourceLocation, destLocation, promotionType)
+
+            # check if the user is trying to select an EmptySquare Piece
+            if type(userPieceSelection) is EmptySquare:
+                print("Source square does not contain a piece - try again")
+                continue
+
+            # if all conditions are not valid, it means the user is trying to move a Piece which isn't their own. repeat the loop.
+            print(f"{str(userPieceSelection)} - Wrong colour - try again ")
+
+    def saveGame(self, path : str = "savedGames.cipg"): # appends this game to a binary game file (see the Binary Game Store section in io.py)
+        writeGames(path, [gameRecord(self.state)], append=True)
+        print(f"Game saved to {path}")
+
+    def doEngineTurn(self):
+        move = self.openingBook.chooseMove(self.state) if self.openingBook is not None else None
+        if move is not None:
+            print(f"{str(self.whichTurn)} plays {moveToString(move)} (book)")
+            self.state.makeMove(move)
+            return
+        move = self.engine.findBestMove(self.state, timeLimit=self.engineTimeLimit)
+        if move is None:
+            print(f"{str(self.whichTurn)} has no legal moves")
+            return
+        print(f"{str(self.whichTurn)} plays {moveToString(move)} (depth {self.engine.completedDepth}, {self.engine.nodes} nodes)")
+        self.state.makeMove(move)
+
+    def doTurn(self):
+        if self.whichTurn == self.engineColour:
+            self.doEngineTurn()
+            return
+        # move stores the tuple (sourceLocation : Position, DestLocation : Position, promotionType : int) representing the user's desired move
+        move = self.askForMove(f"It's {str(self.whichTurn)}'s turn")
+        # movePiece(sourcePiece : Piece, destinationPosition : Position, promotionType : int)
+        if not self.state.movePiece(self.state.gameBoard.getPieceFromBoard(move[0]), move[1], move[2]):
+            self.doTurn()
+
+    def evaluateBoard(self): # evaluation (material + piece-square tables, in centipawns) from the point of view of the player whose turn it is
+        if self.whichTurn == Colour.WHITE:
+            return self.state.evaluation
+        return -self.state.evaluation
+
+    # global utility function that can be called whenever you need to check if a King is in check. 
+    def isKingCheck(self, colour : Colour): 
+        # kingDict holds the king's Position, so the check is a handful of attack table lookups from that one square
+        if colour not in self.state.kingDict:
+            return False
+        kingSquare = squareFromPosition(self.state.kingDict[colour])
+        return self.state.gameBoard.isInCheck(colourIndex[colour], kingSquare)
+
+    def gameLoop(self):
+        print("\n")
+        print("-----------")
+        print("Here is the game board: \n")
+        print(self.state.gameBoard)
+        self.doTurn()
+        self.moveToNextTurn()
+        # after every move, check whether the player now to move has been mated or stalemated, or the game is drawn by rule
+        outcome = self.state.gameOutcome()
+        if outcome is not None:
+            result, reason = outcome
+            print(self.state.gameBoard)
+            if result == RESULT_DRAW:
+                print(f"Draw by {reason}.")
+            else:
+                print(f"{'White' if result == RESULT_WHITE_WINS else 'Black'} wins by {reason}.")
+            self.isOver = True
+        elif self.isKingCheck(self.whichTurn):
+            print(f"{str(self.whichTurn)} is in check")
+##### NOTE - Apr 8, 2023
+## I HAVE A GAMESTATE. APPARENTLY I WILL HAVE A SPECIAL KEYWORD IN MY APPLICATION LOOP.
+## APPARENTLY I WILL NOW HOW A LOOP FOR MY GAMESTATE, AND A LOOP FOR MY APPLICATION.
+## THE LOOP FOR MY GAMESTATE HOLDS ALL THE LOGIC FOR THE GAME (I.E. main())
+## THE APPLICATION LOOP EXISTS AS A HIGHER ORDER LOOP TO THE GAMESTATE LOOP. IT WILL RUN THE GAMESTATE LOOP (WHICH IS ACTUALLY JUST A FUNCTION IN THE APPLICATION LOOP).
+## IN THE APPLCIATION LOOP, WHAT IT WILL DO IS CHECK FOR SPECIAL KEYWORDS INPUT BY THE USER TO CONTROL THE APPLICATION (LIKE "QUIT" TO EXIT THE APPLICATION).
+## ANOTHER KEYWORD MAY BE "SAVE" (WHICH WILL SAVE THE CURRENT GAMESTATE TO A NEW VARIABLE, AND EXIT TO MENU)
+## ANOTHER KEYWORD MAY BE "NEW GAME" (WHICH WILL START A NEW GAME IN A FRESH INSTANCE)
+
+#### NOTE - Apr 10, 2023
+# check if game is running (if running, the game can be saved)
+# the application is the executive layer. my code needs to be updated so that the application layer receives the user input before the game does. 
+# if the user input is an application keyword (such as "SAVE" or "QUIT"), then execute those functions. 
+# Otherwise, pass whatever the user's input was (presumably their move in long algebraic notation) to the game loop for processing in the game.
+class ChessApp():
+    def __init__(self, openingBook : OpeningBook = None, tablebases : Tablebases = None):
+        self.exit = False
+        self.isGameRunning = False
+        while not self.exit:
+            match self.isGameRunning:
+                case True: # this is the "game" case (the game is running, so go to the game)
+                    self.mainGame.gameLoop()
+                    # a finished game goes back to the menu
+                    if self.mainGame.isOver:
+                        self.isGameRunning = False
+                case False: # this is the "menu" case (the game is not running, so go to the menu)
+                    self.userInput = input("Welcome to Chess in Python. To start a new game, type: NEW. To play against the computer, type: AI. ")
+                    match self.userInput:
+                        case "NEW":
+                            self.mainGame = NewGame()
+                            self.isGameRunning = True
+                        case "AI": # the human plays white, the engine plays black
+                            self.mainGame = NewGame(engineColour=Colour.BLACK, openingBook=openingBook, tablebases=tablebases)
+                            self.isGameRunning = True
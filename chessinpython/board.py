@@ -0,0 +1,258 @@
+from __future__ import annotations
+from enum import Enum, auto
+import typing
+import random
+from .cache import cachedTables
+
+if typing.TYPE_CHECKING:
+    from .rules import BitboardChessBoard
+
+
+class Colour(Enum):  # Enum Class for Colour inheritance
+    WHITE = auto()
+    BLACK = auto()
+    UNDEF = auto()
+
+    def __str__(self):  # redefine the __str__ special function to print the Colour.WHITE as "W" and Colour.BLACK as "B" for legibility in the terminal
+        if self.value == Colour.WHITE.value:
+            return 'W'
+        elif self.value == Colour.BLACK.value:
+            return 'B'
+        else:
+            return ''
+
+    __repr__ = __str__
+
+
+# integer piece types and colour indexes used by the bitboard engine. A piece code packs both into one int: code = colourIndex * 6 + pieceType
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+WHITE_INDEX, BLACK_INDEX = range(2)
+NO_PIECE = -1   # piece code for an empty square
+
+colourIndex = {Colour.WHITE: WHITE_INDEX, Colour.BLACK: BLACK_INDEX}
+indexColour = (Colour.WHITE, Colour.BLACK)
+
+
+class Position: # Position is oriented in the in-memory representation's coordinate system (x,y).
+    # Positions are interned and immutable: there is exactly one Position object per square (see squarePositions below), so Position(x, y)
+    # is a list lookup rather than an allocation, and two Positions for the same square are the same object
+    __slots__ = ("x", "y", "square")
+
+    def __new__(cls, x=0, y=0):
+        if not (0 <= x < 8 and 0 <= y < 8):
+            raise ValueError(f"({x}, {y}) is off the board")
+        return squarePositions[y * 8 + x]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Position is immutable")
+
+    def __reduce__(self): # pickles as Position(x, y), so unpickling gives back the interned object
+        return (Position, (self.x, self.y))
+
+    # returns the Position for the (file,rank) passed in
+    def setByFileRank(self, file, rank):
+        return Position(ord(file) - ord("a"), 8 - int(rank))
+
+    # returns the Position for the (x,y) passed in
+    def setByXY(self, x, y):
+        return Position(x, y)
+
+
+# the 64 Position objects, indexed by square (square = y * 8 + x)
+squarePositions = []
+for square in range(64):
+    position = object.__new__(Position)
+    object.__setattr__(position, "x", square & 7)
+    object.__setattr__(position, "y", square >> 3)
+    object.__setattr__(position, "square", square)
+    squarePositions.append(position)
+del square, position
+
+
+####################################
+####    Bitboard Board Engine   ####
+####################################
+
+# The bitboard engine stores the board as one 64-bit integer per piece code, where bit n is set when that piece stands on square n.
+# Squares are numbered in the in-memory representation's coordinate system: square = y * 8 + x, so a8 is square 0, h8 is square 7 and h1 is square 63.
+# Moving "north" (towards rank 8) subtracts 8 from the square, moving "east" (towards the h-file) adds 1.
+
+FULL_BOARD = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL_BOARD ^ FILE_A
+NOT_FILE_H = FULL_BOARD ^ FILE_H
+NOT_FILE_AB = NOT_FILE_A & (FULL_BOARD ^ (FILE_A << 1))
+NOT_FILE_GH = NOT_FILE_H & (FULL_BOARD ^ (FILE_H >> 1))
+LIGHT_SQUARES = sum(1 << square for square in range(64) if ((square >> 3) + (square & 7)) % 2 == 0)     # a8 is a light square
+
+# (step, wrap mask) pairs. the wrap mask is applied after the shift to drop bits which wrapped around onto the opposite edge of the board
+ROOK_STEPS = ((-8, FULL_BOARD), (8, FULL_BOARD), (1, NOT_FILE_A), (-1, NOT_FILE_H))
+BISHOP_STEPS = ((-7, NOT_FILE_A), (9, NOT_FILE_A), (-9, NOT_FILE_H), (7, NOT_FILE_H))
+KNIGHT_STEPS = ((-15, NOT_FILE_A), (17, NOT_FILE_A), (-17, NOT_FILE_H), (15, NOT_FILE_H),
+                (-6, NOT_FILE_AB), (10, NOT_FILE_AB), (-10, NOT_FILE_GH), (6, NOT_FILE_GH))
+KING_STEPS = ROOK_STEPS + BISHOP_STEPS
+
+pieceLetters = ("P", "N", "B", "R", "Q", "K")
+fenPieceLetters = "PNBRQKpnbrqk"     # FEN letter for each piece code
+fenPieceCodes = {letter: code for code, letter in enumerate(fenPieceLetters)}
+fenCastlingRights = {"K": 1, "Q": 2, "k": 4, "q": 8}   # WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+
+
+def squareFromPosition(location : Position) -> int:
+    return location.square
+
+def positionFromSquare(square : int) -> Position:
+    return squarePositions[square]
+
+def shiftBitboard(bitboard : int, step : int, wrapMask : int) -> int:
+    if step > 0:
+        return (bitboard << step) & wrapMask & FULL_BOARD
+    return (bitboard >> -step) & wrapMask
+
+def stepAttacks(bitboard : int, steps) -> int: # squares reached by a single step in each direction (knights, kings)
+    attacks = 0
+    for step, wrapMask in steps:
+        attacks |= shiftBitboard(bitboard, step, wrapMask)
+    return attacks
+
+def slidingAttacks(bitboard : int, occupied : int, steps) -> int: # squares reached by sliding in each direction until (and including) the first occupied square
+    empty = FULL_BOARD ^ occupied
+    attacks = 0
+    for step, wrapMask in steps:
+        ray = shiftBitboard(bitboard, step, wrapMask)
+        while ray:
+            attacks |= ray
+            ray = shiftBitboard(ray & empty, step, wrapMask)
+    return attacks
+
+def pawnAttacks(bitboard : int, colourIdx : int) -> int: # squares diagonally in front of the pawns, from the point of view of colourIdx
+    if colourIdx == WHITE_INDEX:
+        return shiftBitboard(bitboard, -7, NOT_FILE_A) | shiftBitboard(bitboard, -9, NOT_FILE_H)
+    return shiftBitboard(bitboard, 9, NOT_FILE_A) | shiftBitboard(bitboard, 7, NOT_FILE_H)
+
+def iterateBits(bitboard : int) -> typing.Iterator[int]: # yields the square index of each set bit, lowest first
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+# Ray and jump tables, precomputed once so that move generation never has to probe squares one at a time.
+# rayTable[direction][square] is every square from (but not including) square to the edge of the board in that direction.
+# Directions 0-3 step towards higher square numbers, so the first blocker on those rays is the lowest set bit; directions 4-7 step towards lower square numbers, so their first blocker is the highest set bit.
+DIRECTION_STEPS = ((8, FULL_BOARD), (1, NOT_FILE_A), (9, NOT_FILE_A), (7, NOT_FILE_H),         # south, east, southeast, southwest
+                   (-8, FULL_BOARD), (-1, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H))    # north, west, northeast, northwest
+ROOK_DIRECTIONS = (0, 1, 4, 5)
+BISHOP_DIRECTIONS = (2, 3, 6, 7)
+
+def _buildAttackTables() -> dict:
+    return {"rays": [[slidingAttacks(1 << square, 0, (steps,)) for square in range(64)] for steps in DIRECTION_STEPS],
+            "knights": [stepAttacks(1 << square, KNIGHT_STEPS) for square in range(64)],
+            "kings": [stepAttacks(1 << square, KING_STEPS) for square in range(64)],
+            "pawns": [[pawnAttacks(1 << square, colourIdx) for square in range(64)] for colourIdx in (WHITE_INDEX, BLACK_INDEX)]}
+
+# the tables are loaded from the table cache when it holds them for these steps (see cache.py)
+_attackTables = cachedTables("attacks", (DIRECTION_STEPS, KNIGHT_STEPS, KING_STEPS), _buildAttackTables)
+rayTable = _attackTables["rays"]
+knightTable = _attackTables["knights"]
+kingTable = _attackTables["kings"]
+pawnAttackTable = _attackTables["pawns"]
+
+def rayAttacks(square : int, occupied : int, directions) -> int: # sliding attacks along the given directions, stopping at (and including) the first blocker on each ray
+    attacks = 0
+    for direction in directions:
+        ray = rayTable[direction][square]
+        blockers = ray & occupied
+        if blockers:
+            if direction < 4:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= rayTable[direction][blocker]
+        attacks |= ray
+    return attacks
+
+def rookAttacks(square : int, occupied : int) -> int:
+    return rayAttacks(square, occupied, ROOK_DIRECTIONS)
+
+def bishopAttacks(square : int, occupied : int) -> int:
+    return rayAttacks(square, occupied, BISHOP_DIRECTIONS)
+
+def queenAttacks(square : int, occupied : int) -> int:
+    return rayAttacks(square, occupied, ROOK_DIRECTIONS) | rayAttacks(square, occupied, BISHOP_DIRECTIONS)
+
+
+# Moves are packed into 16-bit ints: bits 0-5 hold the source square, bits 6-11 the destination square and bits 12-15 a flag.
+QUIET, DOUBLE_PAWN_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, EN_PASSANT = 0, 1, 2, 3, 4, 5
+PROMOTION = 8               # flag | 8 is a promotion; the low two bits pick the new piece (KNIGHT + (flag & 3))
+PROMOTION_CAPTURE = 12
+
+# castling rights are stored as a 4-bit mask
+WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE = 1, 2, 4, 8
+ALL_CASTLING_RIGHTS = 15
+
+# castlingRightsMask[square] is the set of rights which survive a move to or from that square (moving a king or rook, or capturing a rook, loses the matching rights)
+castlingRightsMask = [ALL_CASTLING_RIGHTS] * 64
+castlingRightsMask[60] = ALL_CASTLING_RIGHTS ^ (WHITE_KINGSIDE | WHITE_QUEENSIDE)  # e1
+castlingRightsMask[63] = ALL_CASTLING_RIGHTS ^ WHITE_KINGSIDE                      # h1
+castlingRightsMask[56] = ALL_CASTLING_RIGHTS ^ WHITE_QUEENSIDE                     # a1
+castlingRightsMask[4] = ALL_CASTLING_RIGHTS ^ (BLACK_KINGSIDE | BLACK_QUEENSIDE)   # e8
+castlingRightsMask[7] = ALL_CASTLING_RIGHTS ^ BLACK_KINGSIDE                       # h8
+castlingRightsMask[0] = ALL_CASTLING_RIGHTS ^ BLACK_QUEENSIDE                      # a8
+
+# Zobrist keys: a position's key is the XOR of one random 64-bit number per (piece code, square), plus keys for castling rights, the en passant file and black to move.
+# A move only touches a handful of these, so the key can be updated incrementally instead of being recomputed.
+# the generator is seeded so that keys (and anything stored under them) are the same in every process and every run
+ZOBRIST_SEED = 0x5EED
+
+def _buildZobristKeys() -> dict:
+    generator = random.Random(ZOBRIST_SEED)
+    return {"pieces": [[generator.getrandbits(64) for square in range(64)] for code in range(12)],
+            "castling": [generator.getrandbits(64) for rights in range(16)],
+            "enPassant": [generator.getrandbits(64) for file in range(8)],
+            "side": generator.getrandbits(64)}
+
+_zobristKeys = cachedTables("zobrist", (ZOBRIST_SEED,), _buildZobristKeys)
+zobristPieceKeys = _zobristKeys["pieces"]
+zobristCastlingKeys = _zobristKeys["castling"]
+zobristEnPassantKeys = _zobristKeys["enPassant"]
+zobristSideKey = _zobristKeys["side"]
+
+def computeZobristKey(board : BitboardChessBoard, sideToMove : Colour) -> int: # full recompute, used to set up a key and to verify the incremental updates
+    key = zobristCastlingKeys[board.castlingRights]
+    for code in range(12):
+        for square in iterateBits(board.pieceBitboards[code]):
+            key ^= zobristPieceKeys[code][square]
+    if board.enPassantSquare >= 0:
+        key ^= zobristEnPassantKeys[board.enPassantSquare & 7]
+    if sideToMove == Colour.BLACK:
+        key ^= zobristSideKey
+    return key
+
+def encodeMove(fromSquare : int, toSquare : int, flag : int = QUIET) -> int:
+    return fromSquare | (toSquare << 6) | (flag << 12)
+
+def moveFromSquare(move : int) -> int:
+    return move & 63
+
+def moveToSquare(move : int) -> int:
+    return (move >> 6) & 63
+
+def moveFlag(move : int) -> int:
+    return move >> 12
+
+def squareName(square : int) -> str:
+    return "abcdefgh"[square & 7] + str(8 - (square >> 3))
+
+def moveToUCI(move : int) -> str: # UCI long algebraic notation (eg., e2e4, e7e8q)
+    ret = squareName(move & 63) + squareName((move >> 6) & 63)
+    if move >> 12 & PROMOTION:
+        ret = ret + "nbrq"[(move >> 12) & 3]
+    return ret
+
+def moveToString(move : int) -> str: # long notation used by askForMove (eg., b1-a3), with the promotion piece appended (eg., e7-e8Q)
+    ret = squareName(move & 63) + "-" + squareName((move >> 6) & 63)
+    if move >> 12 & PROMOTION:
+        ret = ret + pieceLetters[KNIGHT + ((move >> 12) & 3)]
+    return ret
@@ -0,0 +1,98 @@
+from __future__ import annotations
+import importlib
+import marshal
+import os
+import sys
+import typing
+from array import array
+
+
+################################
+####    Table Cache         ####
+################################
+
+# The attack tables, Zobrist keys and piece-square values are built when their module is imported. They can also be loaded from one
+# precomputed marshal file, written with --build-table-cache. A process which starts often (eg., a spawned worker) can then skip
+# rebuilding them.
+# Each module asks for its tables by section name, with a key made of everything the tables are built from. The key also gets the
+# modification time and size of the file the build function is defined in, so editing the builder (or any helper next to it) makes the
+# cached tables stale. A section whose key doesn't match, a missing or unreadable file, or CIP_TABLE_CACHE set to an empty string all fall
+# back to building the tables, so the cache can only ever save time.
+# The file lives next to the package's bytecode by default. CIP_TABLE_CACHE=FILE points at another one.
+# Lists of ints are stored as packed 64-bit arrays: marshal writes a big int digit by digit, which made loading the tables slower than
+# building them, while unpacking an array is a single copy.
+
+TABLE_CACHE_VERSION = 1
+defaultTableCachePath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__pycache__", f"tables.{sys.implementation.cache_tag}.marshal")
+
+_loadedSections = {}    # section -> (key, tables), read from the cache file on first use
+_builtSections = {}     # section -> (key, tables) for every section this process has asked for, whichever way it got them
+
+def tableCachePath() -> typing.Optional[str]: # the cache file to read, or None when the cache is switched off
+    path = os.environ.get("CIP_TABLE_CACHE", defaultTableCachePath)
+    return path or None
+
+def _packTables(value):
+    if isinstance(value, dict):
+        return {name: _packTables(table) for name, table in value.items()}
+    if isinstance(value, list) and value and isinstance(value[0], int):
+        typeCode = "q" if min(value) < 0 else "Q"
+        return (typeCode, array(typeCode, value).tobytes())
+    if isinstance(value, list):
+        return [_packTables(item) for item in value]
+    return value
+
+def _unpackTables(value):
+    if isinstance(value, dict):
+        return {name: _unpackTables(table) for name, table in value.items()}
+    if isinstance(value, tuple):
+        values = array(value[0])
+        values.frombytes(value[1])
+        return values.tolist()
+    if isinstance(value, list):
+        return [_unpackTables(item) for item in value]
+    return value
+
+def _readTableCache() -> dict:
+    if "sections" not in _loadedSections:
+        sections = {}
+        path = tableCachePath()
+        if path is not None:
+            try:
+                with open(path, "rb") as file:
+                    version, sections = marshal.load(file)
+                if version != TABLE_CACHE_VERSION:
+                    sections = {}
+            except (OSError, EOFError, ValueError, TypeError):
+                sections = {}
+        _loadedSections["sections"] = sections
+    return _loadedSections["sections"]
+
+def _sourceStamp(build : typing.Callable) -> typing.Optional[typing.Tuple[int, int]]: # (mtime in ns, size) of the file build comes from
+    try:
+        stat = os.stat(build.__code__.co_filename)
+    except OSError:
+        return None     # eg., running from a zip file: no stamp, so the cache is never used
+    return stat.st_mtime_ns, stat.st_size
+
+def cachedTables(section : str, key : tuple, build : typing.Callable[[], dict]) -> dict: # the tables of one section, from the cache file if it holds them for this key
+    stamp = _sourceStamp(build)
+    key = (key, stamp)
+    cached = _readTableCache().get(section) if stamp is not None else None
+    tables = _unpackTables(cached[1]) if cached is not None and cached[0] == key else build()
+    _builtSections[section] = (key, tables)
+    return tables
+
+def writeTableCache(path : str = None) -> str: # writes every section to path (the cache file in use if not given) and returns the path
+    for module in ("board", "eval"):     # importing them registers their sections
+        importlib.import_module(f"{__package__}.{module}")
+    path = path or tableCachePath() or defaultTableCachePath
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # write to a temporary file and rename it over the old one, so a process starting meanwhile never reads half a file
+    temporaryPath = f"{path}.{os.getpid()}.tmp"
+    with open(temporaryPath, "wb") as file:
+        marshal.dump((TABLE_CACHE_VERSION, {section: (key, _packTables(tables)) for section, (key, tables) in _builtSections.items()}), file)
+    os.replace(temporaryPath, path)
+    return path
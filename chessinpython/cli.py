@@ -0,0 +1,144 @@
+from __future__ import annotations
+import sys
+import typing
+import argparse
+import os
+import time
+from .rules import STANDARD_FEN
+
+
+###########################
+####    Command Line   ####
+###########################
+
+# Each command imports the modules it needs when it runs, so that eg., --uci or a --workers child never pays for numpy, asyncio or the
+# match and server code.
+
+def parseArguments(argv : typing.List[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Chess in Python. Without options, starts the interactive game.")
+    parser.add_argument("--perft", type=int, metavar="DEPTH", help="count leaf nodes to DEPTH with a per-root-move breakdown, and report nodes/second")
+    parser.add_argument("--fen", default=STANDARD_FEN, help="position for --perft (default: the standard start position)")
+    parser.add_argument("--perft-suite", action="store_true", help="run the reference perft positions as a correctness test and benchmark")
+    parser.add_argument("--max-nodes", type=int, default=200000, help="skip --perft-suite depths whose expected count is larger than this")
+    parser.add_argument("--tactics", type=int, metavar="DEPTH", help="search the tactical test positions to DEPTH with and without the quiescence search and SEE")
+    parser.add_argument("--search", type=int, metavar="DEPTH", help="root-split search of the --fen position to DEPTH and print the best move")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes for --perft and --search (0 = one per CPU core)")
+    parser.add_argument("--lazy-smp", action="store_true", help="--search with Lazy SMP (every process searches the whole tree, sharing one transposition table) instead of splitting the root moves")
+    parser.add_argument("--search-time", type=float, metavar="SECONDS", help="time budget for --search --lazy-smp")
+    parser.add_argument("--smp-scaling", type=int, metavar="DEPTH", help="report Lazy SMP time-to-depth and nodes/second for 1, 2, 4, 8 and 16 processes")
+    parser.add_argument("--compare", action="store_true", help="also time a single-process run and report the speedup")
+    parser.add_argument("--uci", action="store_true", help="run as a UCI engine on stdin/stdout")
+    parser.add_argument("--serve", action="store_true", help="run the JSON-lines game server on --host/--port")
+    parser.add_argument("--serve-stdin", action="store_true", help="run the JSON-lines game server on stdin/stdout")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--server-load-test", type=int, metavar="GAMES", help="load test the game server with GAMES concurrent random games")
+    parser.add_argument("--server-connections", type=int, default=50, help="client sockets the --server-load-test games are spread over")
+    parser.add_argument("--match", nargs="?", const="", metavar="BASELINE", help="self-play match of this build against BASELINE (another checkout of this package, or an older single-file build; default: itself)")
+    parser.add_argument("--games", type=int, default=1000, help="games for --match (at most; SPRT may stop it sooner)")
+    parser.add_argument("--match-nodes", type=int, help="nodes per move in --match games (default 20000 unless --match-time is given)")
+    parser.add_argument("--match-time", type=float, help="seconds per move in --match games")
+    parser.add_argument("--openings", metavar="FILE", help="opening suite for --match: a PGN file, or one FEN or UCI move list per line")
+    parser.add_argument("--match-pgn", default="match.pgn", help="where --match writes its games")
+    parser.add_argument("--sprt", nargs=2, type=float, default=(0.0, 5.0), metavar=("ELO0", "ELO1"), help="SPRT hypotheses for --match")
+    parser.add_argument("--instrument", nargs="?", const="", metavar="FILE", help="record hot-path counters and timings and write them as JSON to FILE (stderr without FILE) at exit")
+    parser.add_argument("--profile", metavar="FILE", default=os.environ.get("CIP_PROFILE"), help="run under cProfile and write a pstats file")
+    parser.add_argument("--startup-bench", type=int, nargs="?", const=5, metavar="RUNS", help="time importing the package and a first move in fresh processes (median of RUNS, default 5)")
+    parser.add_argument("--build-table-cache", nargs="?", const="", metavar="FILE", help="precompute the attack, Zobrist and evaluation tables into FILE (default: next to the package bytecode)")
+    parser.add_argument("--alloc-bench", type=int, metavar="PLIES", help="count the objects allocated per move by the interactive move path, with tracemalloc")
+    parser.add_argument("--alloc-baseline", metavar="BUILD", help="also run --alloc-bench on BUILD (another checkout of this package, or an older single-file build) for a before and after comparison")
+    parser.add_argument("--pgn-bench", metavar="FILE", help="stream every game in a PGN file through the rules engine and report games/second")
+    parser.add_argument("--build-book", nargs="+", metavar=("OUTPUT", "PGN"), help="build an opening book file OUTPUT from one or more PGN files")
+    parser.add_argument("--book-plies", type=int, default=24, help="plies of each game counted by --build-book")
+    parser.add_argument("--book-min-games", type=int, default=2, help="moves played in fewer games than this are left out of the book")
+    parser.add_argument("--book", metavar="FILE", help="opening book for the engine player (interactive AI games and --uci)")
+    parser.add_argument("--generate-tablebases", nargs="+", metavar="SIGNATURE", help="generate endgame tablebases (eg., KQvK KRvK KPvK) and the smaller ones they need")
+    parser.add_argument("--tablebases", metavar="DIR", help="endgame tablebase directory for the engine player (interactive AI games and --uci)")
+    return parser.parse_args(argv)
+
+def runFromArguments(arguments : argparse.Namespace):
+    workers = arguments.workers if arguments.workers > 0 else os.cpu_count() or 1    # parallel.defaultWorkerCount, without importing the process pool
+    openingBook = tablebases = None
+    if arguments.book:
+        from .io import OpeningBook
+        openingBook = OpeningBook(arguments.book)
+    if arguments.tablebases:
+        from .tablebases import Tablebases
+        tablebases = Tablebases(arguments.tablebases)
+    if arguments.uci:
+        from .uci import UCIServer
+        server = UCIServer()
+        server.openingBook = openingBook
+        server.engine.tablebases = tablebases
+        server.run()
+    elif arguments.serve or arguments.serve_stdin or arguments.server_load_test is not None:
+        import asyncio
+        from .server import GameServer, runServerLoadTest
+        if arguments.serve:
+            asyncio.run(GameServer().serveTCP(arguments.host, arguments.port))
+        elif arguments.serve_stdin:
+            asyncio.run(GameServer().serveStdin())
+        else:
+            asyncio.run(runServerLoadTest(arguments.server_load_test, connections=arguments.server_connections))
+    elif arguments.perft is not None:
+        from .perft import runPerft
+        runPerft(arguments.perft, arguments.fen, workers, arguments.compare)
+    elif arguments.tactics is not None:
+        from .search import runTacticalBenchmark
+        runTacticalBenchmark(arguments.tactics)
+    elif arguments.smp_scaling is not None:
+        from .parallel import runLazySMPScaling
+        runLazySMPScaling(arguments.smp_scaling, arguments.fen)
+    elif arguments.search is not None and arguments.lazy_smp:
+        from .parallel import runLazySMPSearch
+        runLazySMPSearch(arguments.search, arguments.fen, workers, arguments.search_time)
+    elif arguments.search is not None:
+        from .parallel import runParallelSearch
+        runParallelSearch(arguments.search, arguments.fen, workers, arguments.compare)
+    elif arguments.match is not None:
+        from .match import loadOpenings, runMatch
+        openings = loadOpenings(arguments.openings) if arguments.openings else None
+        runMatch(arguments.match or None, arguments.games, arguments.match_nodes, arguments.match_time, openings, workers, arguments.match_pgn, *arguments.sprt)
+    elif arguments.startup_bench is not None:
+        from .instrumentation import runStartupBenchmark
+        runStartupBenchmark(arguments.startup_bench)
+    elif arguments.build_table_cache is not None:
+        from .cache import writeTableCache
+        print(f"tables written to {writeTableCache(arguments.build_table_cache or None)}")
+    elif arguments.alloc_bench is not None:
+        from .instrumentation import runAllocationBenchmark
+        runAllocationBenchmark(arguments.alloc_bench, baseline=arguments.alloc_baseline)
+    elif arguments.pgn_bench is not None:
+        from .io import runPGNBenchmark
+        runPGNBenchmark(arguments.pgn_bench)
+    elif arguments.generate_tablebases is not None:
+        from .tablebases import generateTablebases
+        generateTablebases(arguments.generate_tablebases, arguments.tablebases or "tablebases", workers)
+    elif arguments.build_book is not None:
+        from .io import buildOpeningBook
+        if len(arguments.build_book) < 2:
+            sys.exit("--build-book needs an output file and at least one PGN file")
+        startTime = time.perf_counter()
+        count = buildOpeningBook(arguments.build_book[1:], arguments.build_book[0], arguments.book_plies, arguments.book_min_games)
+        print(f"{count} book entries written to {arguments.build_book[0]} in {time.perf_counter() - startTime:.3f}s")
+    elif arguments.perft_suite:
+        from .perft import runPerftSuite
+        sys.exit(0 if runPerftSuite(arguments.max_nodes) else 1)
+    else:
+        from .app import ChessApp
+        ChessApp(openingBook, tablebases)    # the game loop runs in the constructor
+
+def main(argv : typing.List[str] = None):
+    arguments = parseArguments(argv)
+    # instrumentation is only imported when it is asked for (CIP_INSTRUMENT is picked up by the package's __init__)
+    if arguments.instrument is not None:
+        from .instrumentation import instrumentation
+        instrumentation.enable(arguments.instrument or None)
+    if arguments.profile:
+        from .instrumentation import profileRun
+        profileRun(lambda: runFromArguments(arguments), arguments.profile)
+    else:
+        runFromArguments(arguments)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import typing
+from .cache import cachedTables
+from .board import Colour, colourIndex, iterateBits, KING, kingTable, knightTable, pawnAttackTable, rayTable, ROOK_DIRECTIONS
+
+if typing.TYPE_CHECKING:
+    import numpy as np
+    from .rules import BitboardChessBoard, GameState
+
+
+###########################
+####    Evaluation     ####
+###########################
+
+# The evaluation is material plus piece-square tables, all in centipawns. Both are per (piece code, square), so they are folded into one table
+# (pieceSquareValues) holding the signed value from white's point of view. GameState keeps the sum for the pieces on the board up to date on every move.
+
+pieceValues = (100, 320, 330, 500, 900, 0)  # centipawns, indexed by pieceType
+seeValues = pieceValues[:KING] + (20000,)     # the same, with a king worth more than anything it could win (for static exchange evaluation)
+
+# piece-square bonuses for white, laid out like the board is printed: the first row is rank 8 (square 0 is a8). black uses the same tables mirrored vertically.
+pieceSquareTables = (
+    (  0,   0,   0,   0,   0,   0,   0,   0,     # pawn
+      50,  50,  50,  50,  50,  50,  50,  50,
+      10,  10,  20,  30,  30,  20,  10,  10,
+       5,   5,  10,  25,  25,  10,   5,   5,
+       0,   0,   0,  20,  20,   0,   0,   0,
+       5,  -5, -10,   0,   0, -10,  -5,   5,
+       5,  10,  10, -20, -20,  10,  10,   5,
+       0,   0,   0,   0,   0,   0,   0,   0),
+    (-50, -40, -30, -30, -30, -30, -40, -50,     # knight
+     -40, -20,   0,   0,   0,   0, -20, -40,
+     -30,   0,  10,  15,  15,  10,   0, -30,
+     -30,   5,  15,  20,  20,  15,   5, -30,
+     -30,   0,  15,  20,  20,  15,   0, -30,
+     -30,   5,  10,  15,  15,  10,   5, -30,
+     -40, -20,   0,   5,   5,   0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50),
+    (-20, -10, -10, -10, -10, -10, -10, -20,     # bishop
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,  10,  10,   5,   0, -10,
+     -10,   5,   5,  10,  10,   5,   5, -10,
+     -10,   0,  10,  10,  10,  10,   0, -10,
+     -10,  10,  10,  10,  10,  10,  10, -10,
+     -10,   5,   0,   0,   0,   0,   5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20),
+    (  0,   0,   0,   0,   0,   0,   0,   0,     # rook
+       5,  10,  10,  10,  10,  10,  10,   5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+      -5,   0,   0,   0,   0,   0,   0,  -5,
+       0,   0,   0,   5,   5,   0,   0,   0),
+    (-20, -10, -10,  -5,  -5, -10, -10, -20,     # queen
+     -10,   0,   0,   0,   0,   0,   0, -10,
+     -10,   0,   5,   5,   5,   5,   0, -10,
+      -5,   0,   5,   5,   5,   5,   0,  -5,
+       0,   0,   5,   5,   5,   5,   0,  -5,
+     -10,   5,   5,   5,   5,   5,   0, -10,
+     -10,   0,   5,   0,   0,   0,   0, -10,
+     -20, -10, -10,  -5,  -5, -10, -10, -20),
+    (-30, -40, -40, -50, -50, -40, -40, -30,     # king
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+      20,  20,   0,   0,   0,   0,  20,  20,
+      20,  30,  10,   0,   0,  10,  30,  20),
+)
+
+# pieceSquareValues[code][square] is material + piece-square bonus, positive for white pieces and negative for black ones
+def _buildPieceSquareValues() -> dict:
+    return {"values": [[pieceValues[pieceType] + pieceSquareTables[pieceType][square] for square in range(64)] for pieceType in range(6)] +
+                      [[-(pieceValues[pieceType] + pieceSquareTables[pieceType][square ^ 56]) for square in range(64)] for pieceType in range(6)]}
+
+pieceSquareValues = cachedTables("evaluation", (pieceValues, pieceSquareTables), _buildPieceSquareValues)["values"]
+
+def computeEvaluation(board : BitboardChessBoard) -> int: # full recompute of the white-relative score, used to set up GameState.evaluation and to verify the incremental updates
+    score = 0
+    for code in range(12):
+        values = pieceSquareValues[code]
+        for square in iterateBits(board.pieceBitboards[code]):
+            score += values[square]
+    return score
+
+def evaluatePosition(state : GameState) -> int: # score from the side to move's point of view, read straight from the incrementally updated total
+    return state.evaluation if state.sideToMove == Colour.WHITE else -state.evaluation
+
+
+########################################
+####    Batch Evaluation (NumPy)    ####
+########################################
+
+# Scores and checks many positions at once with array operations instead of one GameState at a time.
+# Boards come in as an (N, 64) int8 array in square order (a8 first), holding +1..+6 for white pawn..king, -1..-6 for black, and 0 for empty,
+# or as an (N, 12) uint64 array of piece bitboards in piece code order. sideToMove is an optional (N,) array, 0 for white and 1 for black.
+
+def _requireNumpy(): # numpy is only imported on the first batch call, so that the rest of the engine starts without paying for it
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("the batch evaluation API requires numpy") from None
+    return numpy
+
+def statesToArray(states : typing.Iterable[GameState]) -> typing.Tuple[np.ndarray, np.ndarray]: # ((N, 64) int8 boards, (N,) side to move) for a list of GameStates
+    np = _requireNumpy()
+    signedCodes = [0] + [pieceType + 1 for pieceType in range(6)] + [-(pieceType + 1) for pieceType in range(6)]  # indexed by code + 1
+    boards = []
+    sides = []
+    for state in states:
+        boards.append([signedCodes[code + 1] for code in state.gameBoard.mailbox])
+        sides.append(colourIndex[state.sideToMove])
+    return np.array(boards, dtype=np.int8).reshape(-1, 64), np.array(sides, dtype=np.int8)
+
+def bitboardsToArray(bitboards : np.ndarray) -> np.ndarray: # (N, 12) uint64 piece bitboards -> (N, 64) int8 boards
+    np = _requireNumpy()
+    bitboards = np.asarray(bitboards, dtype=np.uint64)
+    bits = (bitboards[:, :, None] >> np.arange(64, dtype=np.uint64)[None, None, :]) & np.uint64(1)
+    signedTypes = np.array([pieceType + 1 for pieceType in range(6)] + [-(pieceType + 1) for pieceType in range(6)], dtype=np.int8)
+    return (bits.astype(np.int8) * signedTypes[None, :, None]).sum(axis=1, dtype=np.int8)
+
+def _batchTables():
+    # lookup tables indexed by (signed piece value + 6), built on first use and cached on the function
+    if not hasattr(_batchTables, "cache"):
+        np = _requireNumpy()
+        material = np.zeros(13, dtype=np.int32)
+        pieceSquare = np.zeros((13, 64), dtype=np.int32)
+        for pieceType in range(6):
+            material[pieceType + 7] = pieceValues[pieceType]
+            material[5 - pieceType] = -pieceValues[pieceType]
+            for square in range(64):
+                pieceSquare[pieceType + 7, square] = pieceSquareTables[pieceType][square]
+                pieceSquare[5 - pieceType, square] = -pieceSquareTables[pieceType][square ^ 56]
+        knight = np.array([[(knightTable[square] >> other) & 1 for other in range(64)] for square in range(64)], dtype=bool)
+        king = np.array([[(kingTable[square] >> other) & 1 for other in range(64)] for square in range(64)], dtype=bool)
+        pawn = np.array([[[(pawnAttackTable[side][square] >> other) & 1 for other in range(64)] for square in range(64)] for side in range(2)], dtype=bool)
+        # rays[square, direction, step] lists the squares along each ray, padded with 64 (a sentinel column which is never empty)
+        rays = np.full((64, 8, 7), 64, dtype=np.int64)
+        for square in range(64):
+            for direction in range(8):
+                squares = list(iterateBits(rayTable[direction][square]))
+                if direction >= 4:
+                    squares.reverse()   # nearest square first
+                rays[square, direction, :len(squares)] = squares
+        _batchTables.cache = (material, pieceSquare, knight, king, pawn, rays)
+    return _batchTables.cache
+
+def batchInCheck(boards : np.ndarray, sideToMove : np.ndarray = None) -> np.ndarray: # (N,) bool: is the side to move's king attacked
+    np = _requireNumpy()
+    material, pieceSquare, knight, king, pawn, rays = _batchTables()
+    boards = np.asarray(boards, dtype=np.int8)
+    count = boards.shape[0]
+    side = np.zeros(count, dtype=np.int8) if sideToMove is None else np.asarray(sideToMove, dtype=np.int8)
+    # flip signs so the side to move's pieces are positive and the enemy's negative
+    relative = boards * np.where(side == 0, 1, -1).astype(np.int8)[:, None]
+    hasKing = (relative == 6).any(axis=1)
+    kingSquare = np.argmax(relative == 6, axis=1)
+
+    attacked = (knight[kingSquare] & (relative == -2)).any(axis=1)
+    attacked |= (king[kingSquare] & (relative == -6)).any(axis=1)
+    attacked |= (pawn[side, kingSquare] & (relative == -1)).any(axis=1)
+
+    # walk every ray out from the king to the first occupied square (the sentinel stops rays at the edge)
+    padded = np.concatenate([relative, np.full((count, 1), 127, dtype=np.int8)], axis=1)
+    alongRays = np.take_along_axis(padded, rays[kingSquare].reshape(count, -1), axis=1).reshape(count, 8, 7)
+    firstIndex = np.argmax(alongRays != 0, axis=2)
+    firstPiece = np.take_along_axis(alongRays, firstIndex[:, :, None], axis=2)[:, :, 0]
+    orthogonal = np.zeros(8, dtype=bool)
+    orthogonal[list(ROOK_DIRECTIONS)] = True
+    attacked |= (orthogonal[None, :] & ((firstPiece == -4) | (firstPiece == -5))).any(axis=1)
+    attacked |= (~orthogonal[None, :] & ((firstPiece == -3) | (firstPiece == -5))).any(axis=1)
+    return attacked & hasKing
+
+def batchEvaluate(boards : np.ndarray, sideToMove : np.ndarray = None, bitboards : bool = False) -> typing.Dict[str, np.ndarray]:
+    # returns (N,) arrays: material and pieceSquare (white-relative, in centipawns), evaluation (material + pieceSquare from the side to move's
+    # point of view, the same number evaluatePosition gives), inCheck (side to move's king attacked) and valid (one king each, no pawns on the
+    # back ranks, and the side which just moved isn't left in check)
+    np = _requireNumpy()
+    if bitboards:
+        boards = bitboardsToArray(boards)
+    boards = np.asarray(boards, dtype=np.int8)
+    count = boards.shape[0]
+    side = np.zeros(count, dtype=np.int8) if sideToMove is None else np.asarray(sideToMove, dtype=np.int8)
+    materialTable, pieceSquareTable = _batchTables()[:2]
+    index = boards.astype(np.int64) + 6
+    material = materialTable[index].sum(axis=1)
+    positional = pieceSquareTable[index, np.arange(64)[None, :]].sum(axis=1)
+    total = material + positional
+    inCheck = batchInCheck(boards, side)
+    valid = ((boards == 6).sum(axis=1) == 1) & ((boards == -6).sum(axis=1) == 1)
+    valid &= ~(np.abs(boards[:, :8]) == 1).any(axis=1) & ~(np.abs(boards[:, 56:]) == 1).any(axis=1)
+    valid &= ~batchInCheck(boards, 1 - side)
+    return {"material": material, "pieceSquare": positional, "evaluation": np.where(side == 0, total, -total),
+            "inCheck": inCheck, "valid": valid}
@@ -0,0 +1,290 @@
+from __future__ import annotations
+import re
+import sys
+import typing
+import os
+import random
+import time
+import tracemalloc
+import atexit
+import cProfile
+import signal
+import json
+import multiprocessing
+import shutil
+import statistics
+import subprocess
+import tempfile
+from .board import Position
+from .pieces import pieceClasses
+from .rules import GameState, STANDARD_FEN
+from .search import SearchEngine
+from .app import NewGame
+
+
+#################################
+####    Instrumentation      ####
+#################################
+
+# Opt-in counters and timings for the hot paths: isValidMove for each piece class, movePiece, makeMove, evaluateBoard, isKingCheck,
+# Position lookups (Positions are interned, so these are lookups rather than allocations) and search nodes/second.
+# It is switched on with --instrument [FILE] or the CIP_INSTRUMENT environment variable (set to a file name, or to 1 for stderr).
+# Enabling it swaps timing wrappers in over the methods; while it is off the original methods are in place, so it costs nothing.
+# The report is written as JSON at exit, on demand with instrumentation.dump(), or when the process gets SIGUSR1.
+# --profile FILE (or CIP_PROFILE) runs the whole command under cProfile and writes a pstats file for `python -m pstats FILE`.
+# Only the main process is measured; --workers processes are not.
+
+class HotPathStats:
+    SAMPLE_LIMIT = 10000    # latencies kept per path for the percentiles; later calls replace random samples (reservoir sampling)
+
+    def __init__(self, sampler : random.Random):
+        self.calls = 0
+        self.totalSeconds = 0.0
+        self.samples = []
+        self.sampler = sampler
+
+    def record(self, seconds : float):
+        self.calls += 1
+        self.totalSeconds += seconds
+        if len(self.samples) < self.SAMPLE_LIMIT:
+            self.samples.append(seconds)
+        else:
+            slot = self.sampler.randrange(self.calls)
+            if slot < self.SAMPLE_LIMIT:
+                self.samples[slot] = seconds
+
+    def report(self) -> typing.Dict[str, float]:
+        ordered = sorted(self.samples)
+        percentile = lambda fraction: ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1e6 if ordered else 0.0
+        return {"calls": self.calls, "totalSeconds": round(self.totalSeconds, 6),
+                "meanMicroseconds": round(self.totalSeconds / self.calls * 1e6, 3) if self.calls else 0.0,
+                "p50Microseconds": round(percentile(0.50), 3), "p99Microseconds": round(percentile(0.99), 3),
+                "callsPerSecond": round(self.calls / self.totalSeconds) if self.totalSeconds else 0}
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled = False
+        self.outputPath = None
+        self.sampler = random.Random(0)
+        self.reset()
+
+    def reset(self):
+        self.stats = {}
+        self.positionLookups = 0
+        self.searchNodes = 0
+        self.searchSeconds = 0.0
+        self.startTime = time.perf_counter()
+
+    def hotPaths(self) -> typing.List[typing.Tuple[str, type, str]]: # (report name, class, method name) for every timed method
+        paths = [(f"{pieceClass.__name__}.isValidMove", pieceClass, "isValidMove") for pieceClass in pieceClasses]
+        paths += [("GameState.movePiece", GameState, "movePiece"), ("GameState.makeMove", GameState, "makeMove"),
+                  ("NewGame.evaluateBoard", NewGame, "evaluateBoard"), ("NewGame.isKingCheck", NewGame, "isKingCheck")]
+        return paths
+
+    def enable(self, outputPath : str = None):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.outputPath = outputPath
+        self.reset()
+        self.originals = []
+        for name, owner, attribute in self.hotPaths():
+            self.originals.append((owner, attribute, owner.__dict__[attribute]))
+            setattr(owner, attribute, self.timed(name, owner.__dict__[attribute]))
+        originalNew = Position.__dict__["__new__"]
+        self.originals.append((Position, "__new__", originalNew))
+        def countedNew(cls, x=0, y=0):
+            self.positionLookups += 1
+            return originalNew(cls, x, y)
+        Position.__new__ = staticmethod(countedNew)
+        # every search (findBestMove, searchScore) runs one iterativeDeepening, and engine.nodes starts from zero for each
+        originalDeepening = SearchEngine.__dict__["iterativeDeepening"]
+        self.originals.append((SearchEngine, "iterativeDeepening", originalDeepening))
+        def countedDeepening(engine, *arguments, **keywords):
+            startTime = time.perf_counter()
+            try:
+                return originalDeepening(engine, *arguments, **keywords)
+            finally:
+                self.searchSeconds += time.perf_counter() - startTime
+                self.searchNodes += engine.nodes
+        SearchEngine.iterativeDeepening = countedDeepening
+        atexit.register(self.dump)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signalNumber, frame: self.dump())
+
+    def disable(self):
+        if not self.enabled:
+            return
+        for owner, attribute, original in reversed(self.originals):
+            setattr(owner, attribute, original)
+        self.originals = []
+        self.enabled = False
+        atexit.unregister(self.dump)
+
+    def timed(self, name : str, function : typing.Callable) -> typing.Callable:
+        stats = self.stats.setdefault(name, HotPathStats(self.sampler))
+        clock = time.perf_counter
+        def wrapper(*arguments, **keywords):
+            startTime = clock()
+            try:
+                return function(*arguments, **keywords)
+            finally:
+                stats.record(clock() - startTime)
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    def report(self) -> dict:
+        return {"elapsedSeconds": round(time.perf_counter() - self.startTime, 6),
+                "hotPaths": {name: stats.report() for name, stats in self.stats.items() if stats.calls},
+                "positionLookups": self.positionLookups,
+                "search": {"nodes": self.searchNodes, "seconds": round(self.searchSeconds, 6),
+                           "nodesPerSecond": round(self.searchNodes / self.searchSeconds) if self.searchSeconds else 0}}
+
+    def dump(self, path : str = None): # writes the report as JSON to path (or the path given to enable(), or stderr)
+        path = path or self.outputPath
+        text = json.dumps(self.report(), indent=2)
+        if path:
+            with open(path, "w") as file:
+                file.write(text + "\n")
+        else:
+            sys.stderr.write(text + "\n")
+
+
+instrumentation = Instrumentation()
+
+def profileRun(function : typing.Callable, path : str): # runs function under cProfile and writes the pstats file, even if it exits with an exception
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(function)
+    finally:
+        profiler.dump_stats(path)
+        print(f"profile written to {path}", file=sys.stderr)
+
+if os.environ.get("CIP_INSTRUMENT"):
+    instrumentation.enable(None if os.environ["CIP_INSTRUMENT"] == "1" else os.environ["CIP_INSTRUMENT"])
+
+
+def _allocationsPerMove(build, plies : int, seed : int) -> typing.Tuple[int, float, float, float]: # (moves, blocks, bytes, peak bytes) for one build
+    # replays a random game through the interactive path: parse the move into Positions, fetch the piece, probe every destination square
+    # with isValidMove (as a legal-move highlight would) and play it with movePiece. the Positions and Pieces that path hands out are kept
+    # alive until the move is done, so tracemalloc's snapshot difference counts every one of them.
+    # everything comes from build (this package, or another build loaded like --match does), so older builds can be measured the same way
+    Position, positionFromSquare, pieceLetters, QUEEN = build.Position, build.positionFromSquare, build.pieceLetters, build.QUEEN
+    moveToString, longNotationPattern = build.moveToString, build.longNotationPattern
+    state = build.GameState.fromFEN(build.STANDARD_FEN)
+    chooser = random.Random(seed)
+    buildFile = os.path.abspath(build.__file__)
+    if os.path.basename(buildFile) == "__init__.py":     # a package: count allocations in any of its modules
+        buildFile = os.path.join(os.path.dirname(buildFile), "*")
+    onlyThisBuild = [tracemalloc.Filter(True, buildFile)]
+    totalBlocks = totalBytes = totalPeak = moves = 0
+    tracemalloc.start()
+    for ply in range(plies):
+        legalMoves = list(state.legalMoves())
+        if not legalMoves:
+            break
+        match = re.search(longNotationPattern, moveToString(chooser.choice(legalMoves)))
+        kept = [None] * 67
+        before = tracemalloc.take_snapshot().filter_traces(onlyThisBuild)
+        startBytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+        source = Position().setByFileRank(match.group(1), match.group(2))
+        destination = Position().setByFileRank(match.group(3), match.group(4))
+        piece = state.gameBoard.getPieceFromBoard(source)
+        for square in range(64):
+            target = positionFromSquare(square)
+            piece.isValidMove(state.gameBoard, target)
+            kept[square] = target
+        kept[64], kept[65], kept[66] = source, destination, piece
+        state.movePiece(piece, destination, pieceLetters.index(match.group(5)) if match.group(5) else QUEEN)
+
+        totalPeak += tracemalloc.get_traced_memory()[1] - startBytes
+        differences = tracemalloc.take_snapshot().filter_traces(onlyThisBuild).compare_to(before, "filename")
+        totalBlocks += sum(difference.count_diff for difference in differences)
+        totalBytes += sum(difference.size_diff for difference in differences)
+        moves += 1
+        kept = None
+    tracemalloc.stop()
+    moves = max(moves, 1)
+    return moves, totalBlocks / moves, totalBytes / moves, totalPeak / moves
+
+_allocationRun = "from chessinpython.instrumentation import _allocationsPerMove\nfrom chessinpython.match import loadBuild\n" \
+                 "print(*_allocationsPerMove(loadBuild({build!r}), {plies}, {seed}))"
+
+def runAllocationBenchmark(plies : int = 40, seed : int = 0, baseline : str = None) -> typing.Tuple[float, float, float]: # (blocks, bytes, peak bytes) allocated per move by this build, on average
+    # with a baseline build (eg., a checkout from before Positions were interned), the same game is replayed through it too, for a before
+    # and after comparison. each build is measured in a fresh interpreter: a second build in the same process would get its tuples from the
+    # free lists the first one left behind, and look cheaper than it is
+    packageParent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (packageParent, os.environ.get("PYTHONPATH")))))
+    environment.pop("CIP_INSTRUMENT", None)
+    builds = [("this build", None)]
+    if baseline is not None:
+        builds.insert(0, (f"baseline {baseline}", os.path.abspath(baseline)))
+    results = {}
+    for name, build in builds:
+        output = subprocess.run([sys.executable, "-c", _allocationRun.format(build=build, plies=plies, seed=seed)], env=environment,
+                                capture_output=True, text=True, check=True).stdout
+        moves, blocks, size, peak = results[name] = tuple(float(value) for value in output.split()[-4:])
+        print(f"{name}: {moves:.0f} moves, {blocks:.1f} blocks and {size:.0f} bytes allocated per move, peak {peak:.0f} bytes")
+    if baseline is not None:
+        before, after = results[builds[0][0]], results["this build"]
+        print(f"change: {after[1] - before[1]:+.1f} blocks ({after[1] / before[1]:.1%} of the baseline) and {after[2] - before[2]:+.0f} bytes per move")
+    return results["this build"][1:]
+
+
+##################################
+####    Start-up Benchmark    ####
+##################################
+
+# Times what a new process pays before it can play: importing the package, and setting up a GameState and SearchEngine for a first move.
+# Every run is a fresh interpreter, so nothing is already imported; the bytecode (and the table cache, for the run which uses one) is
+# written by an untimed warm-up run first. In-process times are measured inside the child from just before the code runs, so they leave
+# out the interpreter's own start-up, which is reported on its own line.
+# The worker lines start a one-process pool in a fresh interpreter and time its first move: a spawned worker imports everything itself,
+# while a forked one inherits the parent's modules (here, only the pool machinery). The empty task lines are the pool's own start-up, so
+# the difference is what the package costs a cold worker.
+
+_startupFirstMove = "from chessinpython.rules import GameState, STANDARD_FEN\nfrom chessinpython.search import SearchEngine\n" \
+                    "SearchEngine().findBestMove(GameState.fromFEN(STANDARD_FEN), {depth})"
+# the worker is handed exec and the source of its task, so that the parent process never imports the package itself
+_startupWorkerMove = "import multiprocessing\nfrom concurrent.futures import ProcessPoolExecutor\n" \
+                     "with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context({method!r})) as pool:\n" \
+                     "    pool.submit(exec, {task!r}).result()"
+_startupWorkerTask = "from chessinpython.parallel import _firstMove\n_firstMove({fen!r}, {depth})"
+
+def _timeStartup(code : str, environment : typing.Dict[str, str]) -> typing.Tuple[float, float]: # (in-process seconds, whole process seconds) of code in a new interpreter
+    timedCode = f"import time\nstartTime = time.perf_counter()\n{code}\nprint(time.perf_counter() - startTime)"
+    startTime = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", timedCode], env=environment, capture_output=True, text=True, check=True).stdout
+    return float(output.split()[-1]), time.perf_counter() - startTime
+
+def runStartupBenchmark(runs : int = 5, depth : int = 3) -> typing.Dict[str, typing.Tuple[float, float]]: # median (in-process, whole process) seconds by case
+    packageParent = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (packageParent, os.environ.get("PYTHONPATH")))))
+    environment.pop("CIP_INSTRUMENT", None)
+    cacheDirectory = tempfile.mkdtemp()
+    cachedEnvironment = dict(environment, CIP_TABLE_CACHE=os.path.join(cacheDirectory, "tables.marshal"))
+    uncachedEnvironment = dict(environment, CIP_TABLE_CACHE="")
+    cases = [("interpreter", "pass", uncachedEnvironment),
+             ("import chessinpython", "import chessinpython", uncachedEnvironment),
+             ("import chessinpython.search", "import chessinpython.search", uncachedEnvironment),
+             ("first move", _startupFirstMove.format(depth=depth), uncachedEnvironment),
+             ("first move, table cache", _startupFirstMove.format(depth=depth), cachedEnvironment)]
+    for method in ("spawn", "fork"):
+        if method in multiprocessing.get_all_start_methods():
+            cases.append((f"{method}ed worker, empty task", _startupWorkerMove.format(method=method, task="pass"), uncachedEnvironment))
+            cases.append((f"{method}ed worker first move", _startupWorkerMove.format(method=method, task=_startupWorkerTask.format(fen=STANDARD_FEN, depth=depth)), uncachedEnvironment))
+    report = {}
+    try:
+        subprocess.run([sys.executable, "-c", "from chessinpython.cache import writeTableCache; writeTableCache()"], env=cachedEnvironment, check=True)
+        for name, code, caseEnvironment in cases:
+            _timeStartup(code, caseEnvironment)    # warm-up: writes any missing bytecode
+            timings = [_timeStartup(code, caseEnvironment) for run in range(runs)]
+            report[name] = (statistics.median(timing[0] for timing in timings), statistics.median(timing[1] for timing in timings))
+            print(f"{name:<32} {report[name][0] * 1000:8.1f}ms in process {report[name][1] * 1000:8.1f}ms whole process")
+    finally:
+        shutil.rmtree(cacheDirectory, ignore_errors=True)
+    return report
@@ -0,0 +1,470 @@
+from __future__ import annotations
+import re
+import typing
+import os
+import random
+import time
+from array import array
+import mmap
+import struct
+from .board import CAPTURE, Colour, colourIndex, iterateBits, KING_CASTLE, KNIGHT, NO_PIECE, PAWN, pieceLetters, PROMOTION, QUEEN_CASTLE, squareName
+from .rules import BitboardChessBoard, GameState, RESULT_BLACK_WINS, RESULT_DRAW, RESULT_UNKNOWN, RESULT_WHITE_WINS, STANDARD_FEN
+
+
+###################################
+####    Binary Game Store      ####
+###################################
+
+# Positions and games are stored in a compact binary format so that large archives can be written and read without pickling Piece objects.
+#
+# A packed position is exactly 32 bytes:
+#   bytes 0-7    occupancy bitboard (little-endian)
+#   bytes 8-23   piece code of each occupied square, 4 bits each, in square order (low nibble first)
+#   byte 24      bit 0 = black to move, bits 1-4 = castling rights
+#   byte 25      en passant square (255 = none)
+#   byte 26      halfmove clock (capped at 255)
+#   bytes 27-28  fullmove number
+#   bytes 29-31  reserved (zero)
+#
+# A position file is POSITION_FILE_MAGIC followed by packed positions back to back.
+# A game file is GAME_FILE_MAGIC followed by game records: the packed start position, a 4-byte header (move count, result, padding),
+# then one 16-bit move per ply (the same packed move ints the move generator produces).
+# Readers mmap the file and decode one record at a time, so iterating over an archive never loads it into memory.
+
+POSITION_FILE_MAGIC = b"CIPPOS1\0"
+GAME_FILE_MAGIC = b"CIPGAME1"
+
+packedPositionStruct = struct.Struct("<Q16sBBBH3x")
+gameHeaderStruct = struct.Struct("<HBx")
+PACKED_POSITION_SIZE = packedPositionStruct.size
+
+def packPosition(state : GameState) -> bytes:
+    board = state.gameBoard
+    occupied = board.occupied
+    if occupied.bit_count() > 32:
+        raise ValueError("a packed position holds at most 32 pieces")
+    mailbox = board.mailbox
+    nibbles = bytearray(16)
+    for index, square in enumerate(iterateBits(occupied)):
+        nibbles[index >> 1] |= mailbox[square] << ((index & 1) * 4)
+    flags = (state.sideToMove == Colour.BLACK) | (board.castlingRights << 1)
+    enPassant = board.enPassantSquare if board.enPassantSquare >= 0 else 255
+    return packedPositionStruct.pack(occupied, bytes(nibbles), flags, enPassant, min(state.halfmoveClock, 255), state.fullmoveNumber)
+
+def unpackPosition(data, offset : int = 0) -> GameState:
+    occupied, nibbles, flags, enPassant, halfmoveClock, fullmoveNumber = packedPositionStruct.unpack_from(data, offset)
+    board = BitboardChessBoard()
+    for index, square in enumerate(iterateBits(occupied)):
+        board.putPiece((nibbles[index >> 1] >> ((index & 1) * 4)) & 15, square)
+    board.castlingRights = (flags >> 1) & 15
+    board.enPassantSquare = enPassant if enPassant != 255 else -1
+    state = GameState(board, Colour.BLACK if flags & 1 else Colour.WHITE)
+    state.halfmoveClock = halfmoveClock
+    state.fullmoveNumber = fullmoveNumber
+    return state
+
+def writePositions(path : str, states : typing.Iterable[GameState]) -> int: # returns the number of positions written
+    count = 0
+    with open(path, "wb") as file:
+        file.write(POSITION_FILE_MAGIC)
+        for state in states:
+            file.write(packPosition(state))
+            count += 1
+    return count
+
+def gameRecord(state : GameState, result : int = RESULT_UNKNOWN) -> bytes: # packs the game played on state so far (its start position and every move in the undo stack)
+    moves = [record[0] for record in state.undoStack]
+    # walk back to the start position to pack it, then replay the moves so state is left as it was
+    for move in moves:
+        state.unmakeMove()
+    startPosition = packPosition(state)
+    for move in moves:
+        state.makeMove(move)
+    return startPosition + gameHeaderStruct.pack(len(moves), result) + array("H", moves).tobytes()
+
+def writeGames(path : str, records : typing.Iterable[bytes], append : bool = False) -> int: # writes records made by gameRecord(); returns how many were written
+    count = 0
+    needsMagic = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "ab" if append else "wb") as file:
+        if needsMagic:
+            file.write(GAME_FILE_MAGIC)
+        for record in records:
+            file.write(record)
+            count += 1
+    return count
+
+
+class _MappedFile: # shared mmap handling for the readers below
+    def __init__(self, path : str, magic : bytes):
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(magic)] != magic:
+            self.close()
+            raise ValueError(f"{path} is not a {magic[:-1].decode(errors='replace')} file")
+        self.start = len(magic)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exceptionInfo):
+        self.close()
+
+
+class PositionFileReader(_MappedFile): # random access and lazy iteration over a position file
+    def __init__(self, path : str):
+        super().__init__(path, POSITION_FILE_MAGIC)
+
+    def __len__(self):
+        return (len(self.data) - self.start) // PACKED_POSITION_SIZE
+
+    def packedAt(self, index : int) -> bytes:
+        offset = self.start + index * PACKED_POSITION_SIZE
+        return self.data[offset:offset + PACKED_POSITION_SIZE]
+
+    def __getitem__(self, index : int) -> GameState:
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return unpackPosition(self.data, self.start + index * PACKED_POSITION_SIZE)
+
+    def __iter__(self) -> typing.Iterator[GameState]:
+        for offset in range(self.start, self.start + len(self) * PACKED_POSITION_SIZE, PACKED_POSITION_SIZE):
+            yield unpackPosition(self.data, offset)
+
+
+class GameFileReader(_MappedFile): # lazy iteration over a game file
+    def __init__(self, path : str):
+        super().__init__(path, GAME_FILE_MAGIC)
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[GameState, array, int]]: # (start position, moves, result) for each game
+        data = self.data
+        offset = self.start
+        end = len(data)
+        while offset < end:
+            start = unpackPosition(data, offset)
+            offset += PACKED_POSITION_SIZE
+            moveCount, result = gameHeaderStruct.unpack_from(data, offset)
+            offset += gameHeaderStruct.size
+            moves = array("H")
+            moves.frombytes(data[offset:offset + moveCount * 2])
+            offset += moveCount * 2
+            yield start, moves, result
+
+    def positions(self) -> typing.Iterator[GameState]: # every position of every game, replayed on one GameState per game
+        for state, moves, result in self:
+            yield state
+            for move in moves:
+                state.makeMove(move)
+                yield state
+
+################################
+####    PGN Pipeline        ####
+################################
+
+# Reading: readPGNGames() streams a PGN file line by line and yields one PGNGame (tags + SAN move list) at a time, so memory use is bounded by
+# the longest single game rather than the file size. replayGame() then plays a game's moves through the rules engine, yielding the
+# GameState after every move, and raises ValueError on the first move that isn't legal.
+# Writing: formatPGN() turns a start position and a list of packed moves back into PGN text.
+
+sanPattern = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+sevenTagRoster = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+pgnResults = {"1-0": RESULT_WHITE_WINS, "0-1": RESULT_BLACK_WINS, "1/2-1/2": RESULT_DRAW, "*": RESULT_UNKNOWN}
+pgnResultStrings = {code: text for text, code in pgnResults.items()}
+
+
+class PGNGame:
+    def __init__(self, tags : typing.Dict[str, str], moves : typing.List[str], result : str = "*"):
+        self.tags = tags
+        self.moves = moves      # SAN strings, in order
+        self.result = result
+
+    def startState(self) -> GameState:
+        if self.tags.get("SetUp") == "1" and "FEN" in self.tags:
+            return GameState.fromFEN(self.tags["FEN"])
+        return GameState.fromFEN(STANDARD_FEN)
+
+
+def moveToSAN(state : GameState, move : int, legalMoves : typing.List[int] = None) -> str: # standard algebraic notation for a legal move in state
+    board = state.gameBoard
+    fromSquare = move & 63
+    toSquare = (move >> 6) & 63
+    flag = move >> 12
+    pieceType = board.mailbox[fromSquare] % 6
+    if flag == KING_CASTLE:
+        san = "O-O"
+    elif flag == QUEEN_CASTLE:
+        san = "O-O-O"
+    elif pieceType == PAWN:
+        san = squareName(toSquare)
+        if flag & CAPTURE:
+            san = squareName(fromSquare)[0] + "x" + san
+        if flag & PROMOTION:
+            san += "=" + pieceLetters[KNIGHT + (flag & 3)]
+    else:
+        if legalMoves is None:
+            legalMoves = list(state.legalMoves())
+        # disambiguate against other pieces of the same type which can reach the same square: by file if that's enough, then by rank, then both
+        rivals = [other & 63 for other in legalMoves if other != move and (other >> 6) & 63 == toSquare and board.mailbox[other & 63] % 6 == pieceType]
+        disambiguation = ""
+        if rivals:
+            if all((rival & 7) != (fromSquare & 7) for rival in rivals):
+                disambiguation = squareName(fromSquare)[0]
+            elif all((rival >> 3) != (fromSquare >> 3) for rival in rivals):
+                disambiguation = squareName(fromSquare)[1]
+            else:
+                disambiguation = squareName(fromSquare)
+        san = pieceLetters[pieceType] + disambiguation + ("x" if flag & CAPTURE else "") + squareName(toSquare)
+
+    state.makeMove(move)
+    if board.isInCheck(colourIndex[state.sideToMove]):
+        san += "+" if any(True for reply in state.legalMoves()) else "#"
+    state.unmakeMove()
+    return san
+
+def parseSAN(state : GameState, san : str) -> int: # the legal move in state matching a SAN string; raises ValueError if there is no such move (or more than one)
+    text = san.rstrip("+#!?")
+    board = state.gameBoard
+    us = colourIndex[state.sideToMove]
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        wanted = KING_CASTLE if len(text) == 3 else QUEEN_CASTLE
+        for move in board.generateCastlingMoves(us):
+            if move >> 12 == wanted and board.isLegal(move):
+                return move
+        raise ValueError(f"illegal castling move {san!r} in {state.toFEN()}")
+
+    match = sanPattern.match(text)
+    if not match:
+        raise ValueError(f"unreadable SAN move {san!r}")
+    pieceLetter, fromFile, fromRank, destination, promotion = match.groups()
+    pieceType = pieceLetters.index(pieceLetter) if pieceLetter else PAWN
+    toSquare = (ord(destination[0]) - 97) + 8 * (56 - ord(destination[1]))
+    found = None
+    # only the moves of pieces of the named type are generated, and only candidates landing on the destination are checked for legality
+    for fromSquare in iterateBits(board.pieceBitboards[us * 6 + pieceType]):
+        if fromFile and fromSquare & 7 != ord(fromFile) - 97:
+            continue
+        if fromRank and fromSquare >> 3 != 56 - ord(fromRank):
+            continue
+        for move in board.generatePieceMoves(fromSquare):
+            if (move >> 6) & 63 != toSquare:
+                continue
+            flag = move >> 12
+            if flag & PROMOTION and (not promotion or pieceLetters[KNIGHT + (flag & 3)] != promotion):
+                continue
+            if not board.isLegal(move):
+                continue
+            if found is not None:
+                raise ValueError(f"ambiguous SAN move {san!r} in {state.toFEN()}")
+            found = move
+    if found is None:
+        raise ValueError(f"illegal SAN move {san!r} in {state.toFEN()}")
+    return found
+
+def readPGNGames(lines : typing.Iterable[str]) -> typing.Iterator[PGNGame]:
+    tags = {}
+    movetext = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith("[") and line.endswith("]"):
+            # a tag after some movetext starts the next game
+            if movetext:
+                yield _finishPGNGame(tags, movetext)
+                tags = {}
+                movetext = []
+            name, _, value = line[1:-1].partition(" ")
+            tags[name] = value.strip().strip('"')
+        elif line and not line.startswith("%"):
+            movetext.append(line)
+    if movetext or tags:
+        yield _finishPGNGame(tags, movetext)
+
+def _finishPGNGame(tags : typing.Dict[str, str], movetext : typing.List[str]) -> PGNGame:
+    text = "\n".join(movetext)    # kept as lines, since a ; comment only runs to the end of its line
+    # {comments} and ; comments in one pass, so whichever opens first wins (a ; inside braces, or a { after a ;, is just comment text)
+    text = re.sub(r"\{[^}]*\}|;[^\n]*", " ", text)
+    previous = None
+    while previous != text:                         # (variations), innermost first so nesting works
+        previous = text
+        text = re.sub(r"\([^()]*\)", " ", text)
+    moves = []
+    result = tags.get("Result", "*")
+    for token in text.split():
+        if token in pgnResults:
+            result = token
+            continue
+        if token.startswith("$"):
+            continue
+        token = re.sub(r"^\d+\.+", "", token)        # move numbers, including ones glued to the move (eg., 1.e4 or 12...Nf6), but not 0-0's zeros
+        if token:
+            moves.append(token)
+    return PGNGame(tags, moves, result)
+
+def replayGame(game : PGNGame) -> typing.Iterator[typing.Tuple[GameState, int]]: # (state after the move, move) for each move; the same GameState is reused for the whole game
+    state = game.startState()
+    for san in game.moves:
+        move = parseSAN(state, san)
+        state.makeMove(move)
+        yield state, move
+
+def formatPGN(tags : typing.Dict[str, str], startState : GameState, moves : typing.Iterable[int], result : str = "*") -> str:
+    tags = dict(tags)
+    tags["Result"] = result
+    if startState.toFEN() != STANDARD_FEN:
+        tags["SetUp"] = "1"
+        tags["FEN"] = startState.toFEN()
+    lines = [f'[{name} "{tags.get(name, "?")}"]' for name in sevenTagRoster]
+    lines += [f'[{name} "{value}"]' for name, value in tags.items() if name not in sevenTagRoster]
+    lines.append("")
+
+    tokens = []
+    playedMoves = 0
+    for move in moves:
+        if startState.sideToMove == Colour.WHITE:
+            tokens.append(f"{startState.fullmoveNumber}.")
+        elif playedMoves == 0:
+            tokens.append(f"{startState.fullmoveNumber}...")
+        tokens.append(moveToSAN(startState, move))
+        startState.makeMove(move)
+        playedMoves += 1
+    tokens.append(result)
+    # wrap the movetext at 80 columns
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 80:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    for move in range(playedMoves):
+        startState.unmakeMove()
+    return "\n".join(lines) + "\n"
+
+def gamePGN(state : GameState, tags : typing.Dict[str, str] = None, result : str = "*") -> str: # PGN for the game played on state so far
+    moves = [record[0] for record in state.undoStack]
+    # walk back to the start position to copy it, then replay the moves so state is left as it was
+    for move in moves:
+        state.unmakeMove()
+    start = GameState.decode(state.encode())
+    for move in moves:
+        state.makeMove(move)
+    return formatPGN(tags or {}, start, moves, result)
+
+def writePGNGames(stream : typing.TextIO, games : typing.Iterable[typing.Tuple[typing.Dict[str, str], GameState, typing.List[int], str]]) -> int: # writes (tags, start state, moves, result) tuples; returns the count
+    count = 0
+    for tags, startState, moves, result in games:
+        if count:
+            stream.write("\n")
+        stream.write(formatPGN(tags, startState, moves, result))
+        count += 1
+    return count
+
+def runPGNBenchmark(path : str) -> typing.Tuple[int, int, int]: # replays every game in a PGN file; returns (games, plies, games with an illegal move)
+    games = plies = invalid = 0
+    startTime = time.perf_counter()
+    with open(path, encoding="utf-8", errors="replace") as stream:
+        for game in readPGNGames(stream):
+            games += 1
+            try:
+                for state, move in replayGame(game):
+                    plies += 1
+            except ValueError as error:
+                invalid += 1
+                print(f"game {games}: {error}")
+    elapsed = time.perf_counter() - startTime
+    print(f"{games} games, {plies} plies, {invalid} invalid in {elapsed:.3f}s")
+    print(f"{games / max(elapsed, 1e-9):.1f} games/second, {plies / max(elapsed, 1e-9):.0f} plies/second")
+    return games, plies, invalid
+
+################################
+####    Opening Book        ####
+################################
+
+# The book is built offline from PGN files (buildOpeningBook / --build-book) into a flat file of fixed-size entries sorted by position key,
+# laid out like a Polyglot book: 64-bit key, 16-bit move, 16-bit weight, 32-bit spare. The key is this engine's own Zobrist positionKey and
+# the move is the packed 16-bit move, so the files are not interchangeable with Polyglot .bin books (those use a fixed published key table).
+# OpeningBook maps the file and binary searches it, so a lookup touches O(log n) entries and the book is never read in as a whole.
+# A move's weight is 2 per game won and 1 per game drawn by the side that played it, the same scheme Polyglot's builder uses.
+
+BOOK_FILE_MAGIC = b"CIPBOOK1"
+bookEntryStruct = struct.Struct("<QHHI")    # key, move, weight, spare
+BOOK_ENTRY_SIZE = bookEntryStruct.size
+
+
+def buildOpeningBook(pgnPaths : typing.Iterable[str], outputPath : str, maxPly : int = 24, minGames : int = 2) -> int: # returns the number of entries written
+    # (key, move) -> [games, weight]; only the first maxPly plies of each game are counted, which keeps this table small
+    counts = {}
+    for path in pgnPaths:
+        with open(path, encoding="utf-8", errors="replace") as stream:
+            for game in readPGNGames(stream):
+                result = pgnResults.get(game.result, RESULT_UNKNOWN)
+                state = game.startState()
+                try:
+                    for san in game.moves[:maxPly]:
+                        move = parseSAN(state, san)
+                        if result == RESULT_DRAW or result == RESULT_UNKNOWN:
+                            score = 1
+                        else:
+                            score = 2 if (result == RESULT_WHITE_WINS) == (state.sideToMove == Colour.WHITE) else 0
+                        entry = counts.setdefault((state.positionKey, move), [0, 0])
+                        entry[0] += 1
+                        entry[1] += score
+                        state.makeMove(move)
+                except ValueError:
+                    continue    # the moves before the illegal one have already been counted
+
+    entries = sorted((key, move, weight) for (key, move), (games, weight) in counts.items() if games >= minGames and weight > 0)
+    # weights are stored in 16 bits, so a very popular book is scaled down (never to zero)
+    largest = max((weight for key, move, weight in entries), default=0)
+    scale = 65535 / largest if largest > 65535 else 1
+    with open(outputPath, "wb") as file:
+        file.write(BOOK_FILE_MAGIC)
+        for key, move, weight in entries:
+            file.write(bookEntryStruct.pack(key, move, max(1, int(weight * scale)), 0))
+    return len(entries)
+
+
+class OpeningBook(_MappedFile):
+    def __init__(self, path : str):
+        super().__init__(path, BOOK_FILE_MAGIC)
+        self.random = random.Random()
+
+    def __len__(self):
+        return (len(self.data) - self.start) // BOOK_ENTRY_SIZE
+
+    def keyAt(self, index : int) -> int:
+        return struct.unpack_from("<Q", self.data, self.start + index * BOOK_ENTRY_SIZE)[0]
+
+    def entries(self, state : GameState) -> typing.List[typing.Tuple[int, int]]: # (move, weight) for every book move that is legal in state
+        key = state.positionKey
+        low, high = 0, len(self)
+        while low < high:  # lower bound of key
+            middle = (low + high) // 2
+            if self.keyAt(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        found = []
+        board = state.gameBoard
+        us = colourIndex[state.sideToMove]
+        for index in range(low, len(self)):
+            entryKey, move, weight, spare = bookEntryStruct.unpack_from(self.data, self.start + index * BOOK_ENTRY_SIZE)
+            if entryKey != key:
+                break
+            # a key collision (or a book written by another build) can hand back any 16-bit move, so it has to be one this position
+            # generates before isLegal, which assumes a pseudo-legal move, may play it on the board
+            fromSquare = move & 63
+            if board.mailbox[fromSquare] == NO_PIECE or board.mailbox[fromSquare] // 6 != us:
+                continue
+            if board.findMove(fromSquare, (move >> 6) & 63, KNIGHT + ((move >> 12) & 3)) == move and board.isLegal(move):
+                found.append((move, weight))
+        return found
+
+    def chooseMove(self, state : GameState) -> typing.Optional[int]: # a book move picked at random in proportion to its weight, or None if the position isn't in the book
+        found = self.entries(state)
+        if not found:
+            return None
+        return self.random.choices([move for move, weight in found], weights=[weight for move, weight in found])[0]
@@ -0,0 +1,241 @@
+from __future__ import annotations
+import sys
+import typing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import importlib.util
+import math
+import time
+from .board import Colour, moveToUCI
+from .rules import GameState, parseUCIMove, RESULT_BLACK_WINS, RESULT_DRAW, RESULT_WHITE_WINS, STANDARD_FEN
+from .io import formatPGN, parseSAN, pgnResultStrings, readPGNGames
+
+
+################################
+####    Self-Play Matches   ####
+################################
+
+# runMatch plays a candidate build (this package) against a baseline build (another checkout of it, eg., the previous commit) in many
+# games at once across a process pool, to tell whether a change plays stronger. Every opening is played twice with the colours swapped.
+# Each build searches its own copy of the game through its own SearchEngine under a fixed node or time limit per move, and this package's
+# GameState referees the game (legality and gameOutcome). Results are scored for the candidate, and reported as an Elo difference with a
+# 95% interval and a sequential probability ratio test (SPRT) of elo0 against elo1, which stops the match as soon as it is decided.
+# A baseline build needs GameState.fromFEN, SearchEngine, parseUCIMove and moveToUCI.
+
+# short opening lines (in UCI notation) from the standard position, so that the games don't all repeat one another
+matchOpenings = (
+    "e2e4 e7e5 g1f3 b8c6 f1b5",         # Ruy Lopez
+    "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5",    # Italian
+    "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4",    # Sicilian
+    "e2e4 e7e6 d2d4 d7d5",              # French
+    "e2e4 c7c6 d2d4 d7d5",              # Caro-Kann
+    "e2e4 d7d5 e4d5 d8d5",              # Scandinavian
+    "e2e4 g8f6 e4e5 f6d5",              # Alekhine
+    "e2e4 d7d6 d2d4 g8f6 b1c3 g7g6",    # Pirc
+    "d2d4 d7d5 c2c4 e7e6",              # Queen's Gambit Declined
+    "d2d4 d7d5 c2c4 c7c6",              # Slav
+    "d2d4 d7d5 c2c4 d5c4",              # Queen's Gambit Accepted
+    "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7",    # King's Indian
+    "d2d4 g8f6 c2c4 e7e6 b1c3 f8b4",    # Nimzo-Indian
+    "d2d4 f7f5",                        # Dutch
+    "c2c4 e7e5",                        # English
+    "g1f3 d7d5 g2g3",                   # Reti
+)
+
+_loadedBuilds = {}
+
+def loadBuild(path : str = None): # the module of an engine build; None, or this package's own directory, is this build
+    # a build is a chessinpython package directory, a launcher script next to one (eg., another checkout's "Chess in Python.py"), or an
+    # older single-file build of the script
+    packageDirectory = os.path.dirname(os.path.abspath(__file__))
+    if path is None:
+        return sys.modules[__package__]
+    path = os.path.abspath(path)
+    if os.path.isfile(path) and os.path.isfile(os.path.join(os.path.dirname(path), "chessinpython", "__init__.py")):
+        path = os.path.join(os.path.dirname(path), "chessinpython")
+    if path == packageDirectory:
+        return sys.modules[__package__]
+    if path not in _loadedBuilds:
+        name = f"_matchBuild{len(_loadedBuilds)}"
+        if os.path.isdir(path):
+            spec = importlib.util.spec_from_file_location(name, os.path.join(path, "__init__.py"), submodule_search_locations=[path])
+        else:
+            spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module     # a package's relative imports look it up by name while it is still running
+        spec.loader.exec_module(module)
+        _loadedBuilds[path] = module
+    return _loadedBuilds[path]
+
+def loadOpenings(path : str, plies : int = 8) -> typing.List[typing.Tuple[str, typing.List[str]]]: # (start FEN, UCI moves) for each opening in a file
+    # a .pgn file contributes the first plies of every game; any other file has one opening per line, either a FEN or a list of UCI moves
+    openings = []
+    with open(path, encoding="utf-8", errors="replace") as stream:
+        if path.lower().endswith(".pgn"):
+            for game in readPGNGames(stream):
+                state = game.startState()
+                start = state.toFEN()
+                moves = []
+                try:
+                    for san in game.moves[:plies]:
+                        move = parseSAN(state, san)
+                        moves.append(moveToUCI(move))
+                        state.makeMove(move)
+                except ValueError:
+                    continue
+                openings.append((start, moves))
+        else:
+            for line in stream:
+                line = line.split("#")[0].strip()
+                fields = line.split()
+                if "/" in line:
+                    # FEN, or EPD (four fields, maybe followed by operations): the move clocks default to 0 1
+                    clocks = fields[4:6] if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit() else ["0", "1"]
+                    openings.append((" ".join(fields[:4] + clocks), []))
+                elif fields:
+                    openings.append((STANDARD_FEN, fields))
+    return openings
+
+def playMatchGame(whitePath : str, blackPath : str, opening : typing.Tuple[str, typing.List[str]], nodeLimit : int = None, timeLimit : float = None,
+                  hashMegabytes : float = 4, maxPlies : int = 400) -> dict:
+    startFEN, openingMoves = opening
+    referee = GameState.fromFEN(startFEN)
+    for text in openingMoves:
+        referee.makeMove(parseUCIMove(referee, text))
+    players = []    # [build module, its own GameState, its SearchEngine, nodes searched, seconds searched] for white and black
+    for path in (whitePath, blackPath):
+        build = loadBuild(path)
+        state = build.GameState.fromFEN(startFEN)
+        for text in openingMoves:
+            state.makeMove(build.parseUCIMove(state, text))
+        players.append([build, state, build.SearchEngine(hashMegabytes=hashMegabytes), 0, 0.0])
+
+    moves = []
+    outcome = referee.gameOutcome()
+    while outcome is None and len(moves) < maxPlies:
+        mover = 0 if referee.sideToMove == Colour.WHITE else 1
+        build, state, engine = players[mover][:3]
+        startTime = time.perf_counter()
+        move = engine.findBestMove(state, timeLimit=timeLimit, nodeLimit=nodeLimit)
+        players[mover][3] += engine.nodes
+        players[mover][4] += time.perf_counter() - startTime
+        text = build.moveToUCI(move) if move is not None else "0000"
+        refereeMove = parseUCIMove(referee, text)
+        if refereeMove is None:
+            outcome = (RESULT_BLACK_WINS if mover == 0 else RESULT_WHITE_WINS), f"illegal move {text}"
+            break
+        referee.makeMove(refereeMove)
+        for player in players:
+            player[1].makeMove(player[0].parseUCIMove(player[1], text))
+        moves.append(text)
+        outcome = referee.gameOutcome()
+    if outcome is None:
+        outcome = RESULT_DRAW, "move limit"
+    return {"result": outcome[0], "termination": outcome[1], "opening": opening, "moves": moves,
+            "nodes": (players[0][3], players[1][3]), "seconds": (players[0][4], players[1][4])}
+
+def eloFromScore(score : float) -> float:
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+def sprtLogLikelihoodRatio(wins : int, draws : int, losses : int, elo0 : float, elo1 : float) -> float:
+    # the normal approximation to the trinomial GSPRT: how much more likely the results are if the true difference is elo1 rather than elo0
+    games = wins + draws + losses
+    if games == 0 or wins + losses == 0:
+        return 0.0
+    mean = (wins + draws / 2) / games
+    variance = (wins + draws / 4) / games - mean * mean
+    if variance <= 0:
+        return 0.0
+    score0 = 1 / (1 + 10 ** (-elo0 / 400))
+    score1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return games * (score1 - score0) * (2 * mean - score0 - score1) / (2 * variance)
+
+def runMatch(baselinePath : str = None, games : int = 1000, nodeLimit : int = None, timeLimit : float = None, openings : typing.List[typing.Tuple[str, typing.List[str]]] = None,
+             workers : int = 1, pgnPath : str = "match.pgn", elo0 : float = 0.0, elo1 : float = 5.0, alpha : float = 0.05, beta : float = 0.05, hashMegabytes : float = 4) -> dict:
+    if nodeLimit is None and timeLimit is None:
+        nodeLimit = 20000
+    openings = openings or [(STANDARD_FEN, line.split()) for line in matchOpenings]
+    candidatePath = os.path.dirname(os.path.abspath(__file__))
+    baselinePath = os.path.abspath(baselinePath) if baselinePath else candidatePath
+    # game 2k and 2k + 1 play the same opening with the colours swapped
+    schedule = [(openings[(index // 2) % len(openings)], index % 2 == 0) for index in range(games)]
+    lowerBound, upperBound = math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+    wins = draws = losses = 0
+    nodes = {"candidate": 0, "baseline": 0}
+    seconds = {"candidate": 0.0, "baseline": 0.0}
+    verdict = None
+    startTime = time.perf_counter()
+
+    def arguments(opening, candidateWhite):
+        white, black = (candidatePath, baselinePath) if candidateWhite else (baselinePath, candidatePath)
+        return (white, black, opening, nodeLimit, timeLimit, hashMegabytes)
+
+    def results():  # (round, candidate played white, game) in the order the games finish
+        if workers <= 1:
+            for index, (opening, candidateWhite) in enumerate(schedule):
+                yield index, candidateWhite, playMatchGame(*arguments(opening, candidateWhite))
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(playMatchGame, *arguments(opening, candidateWhite)): (index, candidateWhite) for index, (opening, candidateWhite) in enumerate(schedule)}
+            try:
+                for future in as_completed(futures):
+                    index, candidateWhite = futures[future]
+                    yield index, candidateWhite, future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    with open(pgnPath, "w") as pgn:
+        played = 0
+        for index, candidateWhite, game in results():
+            result = game["result"]
+            if result == RESULT_DRAW:
+                draws += 1
+            elif (result == RESULT_WHITE_WINS) == candidateWhite:
+                wins += 1
+            else:
+                losses += 1
+            for side, name in enumerate(("candidate", "baseline") if candidateWhite else ("baseline", "candidate")):
+                nodes[name] += game["nodes"][side]
+                seconds[name] += game["seconds"][side]
+
+            startFEN, openingMoves = game["opening"]
+            start = GameState.fromFEN(startFEN)
+            packedMoves = []
+            for text in openingMoves + game["moves"]:
+                move = parseUCIMove(start, text)
+                packedMoves.append(move)
+                start.makeMove(move)
+            for move in packedMoves:
+                start.unmakeMove()
+            tags = {"Event": "Self-play match", "Site": "?", "Date": time.strftime("%Y.%m.%d"), "Round": str(index + 1),
+                    "White": "candidate" if candidateWhite else "baseline", "Black": "baseline" if candidateWhite else "candidate", "Termination": game["termination"]}
+            if played:
+                pgn.write("\n")
+            pgn.write(formatPGN(tags, start, packedMoves, pgnResultStrings[result]))
+            pgn.flush()
+            played += 1
+
+            llr = sprtLogLikelihoodRatio(wins, draws, losses, elo0, elo1)
+            if played % 10 == 0 or played == games:
+                print(f"{played} games: +{wins} ={draws} -{losses}, Elo {eloFromScore((wins + draws / 2) / played):+.1f}, LLR {llr:.2f} ({lowerBound:.2f}, {upperBound:.2f})")
+            if llr >= upperBound or llr <= lowerBound:
+                verdict = "H1 accepted (the candidate is stronger)" if llr >= upperBound else "H0 accepted (the candidate is not stronger)"
+                break
+
+    played = wins + draws + losses
+    score = (wins + draws / 2) / max(played, 1)
+    # 95% interval from the per-game variance of the score
+    variance = (wins + draws / 4) / max(played, 1) - score * score
+    margin = 1.96 * math.sqrt(max(variance, 0) / max(played, 1))
+    report = {"games": played, "wins": wins, "draws": draws, "losses": losses, "score": score, "elo": eloFromScore(score),
+              "eloLow": eloFromScore(score - margin), "eloHigh": eloFromScore(score + margin),
+              "llr": sprtLogLikelihoodRatio(wins, draws, losses, elo0, elo1), "sprt": verdict or "inconclusive",
+              "nps": {name: nodes[name] / seconds[name] if seconds[name] else 0.0 for name in nodes}, "seconds": time.perf_counter() - startTime}
+    print(f"{played} games in {report['seconds']:.1f}s: +{wins} ={draws} -{losses}, score {score:.3f}")
+    print(f"Elo difference {report['elo']:+.1f} (95% {report['eloLow']:+.1f} to {report['eloHigh']:+.1f})")
+    print(f"SPRT elo0={elo0} elo1={elo1} alpha={alpha} beta={beta}: LLR {report['llr']:.2f}, {report['sprt']}")
+    print(f"nps: candidate {report['nps']['candidate']:.0f}, baseline {report['nps']['baseline']:.0f}")
+    print(f"games written to {pgnPath}")
+    return report
@@ -0,0 +1,159 @@
+from __future__ import annotations
+import typing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import time
+from concurrent.futures import wait
+from .board import colourIndex, moveToString
+from .rules import GameState, STANDARD_FEN
+from .search import MATE_SCORE, MAX_PLY, SearchEngine, SharedTranspositionTable
+from .perft import perft
+
+
+##############################################
+####    Multiprocess Root-Split Workers   ####
+##############################################
+
+# Deep perft runs and analysis searches are split at the root: every root move becomes one task for a ProcessPoolExecutor.
+# Tasks carry the GameState.encode() tuple rather than a pickled board of Piece objects, and results come back in root move order,
+# so the merged result doesn't depend on which worker finished first.
+
+def defaultWorkerCount() -> int:
+    return os.cpu_count() or 1
+
+def _perftSubtree(encodedState : tuple, move : int, depth : int) -> int:
+    state = GameState.decode(encodedState)
+    state.makeMove(move)
+    return perft(state, depth - 1)
+
+def parallelPerftDivide(state : GameState, depth : int, workers : int = None) -> typing.List[typing.Tuple[int, int]]:
+    moves = list(state.legalMoves())
+    if depth <= 1 or not moves:
+        return [(move, 1) for move in moves]
+    encodedState = state.encode()
+    with ProcessPoolExecutor(max_workers=workers or defaultWorkerCount()) as pool:
+        counts = list(pool.map(_perftSubtree, [encodedState] * len(moves), moves, [depth] * len(moves)))
+    return list(zip(moves, counts))
+
+def _searchRootMove(encodedState : tuple, move : int, depth : int, hashMegabytes : float) -> typing.Tuple[int, int]: # (score of move from the root side's point of view, nodes)
+    state = GameState.decode(encodedState)
+    state.makeMove(move)
+    engine = SearchEngine(hashMegabytes=hashMegabytes)
+    score = -engine.searchScore(state, depth - 1)
+    # mate scores coming back from the child are one ply further from the root
+    if score >= MATE_SCORE - MAX_PLY:
+        score -= 1
+    elif score <= -MATE_SCORE + MAX_PLY:
+        score += 1
+    return score, engine.nodes
+
+def parallelRootSearch(state : GameState, depth : int, workers : int = None, hashMegabytes : float = 8) -> typing.Tuple[typing.Optional[int], int, int]: # (best move, score, nodes)
+    moves = list(state.legalMoves())
+    if not moves:
+        return None, (-MATE_SCORE if state.gameBoard.isInCheck(colourIndex[state.sideToMove]) else 0), 0
+    encodedState = state.encode()
+    count = len(moves)
+    arguments = ([encodedState] * count, moves, [depth] * count, [hashMegabytes] * count)
+    if workers == 1:   # the single-process baseline runs the same tasks in this process
+        results = list(map(_searchRootMove, *arguments))
+    else:
+        with ProcessPoolExecutor(max_workers=workers or defaultWorkerCount()) as pool:
+            results = list(pool.map(_searchRootMove, *arguments))
+    # the first move in generation order wins ties, so the answer is the same for any number of workers
+    bestIndex = max(range(count), key=lambda index: (results[index][0], -index))
+    return moves[bestIndex], results[bestIndex][0], sum(nodes for score, nodes in results)
+
+def _lazySMPWorker(encodedState : tuple, table : SharedTranspositionTable, helperIndex : int, maxDepth : int, timeLimit : float, nodeLimit : int) -> typing.Tuple[int, typing.Optional[int], int, int]:
+    state = GameState.decode(encodedState)
+    engine = SearchEngine(transpositionTable=table)
+    engine.helperIndex = helperIndex
+    engine.shouldStop = table.stopSignalled
+    try:
+        engine.findBestMove(state, maxDepth, timeLimit, nodeLimit)
+        # the first process to finish (the last depth, a forced mate or the budget) ends the search for all of them
+        table.signalStop()
+    finally:
+        table.close()
+    return engine.completedDepth, engine.bestMove, engine.bestScore, engine.nodes # (depth completed, best move, score, nodes)
+
+def lazySMPSearch(state : GameState, maxDepth : int = MAX_PLY - 1, timeLimit : float = None, nodeLimit : int = None, workers : int = None,
+                  table : SharedTranspositionTable = None, pool : ProcessPoolExecutor = None) -> typing.Tuple[typing.Optional[int], int, int, int]: # (best move, score, depth, nodes)
+    # Lazy SMP: every process searches the whole tree from the same root, and they help each other only through the shared transposition table
+    # (a result one process stores is a cutoff or a hash move for the others). nodeLimit is per process.
+    moves = list(state.legalMoves())
+    if len(moves) <= 1:
+        return (moves[0] if moves else None), 0, 0, 0
+    workers = workers or defaultWorkerCount()
+    ownTable = table is None
+    ownPool = pool is None
+    table = table if table is not None else SharedTranspositionTable()
+    pool = pool if pool is not None else ProcessPoolExecutor(max_workers=workers)
+    try:
+        table.resetStopSignal()
+        encodedState = state.encode()
+        futures = [pool.submit(_lazySMPWorker, encodedState, table, helperIndex, maxDepth, timeLimit, nodeLimit) for helperIndex in range(workers)]
+        # the processes keep their own deadlines; this one only makes sure nobody is still searching once the budget is spent
+        wait(futures, timeout=timeLimit)
+        table.signalStop()
+        results = [future.result() for future in futures]
+    finally:
+        if ownPool:
+            pool.shutdown()
+        if ownTable:
+            table.unlink()
+    # the deepest completed search wins; between equally deep ones the main process (helper 0) is preferred
+    bestIndex = max(range(workers), key=lambda index: (results[index][0], results[index][1] is not None, -index))
+    depth, move, score, nodes = results[bestIndex]
+    return (move if move is not None else moves[0]), score, depth, sum(result[3] for result in results)
+
+def _warmPool(pool : ProcessPoolExecutor, workers : int): # start every worker process up front, so process start-up isn't counted as search time
+    list(pool.map(abs, range(workers)))
+
+def _firstMove(fen : str, depth : int) -> typing.Optional[int]: # a new engine's first search, used by the startup benchmark to time cold worker processes
+    return SearchEngine().findBestMove(GameState.fromFEN(fen), depth)
+
+def runLazySMPSearch(depth : int, fen : str = STANDARD_FEN, workers : int = 1, timeLimit : float = None, hashMegabytes : float = 16):
+    state = GameState.fromFEN(fen)
+    table = SharedTranspositionTable(hashMegabytes)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        _warmPool(pool, workers)
+        startTime = time.perf_counter()
+        move, score, reached, nodes = lazySMPSearch(state, depth, timeLimit, None, workers, table, pool)
+        elapsed = time.perf_counter() - startTime
+    table.unlink()
+    print(f"best move {moveToString(move) if move is not None else '(none)'} score {score} depth {reached}")
+    print(f"{nodes} nodes in {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/second, {workers} process{'es' if workers > 1 else ''}, Lazy SMP)")
+
+def runLazySMPScaling(depth : int, fen : str = STANDARD_FEN, workerCounts : typing.Iterable[int] = (1, 2, 4, 8, 16), hashMegabytes : float = 16) -> typing.Dict[int, typing.Tuple[float, int]]:
+    # time-to-depth and nodes/second for each number of processes, each starting from an empty table. (seconds, nodes) per worker count
+    state = GameState.fromFEN(fen)
+    results = {}
+    print(f"Lazy SMP to depth {depth} on {defaultWorkerCount()} CPU core{'s' if defaultWorkerCount() > 1 else ''}\n")
+    print(f"{'workers':>7} {'depth':>5} {'move':>8} {'seconds':>9} {'nodes':>10} {'nodes/s':>9} {'speedup':>8} {'nps x':>6}")
+    for workers in workerCounts:
+        table = SharedTranspositionTable(hashMegabytes)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            _warmPool(pool, workers)
+            startTime = time.perf_counter()
+            move, score, reached, nodes = lazySMPSearch(state, depth, None, None, workers, table, pool)
+            elapsed = time.perf_counter() - startTime
+        table.unlink()
+        results[workers] = (elapsed, nodes)
+        baseSeconds, baseNodes = next(iter(results.values()))
+        nps = nodes / max(elapsed, 1e-9)
+        baseNps = baseNodes / max(baseSeconds, 1e-9)
+        print(f"{workers:>7} {reached:>5} {moveToString(move):>8} {elapsed:>9.3f} {nodes:>10} {nps:>9.0f} {baseSeconds / max(elapsed, 1e-9):>7.2f}x {nps / baseNps:>5.2f}x")
+    return results
+
+def runParallelSearch(depth : int, fen : str = STANDARD_FEN, workers : int = 1, compare : bool = False):
+    state = GameState.fromFEN(fen)
+    startTime = time.perf_counter()
+    move, score, nodes = parallelRootSearch(state, depth, workers)
+    elapsed = time.perf_counter() - startTime
+    print(f"best move {moveToString(move) if move is not None else '(none)'} score {score} depth {depth}")
+    print(f"{nodes} nodes in {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/second, {workers} process{'es' if workers > 1 else ''})")
+    if compare and workers > 1:
+        serialStart = time.perf_counter()
+        parallelRootSearch(state, depth, 1)
+        serialElapsed = time.perf_counter() - serialStart
+        print(f"Single process: {serialElapsed:.3f}s, speedup {serialElapsed / max(elapsed, 1e-9):.2f}x")
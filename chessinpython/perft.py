@@ -0,0 +1,84 @@
+from __future__ import annotations
+import typing
+import time
+from .board import moveToString
+from .rules import GameState, STANDARD_FEN
+
+
+#####################
+####    Perft    ####
+#####################
+
+# perft counts the leaf nodes of the legal move tree to a fixed depth. the counts for well-known positions are published, so any
+# difference points at a move generation or make/unmake bug, and the time taken is a benchmark of the whole move pipeline.
+
+# (name, FEN, expected node counts for depth 1, 2, 3, ...)
+perftSuite = (
+    ("start position", STANDARD_FEN, (20, 400, 8902, 197281, 4865609, 119060324)),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", (48, 2039, 97862, 4085603, 193690690)),
+    ("rook endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238, 674624, 11030083)),
+    ("promotions and checks", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1", (6, 264, 9467, 422333, 15833292)),
+    ("promotion with discovered check", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", (44, 1486, 62379, 2103487, 89941194)),
+    ("symmetrical middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10", (46, 2079, 89890, 3894594, 164075551)),
+)
+
+def perft(state : GameState, depth : int) -> int:
+    if depth <= 0:
+        return 1
+    if depth == 1:  # bulk count: the leaves don't need to be played
+        return sum(1 for move in state.legalMoves())
+    nodes = 0
+    for move in state.legalMoves():
+        state.makeMove(move)
+        nodes += perft(state, depth - 1)
+        state.unmakeMove()
+    return nodes
+
+def perftDivide(state : GameState, depth : int) -> typing.List[typing.Tuple[int, int]]: # (root move, leaf count below it) for each root move
+    counts = []
+    for move in state.legalMoves():
+        state.makeMove(move)
+        counts.append((move, perft(state, depth - 1)))
+        state.unmakeMove()
+    return counts
+
+def runPerft(depth : int, fen : str = STANDARD_FEN, workers : int = 1, compare : bool = False) -> int:
+    state = GameState.fromFEN(fen)
+    startTime = time.perf_counter()
+    if workers > 1:
+        from .parallel import parallelPerftDivide   # imported here: parallel builds on perft, and a single-process run never needs the pool
+        counts = parallelPerftDivide(state, depth, workers)
+    else:
+        counts = perftDivide(state, depth)
+    elapsed = time.perf_counter() - startTime
+    for move, count in sorted(counts, key=lambda entry: moveToString(entry[0])):
+        print(f"{moveToString(move)}: {count}")
+    nodes = sum(count for move, count in counts)
+    print(f"\nNodes searched: {nodes}")
+    print(f"Time: {elapsed:.3f}s ({nodes / max(elapsed, 1e-9):.0f} nodes/second, {workers} process{'es' if workers > 1 else ''})")
+    if compare and workers > 1:
+        serialStart = time.perf_counter()
+        perftDivide(state, depth)
+        serialElapsed = time.perf_counter() - serialStart
+        print(f"Single process: {serialElapsed:.3f}s, speedup {serialElapsed / max(elapsed, 1e-9):.2f}x")
+    return nodes
+
+def runPerftSuite(maxNodes : int = 200000) -> bool: # checks every depth whose expected count is at most maxNodes; returns False if any count is wrong
+    allPassed = True
+    totalNodes = 0
+    totalTime = 0.0
+    for name, fen, expectedCounts in perftSuite:
+        for depth, expected in enumerate(expectedCounts, start=1):
+            if expected > maxNodes:
+                break
+            state = GameState.fromFEN(fen)
+            startTime = time.perf_counter()
+            nodes = perft(state, depth)
+            elapsed = time.perf_counter() - startTime
+            totalNodes += nodes
+            totalTime += elapsed
+            result = "ok" if nodes == expected else f"FAIL (expected {expected})"
+            allPassed = allPassed and nodes == expected
+            print(f"{name:<34} depth {depth}: {nodes:>10} {result:<24} {nodes / max(elapsed, 1e-9):>10.0f} nodes/second")
+    print(f"\n{totalNodes} nodes in {totalTime:.3f}s ({totalNodes / max(totalTime, 1e-9):.0f} nodes/second)")
+    return allPassed
@@ -0,0 +1,217 @@
+from __future__ import annotations
+import typing
+from .board import (
+    BISHOP, bishopAttacks, Colour, colourIndex, KING, kingTable, KNIGHT, knightTable, PAWN, pawnAttackTable, Position, QUEEN, queenAttacks, ROOK,
+    rookAttacks, squareFromPosition
+)
+
+if typing.TYPE_CHECKING:
+    from .rules import BitboardChessBoard
+
+
+class Piece:
+    # pieces have a fixed layout (no per-instance __dict__); every subclass declares empty __slots__ to keep it that way
+    __slots__ = ("colour", "location")
+    colour: Colour
+    location: Position
+    def __init__(self, colour : Colour, location : Position):
+        self.colour = colour
+        self.location = location
+
+    def __str__(self) -> str:  # redefine the __str__ special function to print the
+        return str(self.colour) + self.getPieceType()
+
+    def getColour(self):
+        return self.colour
+
+    # isValidMove is the full legality test for moving this piece to location: each piece class checks its own movement rules against the
+    # bitboards (a lookup in its attack set rather than walking squares), then isValidTarget / keepsKingSafe reject moves onto its own pieces
+    # and moves which would leave its own king in check
+    def isValidTarget(self, gameBoard : BitboardChessBoard, attacks : int, location : Position) -> bool:
+        target = squareFromPosition(location)
+        if not (attacks >> target) & 1 or (gameBoard.colourBitboards[colourIndex[self.colour]] >> target) & 1:
+            return False
+        return self.keepsKingSafe(gameBoard, location)
+
+    def keepsKingSafe(self, gameBoard : BitboardChessBoard, location : Position, promotionType : int = QUEEN) -> bool:
+        move = gameBoard.findMove(squareFromPosition(self.location), squareFromPosition(location), promotionType)
+        return move is not None and gameBoard.isLegal(move)
+
+    def getPieceType(self):
+        if type(self) == PawnPiece:
+            return "P"
+        elif type(self) == KnightPiece:
+            return "N"
+        elif type(self) == RookPiece:
+            return "R"
+        elif type(self) == QueenPiece:
+            return "Q"
+        elif type(self) == KingPiece:
+            return "K"
+        elif type(self) == BishopPiece:
+            return "B"
+        else:
+            return "''"
+
+    __repr__ = __str__
+
+
+class EmptySquare(Piece): # a flyweight: every empty square is the one shared emptySquare instance, so EmptySquare() never allocates
+    __slots__ = ()
+
+    def __new__(cls):
+        return emptySquare
+
+    def __init__(self):
+        pass
+
+    # location is a placeholder required for the isKingCheck method
+    def isValidMove(self, gameBoard : ChessBoard, location : Position):
+        return False
+
+    def generateMoves(self, gameBoard : BitboardChessBoard):
+        return iter(())
+
+
+class PawnPiece(Piece):
+    __slots__ = ()
+    pieceType = PAWN
+
+    def __init__(self, colour, location : Position):
+        super().__init__(colour, location)
+
+    def isValidMove(self, gameBoard : BitboardChessBoard, location : Position):
+        square = squareFromPosition(self.location)
+        target = squareFromPosition(location)
+        us = colourIndex[self.colour]
+        forward = -8 if self.colour == Colour.WHITE else 8
+        occupied = gameBoard.occupied
+        if target == square + forward:
+            # a push needs an empty square in front
+            valid = not (occupied >> target) & 1
+        elif target == square + 2 * forward:
+            # the double push is only from the starting rank, over an empty square onto an empty square
+            valid = square >> 3 == (6 if self.colour == Colour.WHITE else 1) and not (occupied >> (square + forward)) & 1 and not (occupied >> target) & 1
+        elif (pawnAttackTable[us][square] >> target) & 1:
+            # a diagonal step must capture: an enemy piece on the target, or the pawn which just double-pushed past it (en passant)
+            valid = (gameBoard.colourBitboards[us ^ 1] >> target) & 1 or target == gameBoard.enPassantSquare
+        else:
+            valid = False
+        return bool(valid) and self.keepsKingSafe(gameBoard, location)
+
+    def generateMoves(self, gameBoard : BitboardChessBoard): # yields this pawn's pseudo-legal moves as packed move ints
+        return gameBoard.generatePawnMoves(squareFromPosition(self.location))
+
+
+class RookPiece(Piece):
+    __slots__ = ()
+    pieceType = ROOK
+
+    def __init__(self, colour, location : Position):
+        super().__init__(colour, location)
+
+    def isValidMove(self, gameBoard : BitboardChessBoard, location : Position):
+        # the rook's attack set already stops at the first piece on each line
+        return self.isValidTarget(gameBoard, rookAttacks(squareFromPosition(self.location), gameBoard.occupied), location)
+
+    def generateMoves(self, gameBoard : BitboardChessBoard):
+        square = squareFromPosition(self.location)
+        return gameBoard.generateTargetMoves(square, rookAttacks(square, gameBoard.occupied))
+
+
+class BishopPiece(Piece):
+    __slots__ = ()
+    pieceType = BISHOP
+
+    def __init__(self, colour, location: Position):
+        super().__init__(colour, location)
+
+    def isValidMove(self, gameBoard : BitboardChessBoard, location : Position):
+        return self.isValidTarget(gameBoard, bishopAttacks(squareFromPosition(self.location), gameBoard.occupied), location)
+
+    def generateMoves(self, gameBoard : BitboardChessBoard):
+        square = squareFromPosition(self.location)
+        return gameBoard.generateTargetMoves(square, bishopAttacks(square, gameBoard.occupied))
+
+
+class KnightPiece(Piece):
+    __slots__ = ()
+    pieceType = KNIGHT
+
+    def __init__(self, colour, location : Position):
+        super().__init__(colour, location)
+
+    def isValidMove(self, gameBoard : BitboardChessBoard, location : Position):
+        return self.isValidTarget(gameBoard, knightTable[squareFromPosition(self.location)], location)
+
+    def generateMoves(self, gameBoard : BitboardChessBoard):
+        square = squareFromPosition(self.location)
+        return gameBoard.generateTargetMoves(square, knightTable[square])
+
+
+class KingPiece(Piece):
+    __slots__ = ()
+    pieceType = KING
+
+    def __init__(self, colour, location : Position):
+        super().__init__(colour, location)
+
+    def isValidMove(self, gameBoard : BitboardChessBoard, location : Position):
+        # castling is entered as the king's two-square move. generateCastlingMoves checks the rights, that the squares between king and rook
+        # are empty, and that the king is not in check and doesn't pass through or land on an attacked square
+        if abs(location.x - self.location.x) == 2 and location.y == self.location.y:
+            target = squareFromPosition(location)
+            return any((move >> 6) & 63 == target for move in gameBoard.generateCastlingMoves(colourIndex[self.colour]))
+        return self.isValidTarget(gameBoard, kingTable[squareFromPosition(self.location)], location)
+
+    def generateMoves(self, gameBoard : BitboardChessBoard):
+        square = squareFromPosition(self.location)
+        yield from gameBoard.generateTargetMoves(square, kingTable[square])
+        yield from gameBoard.generateCastlingMoves(colourIndex[self.colour])
+
+
+class QueenPiece(Piece):
+    __slots__ = ()
+    pieceType = QUEEN
+
+    def __init__(self, colour, location : Position):
+        super().__init__(colour, location)
+
+    def isValidMove(self, gameBoard : BitboardChessBoard, location : Position):
+        return self.isValidTarget(gameBoard, queenAttacks(squareFromPosition(self.location), gameBoard.occupied), location)
+
+    def generateMoves(self, gameBoard : BitboardChessBoard):
+        square = squareFromPosition(self.location)
+        return gameBoard.generateTargetMoves(square, queenAttacks(square, gameBoard.occupied))
+
+
+emptySquare = object.__new__(EmptySquare)
+Piece.__init__(emptySquare, Colour.UNDEF, Position())
+
+# piece classes indexed by pieceType, used to turn bitboard piece codes back into Piece objects
+pieceClasses = (PawnPiece, KnightPiece, BishopPiece, RookPiece, QueenPiece, KingPiece)
+
+
+class ChessBoard:
+    def __init__(self):
+        # define the initial board as a 2D array, where '' represents an empty square. each ChessBoard gets its own squares
+        self.board = [[EmptySquare() for j in range(8)] for i in range(8)]
+
+    def getPieceFromBoard(self, location : Position) -> Piece: # method to find the piece on a specified position of the board
+        return self.board[location.x][location.y]
+
+    def __str__(self):  # redefine the __str__ special function to print the chess board out with new lines after every outer list element
+        ret = ""
+
+        # i is outside list (X)
+        for i in range(8):
+            ret = ret + str(8-i) + " "
+            # j is inside lists (Y)
+            for j in range(8):
+                ret = ret + str(self.board[j][i]) + " "
+                if j == 7:
+                    ret = ret + "\n"
+
+        ret = ret + "  " + \
+            "  ".join(["a", "b", "c", "d", "e", "f", "g", "h"]) + "\n"
+        return ret
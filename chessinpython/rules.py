@@ -0,0 +1,678 @@
+from __future__ import annotations
+from abc import ABC
+import typing
+from .board import (
+    ALL_CASTLING_RIGHTS, BISHOP, bishopAttacks, BLACK_INDEX, BLACK_KINGSIDE, BLACK_QUEENSIDE, CAPTURE, castlingRightsMask, Colour, colourIndex,
+    computeZobristKey, DOUBLE_PAWN_PUSH, EN_PASSANT, fenCastlingRights, fenPieceCodes, fenPieceLetters, FULL_BOARD, indexColour, iterateBits, KING,
+    KING_CASTLE, kingTable, KNIGHT, knightTable, LIGHT_SQUARES, moveToUCI, NO_PIECE, PAWN, pawnAttackTable, pieceLetters, Position,
+    positionFromSquare, PROMOTION, PROMOTION_CAPTURE, QUEEN, QUEEN_CASTLE, queenAttacks, ROOK, rookAttacks, squareFromPosition, squareName,
+    WHITE_INDEX, WHITE_KINGSIDE, WHITE_QUEENSIDE, zobristCastlingKeys, zobristEnPassantKeys, zobristPieceKeys, zobristSideKey
+)
+from .pieces import BishopPiece, ChessBoard, EmptySquare, emptySquare, KingPiece, KnightPiece, PawnPiece, Piece, pieceClasses, QueenPiece, RookPiece
+from .eval import computeEvaluation, pieceSquareValues, seeValues
+
+
+# _BitboardColumn lets code written against ChessBoard.board[x][y] keep working on top of the bitboards
+class _BitboardColumn:
+    def __init__(self, owner : BitboardChessBoard, x : int):
+        self.owner = owner
+        self.x = x
+
+    def __getitem__(self, y : int) -> Piece:
+        return self.owner.getPieceFromBoard(Position(self.x, y))
+
+    def __setitem__(self, y : int, piece : Piece):
+        self.owner.setPieceOnBoard(Position(self.x, y), piece)
+
+    def __len__(self):
+        return 8
+
+
+class BitboardChessBoard(ChessBoard):
+    def __init__(self):
+        self.pieceBitboards = [0] * 12      # one bitboard per piece code
+        self.colourBitboards = [0, 0]       # one bitboard per colour index (union of that colour's piece bitboards)
+        self.mailbox = [NO_PIECE] * 64      # piece code on each square, for O(1) "what is on this square" lookups
+        self.castlingRights = 0             # mask of WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+        self.enPassantSquare = -1           # square a pawn may capture onto en passant, or -1
+
+    @property
+    def board(self): # column views so that board[x][y] reads and writes go through the bitboards
+        return [_BitboardColumn(self, x) for x in range(8)]
+
+    @property
+    def occupied(self) -> int:
+        return self.colourBitboards[WHITE_INDEX] | self.colourBitboards[BLACK_INDEX]
+
+    def putPiece(self, code : int, square : int):
+        bit = 1 << square
+        self.pieceBitboards[code] |= bit
+        self.colourBitboards[code // 6] |= bit
+        self.mailbox[square] = code
+
+    def removePiece(self, square : int) -> int: # returns the piece code which was on the square (NO_PIECE if it was empty)
+        code = self.mailbox[square]
+        if code != NO_PIECE:
+            bit = 1 << square
+            self.pieceBitboards[code] ^= bit
+            self.colourBitboards[code // 6] ^= bit
+            self.mailbox[square] = NO_PIECE
+        return code
+
+    def getPieceFromBoard(self, location : Position) -> Piece:
+        code = self.mailbox[squareFromPosition(location)]
+        if code == NO_PIECE:
+            return emptySquare
+        return pieceClasses[code % 6](indexColour[code // 6], location)
+
+    def setPieceOnBoard(self, location : Position, piece : Piece):
+        square = squareFromPosition(location)
+        self.removePiece(square)
+        if type(piece) is not EmptySquare:
+            self.putPiece(colourIndex[piece.colour] * 6 + piece.pieceType, square)
+
+    def getPieceBitboard(self, colour : Colour, pieceType : int) -> int:
+        return self.pieceBitboards[colourIndex[colour] * 6 + pieceType]
+
+    def isOccupied(self, location : Position) -> bool:
+        return (self.occupied >> squareFromPosition(location)) & 1 == 1
+
+    def attacksFrom(self, location : Position) -> int: # bitboard of every square the piece on location attacks (0 for an empty square)
+        square = squareFromPosition(location)
+        code = self.mailbox[square]
+        if code == NO_PIECE:
+            return 0
+        pieceType = code % 6
+        if pieceType == PAWN:
+            return pawnAttackTable[code // 6][square]
+        if pieceType == KNIGHT:
+            return knightTable[square]
+        if pieceType == KING:
+            return kingTable[square]
+        if pieceType == BISHOP:
+            return bishopAttacks(square, self.occupied)
+        if pieceType == ROOK:
+            return rookAttacks(square, self.occupied)
+        return queenAttacks(square, self.occupied)
+
+    def isSquareAttacked(self, location : Position, byColour : Colour) -> bool:
+        return self.squareAttacked(squareFromPosition(location), colourIndex[byColour])
+
+    def squareAttacked(self, square : int, attacker : int) -> bool: # square-index version of isSquareAttacked for the move generator
+        base = attacker * 6
+        pieces = self.pieceBitboards
+        if knightTable[square] & pieces[base + KNIGHT]:
+            return True
+        if kingTable[square] & pieces[base + KING]:
+            return True
+        # a pawn of the attacking colour attacks this square if a pawn of the other colour standing here would attack it
+        if pawnAttackTable[attacker ^ 1][square] & pieces[base + PAWN]:
+            return True
+        occupied = self.colourBitboards[0] | self.colourBitboards[1]
+        if rookAttacks(square, occupied) & (pieces[base + ROOK] | pieces[base + QUEEN]):
+            return True
+        return bishopAttacks(square, occupied) & (pieces[base + BISHOP] | pieces[base + QUEEN]) != 0
+
+    def attackersTo(self, square : int, occupied : int) -> int: # bitboard of every piece (of both colours) attacking square, given an occupancy (which lets callers see x-ray attackers by removing pieces)
+        pieces = self.pieceBitboards
+        rookLike = pieces[ROOK] | pieces[QUEEN] | pieces[6 + ROOK] | pieces[6 + QUEEN]
+        bishopLike = pieces[BISHOP] | pieces[QUEEN] | pieces[6 + BISHOP] | pieces[6 + QUEEN]
+        return ((pawnAttackTable[BLACK_INDEX][square] & pieces[PAWN])
+                | (pawnAttackTable[WHITE_INDEX][square] & pieces[6 + PAWN])
+                | (knightTable[square] & (pieces[KNIGHT] | pieces[6 + KNIGHT]))
+                | (kingTable[square] & (pieces[KING] | pieces[6 + KING]))
+                | (rookAttacks(square, occupied) & rookLike)
+                | (bishopAttacks(square, occupied) & bishopLike)) & occupied
+
+    def isInCheck(self, us : int, kingSquare : int = -1) -> bool: # is colour index us's king attacked. pass kingSquare when the caller already tracks it
+        if kingSquare < 0:
+            kingSquare = self.pieceBitboards[us * 6 + KING].bit_length() - 1
+            if kingSquare < 0:
+                return False
+        return self.squareAttacked(kingSquare, us ^ 1)
+
+    # Static exchange evaluation: the material the side making a capture gains once every capture and recapture on that square has been
+    # played out, each side always recapturing with its least valuable piece and free to stop when going on would lose material. It works
+    # from attackersTo alone, never making a move: each capturer is taken off the occupancy, which uncovers any slider lined up behind it.
+    def staticExchange(self, move : int) -> int:
+        fromSquare = move & 63
+        toSquare = (move >> 6) & 63
+        flag = move >> 12
+        mailbox = self.mailbox
+        pieces = self.pieceBitboards
+        colours = self.colourBitboards
+        occupied = (colours[WHITE_INDEX] | colours[BLACK_INDEX]) ^ (1 << fromSquare)
+        if flag == EN_PASSANT:
+            occupied ^= 1 << ((fromSquare & 56) | (toSquare & 7))
+            gains = [seeValues[PAWN]]
+        else:
+            gains = [seeValues[mailbox[toSquare] % 6] if mailbox[toSquare] != NO_PIECE else 0]
+        onSquare = mailbox[fromSquare] % 6
+        if flag & PROMOTION:
+            onSquare = KNIGHT + (flag & 3)
+            gains[0] += seeValues[onSquare] - seeValues[PAWN]
+        side = (mailbox[fromSquare] // 6) ^ 1
+        attackers = self.attackersTo(toSquare, occupied)
+        while True:
+            ours = attackers & colours[side]
+            if not ours:
+                break
+            for pieceType in range(6):
+                candidates = ours & pieces[side * 6 + pieceType]
+                if candidates:
+                    break
+            # the king can only take last: it may not capture onto a square the other side still attacks
+            if pieceType == KING and attackers & colours[side ^ 1]:
+                break
+            gains.append(seeValues[onSquare] - gains[-1])
+            onSquare = pieceType
+            occupied ^= candidates & -candidates
+            attackers = self.attackersTo(toSquare, occupied)
+            side ^= 1
+        # fold back: at every step, the side to capture may instead stand pat
+        for depth in range(len(gains) - 1, 0, -1):
+            gains[depth - 1] = -max(-gains[depth - 1], gains[depth])
+        return gains[0]
+
+    # Move generation. Every generator here is lazy: moves are yielded one at a time, and the board must be back in the same position before the generator is resumed.
+
+    def generateTargetMoves(self, fromSquare : int, targets : int) -> typing.Iterator[int]: # yields a quiet move or capture onto every target square not holding one of the mover's own pieces
+        us = self.mailbox[fromSquare] // 6
+        enemy = self.colourBitboards[us ^ 1]
+        targets &= FULL_BOARD ^ self.colourBitboards[us]
+        while targets:
+            lowest = targets & -targets
+            toSquare = lowest.bit_length() - 1
+            targets ^= lowest
+            if enemy & lowest:
+                yield fromSquare | (toSquare << 6) | (CAPTURE << 12)
+            else:
+                yield fromSquare | (toSquare << 6)
+
+    def generatePawnMoves(self, fromSquare : int) -> typing.Iterator[int]:
+        us = self.mailbox[fromSquare] // 6
+        occupied = self.colourBitboards[0] | self.colourBitboards[1]
+        if us == WHITE_INDEX:
+            step, startRow, promotionRow = -8, 6, 0
+        else:
+            step, startRow, promotionRow = 8, 1, 7
+
+        pushSquare = fromSquare + step
+        if not (occupied >> pushSquare) & 1:
+            if pushSquare >> 3 == promotionRow:
+                for promotion in (3, 2, 1, 0):  # queen first
+                    yield fromSquare | (pushSquare << 6) | ((PROMOTION | promotion) << 12)
+            else:
+                yield fromSquare | (pushSquare << 6)
+                doubleSquare = pushSquare + step
+                if fromSquare >> 3 == startRow and not (occupied >> doubleSquare) & 1:
+                    yield fromSquare | (doubleSquare << 6) | (DOUBLE_PAWN_PUSH << 12)
+
+        attacks = pawnAttackTable[us][fromSquare]
+        for toSquare in iterateBits(attacks & self.colourBitboards[us ^ 1]):
+            if toSquare >> 3 == promotionRow:
+                for promotion in (3, 2, 1, 0):
+                    yield fromSquare | (toSquare << 6) | ((PROMOTION_CAPTURE | promotion) << 12)
+            else:
+                yield fromSquare | (toSquare << 6) | (CAPTURE << 12)
+        if self.enPassantSquare >= 0 and (attacks >> self.enPassantSquare) & 1:
+            yield fromSquare | (self.enPassantSquare << 6) | (EN_PASSANT << 12)
+
+    def generateCastlingMoves(self, us : int) -> typing.Iterator[int]:
+        if us == WHITE_INDEX:
+            kingSquare, kingside, queenside = 60, WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            kingSquare, kingside, queenside = 4, BLACK_KINGSIDE, BLACK_QUEENSIDE
+        rights = self.castlingRights
+        if not rights & (kingside | queenside) or self.mailbox[kingSquare] != us * 6 + KING:
+            return
+        occupied = self.colourBitboards[0] | self.colourBitboards[1]
+        them = us ^ 1
+        if self.squareAttacked(kingSquare, them):
+            return
+        # the squares between king and rook must be empty, and the king may not pass through or land on an attacked square
+        if rights & kingside and self.mailbox[kingSquare + 3] == us * 6 + ROOK and not occupied & (3 << (kingSquare + 1)):
+            if not self.squareAttacked(kingSquare + 1, them) and not self.squareAttacked(kingSquare + 2, them):
+                yield kingSquare | ((kingSquare + 2) << 6) | (KING_CASTLE << 12)
+        if rights & queenside and self.mailbox[kingSquare - 4] == us * 6 + ROOK and not occupied & (7 << (kingSquare - 3)):
+            if not self.squareAttacked(kingSquare - 1, them) and not self.squareAttacked(kingSquare - 2, them):
+                yield kingSquare | ((kingSquare - 2) << 6) | (QUEEN_CASTLE << 12)
+
+    def generatePieceMoves(self, square : int) -> typing.Iterator[int]: # pseudo-legal moves of whatever piece stands on square
+        code = self.mailbox[square]
+        if code == NO_PIECE:
+            return iter(())
+        pieceType = code % 6
+        if pieceType == PAWN:
+            return self.generatePawnMoves(square)
+        if pieceType == KNIGHT:
+            return self.generateTargetMoves(square, knightTable[square])
+        if pieceType == BISHOP:
+            return self.generateTargetMoves(square, bishopAttacks(square, self.occupied))
+        if pieceType == ROOK:
+            return self.generateTargetMoves(square, rookAttacks(square, self.occupied))
+        if pieceType == QUEEN:
+            return self.generateTargetMoves(square, queenAttacks(square, self.occupied))
+        return self.generateTargetMoves(square, kingTable[square])
+
+    def findMove(self, fromSquare : int, toSquare : int, promotionType : int = QUEEN): # the pseudo-legal move between two squares, or None. promotions pick promotionType
+        for move in self.generatePieceMoves(fromSquare):
+            if (move >> 6) & 63 == toSquare and (not move >> 12 & PROMOTION or KNIGHT + ((move >> 12) & 3) == promotionType):
+                return move
+        if self.mailbox[fromSquare] % 6 == KING:
+            for move in self.generateCastlingMoves(self.mailbox[fromSquare] // 6):
+                if (move >> 6) & 63 == toSquare:
+                    return move
+        return None
+
+    def captureMoves(self, us : int) -> typing.Iterator[int]: # pseudo-legal captures and queen promotions for colour index us (the quiescence search's moves)
+        enemy = self.colourBitboards[us ^ 1]
+        occupied = self.occupied
+        pieces = self.pieceBitboards
+        base = us * 6
+        for square in iterateBits(pieces[base + PAWN]):
+            for move in self.generatePawnMoves(square):
+                flag = move >> 12
+                if flag & CAPTURE and not flag & PROMOTION or flag & PROMOTION and flag & 3 == 3:
+                    yield move
+        for square in iterateBits(pieces[base + KNIGHT]):
+            yield from self.generateTargetMoves(square, knightTable[square] & enemy)
+        for square in iterateBits(pieces[base + BISHOP]):
+            yield from self.generateTargetMoves(square, bishopAttacks(square, occupied) & enemy)
+        for square in iterateBits(pieces[base + ROOK]):
+            yield from self.generateTargetMoves(square, rookAttacks(square, occupied) & enemy)
+        for square in iterateBits(pieces[base + QUEEN]):
+            yield from self.generateTargetMoves(square, queenAttacks(square, occupied) & enemy)
+        for square in iterateBits(pieces[base + KING]):
+            yield from self.generateTargetMoves(square, kingTable[square] & enemy)
+
+    def pseudoLegalMoves(self, colour : Colour) -> typing.Iterator[int]: # every move obeying piece movement rules, including ones which leave the mover's king in check
+        us = colourIndex[colour]
+        for square in iterateBits(self.colourBitboards[us]):
+            yield from self.generatePieceMoves(square)
+        yield from self.generateCastlingMoves(us)
+
+    def legalMoves(self, colour : Colour) -> typing.Iterator[int]: # pseudo-legal moves filtered down to the ones which don't leave the mover's king attacked
+        us = colourIndex[colour]
+        kingCode = us * 6 + KING
+        for move in self.pseudoLegalMoves(colour):
+            captured = self.applyMove(move)
+            kingSquare = self.pieceBitboards[kingCode].bit_length() - 1
+            inCheck = kingSquare >= 0 and self.squareAttacked(kingSquare, us ^ 1)
+            self.revertMove(move, captured)
+            if not inCheck:
+                yield move
+
+    def isLegal(self, move : int) -> bool: # does a pseudo-legal move keep the mover's king out of check
+        us = self.mailbox[move & 63] // 6
+        captured = self.applyMove(move)
+        inCheck = self.isInCheck(us)
+        self.revertMove(move, captured)
+        return not inCheck
+
+    # applyMove / revertMove only move pieces around (including the rook of a castle, the pawn taken en passant and promotions).
+    # Castling rights, the en passant square and the side to move are left to the caller.
+
+    def applyMove(self, move : int) -> int: # returns the piece code which was captured (NO_PIECE if nothing was)
+        fromSquare = move & 63
+        toSquare = (move >> 6) & 63
+        flag = move >> 12
+        if flag == EN_PASSANT:
+            captured = self.removePiece((fromSquare & 56) | (toSquare & 7))
+        else:
+            captured = self.removePiece(toSquare)
+        code = self.removePiece(fromSquare)
+        if flag & PROMOTION:
+            code = code - PAWN + KNIGHT + (flag & 3)
+        self.putPiece(code, toSquare)
+        if flag == KING_CASTLE:
+            self.putPiece(self.removePiece(toSquare + 1), toSquare - 1)
+        elif flag == QUEEN_CASTLE:
+            self.putPiece(self.removePiece(toSquare - 2), toSquare + 1)
+        return captured
+
+    def revertMove(self, move : int, captured : int):
+        fromSquare = move & 63
+        toSquare = (move >> 6) & 63
+        flag = move >> 12
+        code = self.removePiece(toSquare)
+        if flag & PROMOTION:
+            code = code - (flag & 3) - KNIGHT + PAWN
+        self.putPiece(code, fromSquare)
+        if captured != NO_PIECE:
+            if flag == EN_PASSANT:
+                self.putPiece(captured, (fromSquare & 56) | (toSquare & 7))
+            else:
+                self.putPiece(captured, toSquare)
+        if flag == KING_CASTLE:
+            self.putPiece(self.removePiece(toSquare - 1), toSquare + 1)
+        elif flag == QUEEN_CASTLE:
+            self.putPiece(self.removePiece(toSquare + 1), toSquare - 2)
+
+    def __str__(self):  # same layout as ChessBoard.__str__, read straight from the mailbox
+        ret = ""
+        for y in range(8):
+            ret = ret + str(8-y) + " "
+            for x in range(8):
+                code = self.mailbox[y * 8 + x]
+                if code == NO_PIECE:
+                    ret = ret + "''" + " "
+                else:
+                    ret = ret + str(indexColour[code // 6]) + pieceLetters[code % 6] + " "
+            ret = ret + "\n"
+
+        ret = ret + "  " + \
+            "  ".join(["a", "b", "c", "d", "e", "f", "g", "h"]) + "\n"
+        return ret
+
+    def fromChessBoard(chessBoard : ChessBoard) -> BitboardChessBoard: # builds a bitboard copy of a list-of-lists ChessBoard
+        bitboard = BitboardChessBoard()
+        for x in range(8):
+            for y in range(8):
+                piece = chessBoard.board[x][y]
+                if type(piece) is not EmptySquare:
+                    bitboard.putPiece(colourIndex[piece.colour] * 6 + piece.pieceType, y * 8 + x)
+        return bitboard
+
+
+class GameBoardFactory(ABC): # factory for providing new game instances. this is an abstract class. it is not real. there is no self to reference, because it will never be initialized.
+    def getEmptyBoard() -> ChessBoard:
+        board = ChessBoard()
+        return board
+
+    def getStandardBoard() -> ChessBoard:
+        factoryBoard = ChessBoard()
+
+        factoryBoard.board[0][0] = RookPiece        (Colour.BLACK, Position().setByXY(0,0))
+        factoryBoard.board[1][0] = KnightPiece      (Colour.BLACK, Position().setByXY(1,0))
+        factoryBoard.board[2][0] = BishopPiece      (Colour.BLACK, Position().setByXY(2,0))
+        factoryBoard.board[3][0] = QueenPiece       (Colour.BLACK, Position().setByXY(3,0))
+        factoryBoard.board[4][0] = KingPiece        (Colour.BLACK, Position().setByXY(4,0))
+        factoryBoard.board[5][0] = BishopPiece      (Colour.BLACK, Position().setByXY(5,0))
+        factoryBoard.board[6][0] = KnightPiece      (Colour.BLACK, Position().setByXY(6,0))
+        factoryBoard.board[7][0] = RookPiece        (Colour.BLACK, Position().setByXY(7,0))
+        
+        # assign each pawn to it's initial position on the board
+        for i in range(8):
+            factoryBoard.board[i][1] = PawnPiece    (Colour.BLACK, Position().setByXY(i,1))
+            factoryBoard.board[i][6] = PawnPiece    (Colour.WHITE, Position().setByXY(i,6))
+
+        # assign each black piece to it's initial position on the board
+        factoryBoard.board[0][7] = RookPiece        (Colour.WHITE, Position().setByXY(0,7))
+        factoryBoard.board[1][7] = KnightPiece      (Colour.WHITE, Position().setByXY(1,7))
+        factoryBoard.board[2][7] = BishopPiece      (Colour.WHITE, Position().setByXY(2,7))
+        factoryBoard.board[3][7] = QueenPiece       (Colour.WHITE, Position().setByXY(3,7))
+        factoryBoard.board[4][7] = KingPiece        (Colour.WHITE, Position().setByXY(4,7))
+        factoryBoard.board[5][7] = BishopPiece      (Colour.WHITE, Position().setByXY(5,7))
+        factoryBoard.board[6][7] = KnightPiece      (Colour.WHITE, Position().setByXY(6,7))
+        factoryBoard.board[7][7] = RookPiece        (Colour.WHITE, Position().setByXY(7,7))
+
+        return factoryBoard
+
+    def getStandardBitboard() -> BitboardChessBoard:
+        factoryBoard = BitboardChessBoard.fromChessBoard(GameBoardFactory.getStandardBoard())
+        factoryBoard.castlingRights = ALL_CASTLING_RIGHTS
+        return factoryBoard
+
+
+STANDARD_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# game results, as stored in game records and archives
+RESULT_UNKNOWN, RESULT_WHITE_WINS, RESULT_BLACK_WINS, RESULT_DRAW = 0, 1, 2, 3
+
+class GameState:
+    gameBoard: ChessBoard   # gameBoard is a ChessBoard-like object (the bitboard engine by default)
+    # kingDict stores key:value pair of Colour:kingPosition, which is updated each turn. Designed to keep track of each colour's king position for reference in the isKingCheck function
+    kingDict: typing.Dict[Colour, Position]
+
+    # all state lives on the instance, so every GameState (and every NewGame) has its own board
+    def __init__(self, gameBoard : BitboardChessBoard = None, sideToMove : Colour = Colour.WHITE):
+        # a GameState can be set up on its own board (eg., from a FEN string); otherwise it starts from a fresh standard board
+        self.gameBoard = gameBoard if gameBoard is not None else GameBoardFactory.getStandardBitboard()
+        self.kingDict = {}
+        self.findKings()
+        self.sideToMove = sideToMove
+        self.halfmoveClock = 0      # moves since the last capture or pawn move (for the 50-move rule)
+        self.fullmoveNumber = 1
+        # undoStack holds one record per made move, so unmakeMove can restore the position without ever copying the board. each record is a tuple of
+        # (move, captured piece code, moved piece code, previous king Position, castling rights, en passant square, halfmove clock, position key, evaluation)
+        self.undoStack = []
+        # positionKey is the Zobrist key of the current position, kept up to date by makeMove/unmakeMove
+        self.positionKey = self.computePositionKey()
+        # evaluation is the white-relative material + piece-square score (see eval.py), also kept up to date by makeMove/unmakeMove
+        self.evaluation = computeEvaluation(self.gameBoard)
+
+    def computePositionKey(self) -> int:
+        return computeZobristKey(self.gameBoard, self.sideToMove)
+
+    # encode / decode turn a position into a small tuple of ints (the 12 piece bitboards, side to move, castling rights, en passant square and move clocks)
+    # which is cheap to pickle and send to worker processes. the move history is not included.
+    def encode(self) -> tuple:
+        board = self.gameBoard
+        return (tuple(board.pieceBitboards), colourIndex[self.sideToMove], board.castlingRights, board.enPassantSquare, self.halfmoveClock, self.fullmoveNumber)
+
+    def decode(encoded : tuple) -> GameState:
+        pieceBitboards, sideIndex, castlingRights, enPassantSquare, halfmoveClock, fullmoveNumber = encoded
+        board = BitboardChessBoard()
+        for code, bitboard in enumerate(pieceBitboards):
+            for square in iterateBits(bitboard):
+                board.putPiece(code, square)
+        board.castlingRights = castlingRights
+        board.enPassantSquare = enPassantSquare
+        state = GameState(board, indexColour[sideIndex])
+        state.halfmoveClock = halfmoveClock
+        state.fullmoveNumber = fullmoveNumber
+        return state
+
+    # builds a GameState from a FEN string (piece placement, side to move, castling rights, en passant square, halfmove clock, fullmove number).
+    # the placement is parsed straight into the mailbox and bitboards; no Piece or Position objects are created along the way.
+    def fromFEN(fen : str) -> GameState:
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError(f"FEN needs at least 4 fields: {fen!r}")
+        placement, side, castling, enPassant = fields[0], fields[1], fields[2], fields[3]
+
+        board = BitboardChessBoard()
+        mailbox = board.mailbox
+        pieceBitboards = board.pieceBitboards
+        square = 0
+        for char in placement:
+            code = fenPieceCodes.get(char)
+            if code is not None:
+                if square >= 64:
+                    raise ValueError(f"FEN placement runs past h1: {fen!r}")
+                mailbox[square] = code
+                pieceBitboards[code] |= 1 << square
+                square += 1
+            elif char in "12345678":
+                square += ord(char) - 48
+            elif char == "/":
+                if square & 7:
+                    raise ValueError(f"FEN rank doesn't have 8 squares: {fen!r}")
+            else:
+                raise ValueError(f"unexpected {char!r} in FEN placement: {fen!r}")
+        if square != 64:
+            raise ValueError(f"FEN placement doesn't cover 64 squares: {fen!r}")
+        board.colourBitboards[WHITE_INDEX] = pieceBitboards[0] | pieceBitboards[1] | pieceBitboards[2] | pieceBitboards[3] | pieceBitboards[4] | pieceBitboards[5]
+        board.colourBitboards[BLACK_INDEX] = pieceBitboards[6] | pieceBitboards[7] | pieceBitboards[8] | pieceBitboards[9] | pieceBitboards[10] | pieceBitboards[11]
+
+        if castling != "-":
+            for char in castling:
+                if char not in fenCastlingRights:
+                    raise ValueError(f"unexpected {char!r} in FEN castling rights: {fen!r}")
+                board.castlingRights |= fenCastlingRights[char]
+        if enPassant != "-":
+            if len(enPassant) != 2 or enPassant[0] not in "abcdefgh" or enPassant[1] not in "36":
+                raise ValueError(f"bad FEN en passant square: {fen!r}")
+            board.enPassantSquare = (ord(enPassant[0]) - 97) + 8 * (56 - ord(enPassant[1]))
+        if side not in ("w", "b"):
+            raise ValueError(f"FEN side to move must be w or b: {fen!r}")
+
+        state = GameState(board, Colour.WHITE if side == "w" else Colour.BLACK)
+        # the clocks are optional, and each is read when present (a 5-field FEN still has its halfmove clock)
+        for index, name in ((4, "halfmoveClock"), (5, "fullmoveNumber")):
+            if len(fields) > index:
+                if not fields[index].isdigit():
+                    raise ValueError(f"FEN move counters must be numbers: {fen!r}")
+                setattr(state, name, int(fields[index]))
+        return state
+
+    def toFEN(self) -> str:
+        board = self.gameBoard
+        mailbox = board.mailbox
+        rows = []
+        for y in range(8):
+            row = ""
+            emptyCount = 0
+            for square in range(y * 8, y * 8 + 8):
+                code = mailbox[square]
+                if code == NO_PIECE:
+                    emptyCount += 1
+                    continue
+                if emptyCount:
+                    row += str(emptyCount)
+                    emptyCount = 0
+                row += fenPieceLetters[code]
+            if emptyCount:
+                row += str(emptyCount)
+            rows.append(row)
+        castling = "".join(char for char, right in fenCastlingRights.items() if board.castlingRights & right) or "-"
+        enPassant = squareName(board.enPassantSquare) if board.enPassantSquare >= 0 else "-"
+        side = "w" if self.sideToMove == Colour.WHITE else "b"
+        return f"{'/'.join(rows)} {side} {castling} {enPassant} {self.halfmoveClock} {self.fullmoveNumber}"
+
+    # fills kingDict from the board. only needed when a board is set up from scratch; after that movePiece keeps it up to date
+    def findKings(self):
+        self.kingDict.clear()
+        for colour in indexColour:
+            kingBitboard = self.gameBoard.pieceBitboards[colourIndex[colour] * 6 + KING]
+            if kingBitboard:
+                self.kingDict[colour] = positionFromSquare(kingBitboard.bit_length() - 1)
+
+    # validates the move with the piece's isValidMove (movement rules, castling, en passant and self-check), then plays it. promotionType picks the promoted piece
+    def movePiece(self, sourcePiece : Piece, destinationPosition : Position, promotionType : int = QUEEN):
+        if sourcePiece.isValidMove(self.gameBoard, destinationPosition):
+            # find the packed move the generator would produce for this source/destination pair (it carries the capture, castle, en passant and promotion flags)
+            move = self.gameBoard.findMove(squareFromPosition(sourcePiece.location), squareFromPosition(destinationPosition), promotionType)
+            if move is not None:
+                # makeMove takes the source piece off the board and puts it on the destination square, capturing whatever was there
+                self.makeMove(move)
+                # assign the location of the source piece to the destination position (this is in the in-memory representation of the source piece)
+                sourcePiece.location = destinationPosition
+                return True
+        print("this is not a valid move, try again. \n")
+        return False
+
+    # makeMove / unmakeMove play and take back a packed move in place. search and legality testing call these instead of copying the board.
+    def makeMove(self, move : int):
+        board = self.gameBoard
+        fromSquare = move & 63
+        toSquare = (move >> 6) & 63
+        movedCode = board.mailbox[fromSquare]
+        mover = indexColour[movedCode // 6]
+        previousKing = self.kingDict.get(mover) if movedCode % 6 == KING else None
+
+        flag = move >> 12
+        oldRights = board.castlingRights
+        oldEnPassant = board.enPassantSquare
+
+        capturedCode = board.applyMove(move)
+        self.undoStack.append((move, capturedCode, movedCode, previousKing, oldRights, oldEnPassant, self.halfmoveClock, self.positionKey, self.evaluation))
+
+        board.castlingRights = oldRights & castlingRightsMask[fromSquare] & castlingRightsMask[toSquare]
+        board.enPassantSquare = (fromSquare + toSquare) >> 1 if flag == DOUBLE_PAWN_PUSH else -1
+
+        # incremental Zobrist and evaluation updates: only the squares, rights and en passant file this move touched change
+        pieceKeys = zobristPieceKeys
+        placedCode = board.mailbox[toSquare]
+        key = self.positionKey ^ zobristSideKey ^ pieceKeys[movedCode][fromSquare] ^ pieceKeys[placedCode][toSquare]
+        evaluation = self.evaluation - pieceSquareValues[movedCode][fromSquare] + pieceSquareValues[placedCode][toSquare]
+        if capturedCode != NO_PIECE:
+            capturedSquare = (fromSquare & 56) | (toSquare & 7) if flag == EN_PASSANT else toSquare
+            key ^= pieceKeys[capturedCode][capturedSquare]
+            evaluation -= pieceSquareValues[capturedCode][capturedSquare]
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            rookCode = movedCode - KING + ROOK
+            rookFrom, rookTo = (toSquare + 1, toSquare - 1) if flag == KING_CASTLE else (toSquare - 2, toSquare + 1)
+            key ^= pieceKeys[rookCode][rookFrom] ^ pieceKeys[rookCode][rookTo]
+            evaluation += pieceSquareValues[rookCode][rookTo] - pieceSquareValues[rookCode][rookFrom]
+        self.evaluation = evaluation
+        if oldRights != board.castlingRights:
+            key ^= zobristCastlingKeys[oldRights] ^ zobristCastlingKeys[board.castlingRights]
+        if oldEnPassant >= 0:
+            key ^= zobristEnPassantKeys[oldEnPassant & 7]
+        if board.enPassantSquare >= 0:
+            key ^= zobristEnPassantKeys[board.enPassantSquare & 7]
+        self.positionKey = key
+
+        if movedCode % 6 == PAWN or capturedCode != NO_PIECE:
+            self.halfmoveClock = 0
+        else:
+            self.halfmoveClock += 1
+        if previousKing is not None:
+            self.kingDict[mover] = positionFromSquare(toSquare)
+        if mover == Colour.BLACK:
+            self.fullmoveNumber += 1
+        self.sideToMove = Colour.WHITE if mover == Colour.BLACK else Colour.BLACK
+
+    def unmakeMove(self):
+        move, capturedCode, movedCode, previousKing, castlingRights, enPassantSquare, halfmoveClock, positionKey, evaluation = self.undoStack.pop()
+        board = self.gameBoard
+        board.revertMove(move, capturedCode)
+        board.castlingRights = castlingRights
+        board.enPassantSquare = enPassantSquare
+        self.halfmoveClock = halfmoveClock
+        self.positionKey = positionKey
+        self.evaluation = evaluation
+        mover = indexColour[movedCode // 6]
+        if previousKing is not None:
+            self.kingDict[mover] = previousKing
+        if mover == Colour.BLACK:
+            self.fullmoveNumber -= 1
+        self.sideToMove = mover
+
+    def legalMoves(self) -> typing.Iterator[int]: # legal moves for the side to move
+        return self.gameBoard.legalMoves(self.sideToMove)
+
+    def isRepetition(self, occurrences : int = 1) -> bool: # has this position (same side to move) been seen at least `occurrences` times before
+        # each undo record holds the key of the position before its move. only positions since the last capture or pawn move can repeat,
+        # and only every second one has the same side to move
+        undoStack = self.undoStack
+        key = self.positionKey
+        seen = 0
+        for back in range(2, min(self.halfmoveClock, len(undoStack)) + 1, 2):
+            if undoStack[-back][7] == key:
+                seen += 1
+                if seen >= occurrences:
+                    return True
+        return False
+
+    def isInsufficientMaterial(self) -> bool: # neither side can ever checkmate: bare kings, a single minor piece, or only bishops all on one colour of square
+        pieces = self.gameBoard.pieceBitboards
+        if pieces[PAWN] | pieces[6 + PAWN] | pieces[ROOK] | pieces[6 + ROOK] | pieces[QUEEN] | pieces[6 + QUEEN]:
+            return False
+        knights = pieces[KNIGHT] | pieces[6 + KNIGHT]
+        bishops = pieces[BISHOP] | pieces[6 + BISHOP]
+        if (knights | bishops).bit_count() <= 1:
+            return True
+        return not knights and (not bishops & LIGHT_SQUARES or not bishops & ~LIGHT_SQUARES)
+
+    def gameOutcome(self) -> typing.Optional[typing.Tuple[int, str]]: # (RESULT_* code, reason) once the game is over, or None while it goes on
+        if not any(True for move in self.legalMoves()):
+            if self.gameBoard.isInCheck(colourIndex[self.sideToMove]):
+                return (RESULT_BLACK_WINS if self.sideToMove == Colour.WHITE else RESULT_WHITE_WINS), "checkmate"
+            return RESULT_DRAW, "stalemate"
+        if self.halfmoveClock >= 100:
+            return RESULT_DRAW, "fifty-move rule"
+        if self.isRepetition(2):
+            return RESULT_DRAW, "threefold repetition"
+        if self.isInsufficientMaterial():
+            return RESULT_DRAW, "insufficient material"
+        return None
+
+
+def parseUCIMove(state : GameState, text : str) -> typing.Optional[int]: # the legal move written as UCI text (eg., e2e4, e7e8q), or None
+    for move in state.legalMoves():
+        if moveToUCI(move) == text:
+            return move
+    return None
@@ -0,0 +1,543 @@
+from __future__ import annotations
+import typing
+import time
+import mmap
+from .board import CAPTURE, colourIndex, EN_PASSANT, KNIGHT, PAWN, PROMOTION
+from .eval import evaluatePosition, pieceValues
+from .rules import GameState
+from .io import moveToSAN, parseSAN
+
+
+################################
+####    Game AI Thoughts    ####
+################################
+
+# 1. AI makes move decisions for the opposite colour of the human player
+#
+# 2. AI makes move decisions with the SearchEngine (see the "Search Engine" section below):
+#
+##   i. iterative deepening: search 1 ply deep, then 2, then 3... until the time or node budget runs out, always keeping the best move of the last finished depth
+##   ii. each depth is a negamax search with alpha-beta pruning, playing moves on the GameState with makeMove/unmakeMove (no board copies)
+##   iii. moves are tried best-guess first so alpha-beta can cut off early: the previous iteration's best line, then captures (most valuable victim / least valuable attacker), then killer moves, then quiet moves by history score
+
+
+##############################
+####    Search Engine     ####
+##############################
+
+MATE_SCORE = 100000         # score for delivering checkmate at the root; mates further away score MATE_SCORE - ply
+INFINITE_SCORE = 1000000
+MAX_PLY = 128
+
+# Lazy SMP helper processes skip some iterations of iterative deepening, so that at any moment the processes sharing a table are searching
+# different depths. helper n skips depth d when ((d + phase) // size) is odd, with size and phase taken from these tables at (n - 1) % 20.
+lazySMPSkipSize = (1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4)
+lazySMPSkipPhase = (0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7)
+
+
+# bound types stored in the transposition table: whether the stored score is exact, or only a lower (failed high) or upper (failed low) bound
+BOUND_EXACT, BOUND_LOWER, BOUND_UPPER = 1, 2, 3
+
+
+# TranspositionTable caches search results by Zobrist key in a fixed amount of memory.
+# The table is two flat arrays of 64-bit ints (the key and a packed entry, in anonymous mmaps), so its size is exactly what was asked for and no Python objects are allocated per entry.
+# Slots come in buckets of two: slot 0 only gives way to an equal or deeper search (depth-preferred), slot 1 is overwritten by every store that doesn't go in slot 0 (always-replace).
+# A packed entry is: bits 0-15 best move, bits 16-17 bound, bits 18-25 depth, bits 26-57 score + 2**31.
+class TranspositionTable:
+    BYTES_PER_SLOT = 16
+
+    def __init__(self, megabytes : float = 16):
+        buckets = 1
+        # round down to a power of two number of buckets so the bucket index is a mask of the key
+        while buckets * 2 * 2 * self.BYTES_PER_SLOT <= megabytes * 1024 * 1024:
+            buckets *= 2
+        self.bucketMask = buckets - 1
+        self.slotCount = buckets * 2
+        self.keys, self.entries = self.allocateSlots()
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0     # probes which found the bucket holding other positions
+        self.stores = 0
+
+    def allocateSlots(self) -> typing.Tuple[typing.MutableSequence[int], typing.MutableSequence[int]]: # (keys, entries), slotCount zeroed 64-bit ints each
+        # anonymous mmaps come from the OS already zeroed and are only backed by memory as pages are touched, so a new engine doesn't pay
+        # for filling the whole table up front (an array("Q", bytes(...)) of the default 16MB took longer than the first move's search)
+        return memoryview(mmap.mmap(-1, 8 * self.slotCount)).cast("Q"), memoryview(mmap.mmap(-1, 8 * self.slotCount)).cast("Q")
+
+    def clear(self):
+        self.keys, self.entries = self.allocateSlots()
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def probe(self, key : int) -> typing.Optional[typing.Tuple[int, int, int, int]]: # (depth, score, bound, move) stored for key, or None
+        slot = (key & self.bucketMask) << 1
+        keys = self.keys
+        if keys[slot] == key:
+            entry = self.entries[slot]
+        elif keys[slot + 1] == key:
+            entry = self.entries[slot + 1]
+        else:
+            self.misses += 1
+            if self.entries[slot] or self.entries[slot + 1]:
+                self.collisions += 1
+            return None
+        self.hits += 1
+        return ((entry >> 18) & 255, ((entry >> 26) & 0xFFFFFFFF) - 0x80000000, (entry >> 16) & 3, entry & 0xFFFF)
+
+    def store(self, key : int, depth : int, score : int, bound : int, move : int):
+        slot = (key & self.bucketMask) << 1
+        entries = self.entries
+        # the depth-preferred slot keeps its entry unless this search is at least as deep (or it already holds this position)
+        if self.keys[slot] != key and entries[slot] and (entries[slot] >> 18) & 255 > depth:
+            slot += 1
+        elif move == 0 and self.keys[slot] == key:
+            move = entries[slot] & 0xFFFF    # keep the best move of an earlier search of this position
+        self.keys[slot] = key
+        entries[slot] = (move & 0xFFFF) | (bound << 16) | (min(depth, 255) << 18) | ((score + 0x80000000) << 26)
+        self.stores += 1
+
+    def hashfull(self) -> int: # permille of slots in use, sampled from the first thousand slots
+        sample = min(1000, self.slotCount)
+        return sum(1 for slot in range(sample) if self.entries[slot]) * 1000 // sample
+
+    def stats(self) -> typing.Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "collisions": self.collisions, "stores": self.stores,
+                "slots": self.slotCount, "megabytes": self.slotCount * self.BYTES_PER_SLOT // (1024 * 1024), "hashfull": self.hashfull()}
+
+
+# SharedTranspositionTable is the same table in a multiprocessing.shared_memory block, so the Lazy SMP search processes all read and write one table.
+# There are no locks: the key word holds key ^ entry, so a slot torn by two processes writing it at once no longer matches its key and reads as a miss.
+# The block starts with a small header whose first byte is a stop signal: the first process to finish its search sets it and the others wind down.
+# Creating a table (name=None) makes a new block, owned by this process and freed with unlink(); pickling a table sends only its name, and
+# unpickling it in another process attaches to the same block. Every process calls close() when it is done with the table.
+class SharedTranspositionTable(TranspositionTable):
+    HEADER_BYTES = 64
+
+    def __init__(self, megabytes : float = 16, name : str = None):
+        self.megabytes = megabytes
+        self.memory = None
+        self.owner = name is None
+        self.name = name
+        super().__init__(megabytes)
+
+    def allocateSlots(self) -> typing.Tuple[memoryview, memoryview]:
+        from multiprocessing import shared_memory     # imported here so that a process which never runs Lazy SMP doesn't load it
+        size = 8 * self.slotCount
+        if self.memory is None:
+            if self.owner:
+                self.memory = shared_memory.SharedMemory(create=True, size=self.HEADER_BYTES + 2 * size)
+                self.name = self.memory.name
+            else:
+                self.memory = shared_memory.SharedMemory(name=self.name)
+            buffer = self.memory.buf
+            self.header = buffer[:self.HEADER_BYTES]
+            return buffer[self.HEADER_BYTES:self.HEADER_BYTES + size].cast("Q"), buffer[self.HEADER_BYTES + size:self.HEADER_BYTES + 2 * size].cast("Q")
+        # clearing zeroes the block in place, so every process attached to it sees the empty table
+        self.memory.buf[self.HEADER_BYTES:] = bytes(2 * size)
+        return self.keys, self.entries
+
+    def __reduce__(self):
+        return (SharedTranspositionTable, (self.megabytes, self.name))
+
+    def probe(self, key : int) -> typing.Optional[typing.Tuple[int, int, int, int]]:
+        slot = (key & self.bucketMask) << 1
+        keys = self.keys
+        entries = self.entries
+        # the entry is read once and checked against the key word, so a slot rewritten between the two reads can't be mistaken for this position
+        entry = entries[slot]
+        if keys[slot] ^ entry != key:
+            entry = entries[slot + 1]
+            if keys[slot + 1] ^ entry != key:
+                self.misses += 1
+                if entries[slot] or entry:
+                    self.collisions += 1
+                return None
+        self.hits += 1
+        return ((entry >> 18) & 255, ((entry >> 26) & 0xFFFFFFFF) - 0x80000000, (entry >> 16) & 3, entry & 0xFFFF)
+
+    def store(self, key : int, depth : int, score : int, bound : int, move : int):
+        slot = (key & self.bucketMask) << 1
+        keys = self.keys
+        entries = self.entries
+        entry = entries[slot]
+        storedKey = keys[slot] ^ entry
+        if storedKey != key and entry and (entry >> 18) & 255 > depth:
+            slot += 1
+        elif move == 0 and storedKey == key:
+            move = entry & 0xFFFF
+        entry = (move & 0xFFFF) | (bound << 16) | (min(depth, 255) << 18) | ((score + 0x80000000) << 26)
+        entries[slot] = entry
+        keys[slot] = key ^ entry
+        self.stores += 1
+
+    def signalStop(self):
+        self.header[0] = 1
+
+    def stopSignalled(self) -> bool:
+        return self.header[0] != 0
+
+    def resetStopSignal(self):
+        self.header[0] = 0
+
+    def close(self): # detach this process from the block (the views onto it have to be released first)
+        if self.memory is None:
+            return
+        self.keys.release()
+        self.entries.release()
+        self.header.release()
+        self.memory.close()
+        self.memory = None
+
+    def unlink(self): # close, and free the block if this process created it
+        memory = self.memory
+        self.close()
+        if self.owner:
+            from multiprocessing import shared_memory
+            (memory or shared_memory.SharedMemory(name=self.name)).unlink()
+
+
+class SearchAborted(Exception): # raised inside the search when the time or node budget runs out (or stop() is called); the search unwinds to the root
+    pass
+
+
+class SearchEngine:
+    def __init__(self, evaluate : typing.Callable[[GameState], int] = evaluatePosition, transpositionTable : TranspositionTable = None, hashMegabytes : float = 16,
+                 quiescence : bool = True, staticExchange : bool = True):
+        self.evaluate = evaluate
+        # quiescence: leaf nodes are resolved by searching captures until the position is quiet, instead of evaluating mid-exchange
+        # staticExchange: captures are ordered (and, in the quiescence search, pruned) by staticExchange rather than by victim / attacker alone
+        self.quiescence = quiescence
+        self.staticExchange = staticExchange
+        self.transpositionTable = transpositionTable if transpositionTable is not None else TranspositionTable(hashMegabytes)
+        self.onIteration = None     # optional callback(depth, score, nodes, seconds, pv) called after every completed iteration
+        self.tablebases = None      # optional Tablebases, probed before a node is expanded
+        self.shouldStop = None      # optional callable polled with the time and node limits; returning True ends the search (eg., a stop signal shared between processes)
+        self.helperIndex = 0        # 0 for a normal search; n > 0 makes this a Lazy SMP helper, which skips some depths (see lazySMPSkipSize)
+        self.stopRequested = False
+        self.nodes = 0
+        self.bestMove = None
+        self.bestScore = 0
+        self.bestLine = []
+        self.completedDepth = 0
+        self.killers = [[0, 0] for ply in range(MAX_PLY)]
+        self.history = [[0] * 64 for code in range(12)]
+
+    def stop(self): # may be called from another thread; the search notices within 64 nodes
+        self.stopRequested = True
+
+    def setTimeLimit(self, timeLimit : float): # may be called from another thread, like stop: the running search gets timeLimit seconds from now
+        self.deadline = time.perf_counter() + timeLimit
+
+    def findBestMove(self, state : GameState, maxDepth : int = MAX_PLY - 1, timeLimit : float = None, nodeLimit : int = None, started : bool = False) -> typing.Optional[int]:
+        # started means the caller has already called startSearch itself. a controller that runs the search on another thread does that
+        # first, on its own thread, so a stop or setTimeLimit it sends straight afterwards can't be wiped out by the search starting late
+        if not started:
+            self.startSearch(timeLimit, nodeLimit)
+        rootMoves = list(state.legalMoves())
+        self.bestMove = rootMoves[0] if rootMoves else None
+        if len(rootMoves) <= 1:
+            return self.bestMove
+        if self.tablebases is not None:
+            move = self.tablebases.bestMove(state)
+            if move is not None:
+                self.bestMove = move
+                self.bestLine = [move]
+                return move
+        self.iterativeDeepening(state, maxDepth)
+        return self.bestMove
+
+    def searchScore(self, state : GameState, depth : int) -> int: # score of the position (side to move's point of view) searched to depth, with no time or node budget
+        self.startSearch(None, None)
+        self.iterativeDeepening(state, depth)
+        return self.bestScore
+
+    def startSearch(self, timeLimit : float, nodeLimit : int):
+        self.nodes = 0
+        self.stopRequested = False
+        self.startTime = time.perf_counter()
+        self.deadline = self.startTime + timeLimit if timeLimit is not None else None
+        self.nodeLimit = nodeLimit
+        self.killers = [[0, 0] for ply in range(MAX_PLY)]
+        self.history = [[0] * 64 for code in range(12)]
+        self.pv = [[] for ply in range(MAX_PLY + 1)]
+        self.bestLine = []
+        self.bestMove = None
+        self.bestScore = 0
+        self.completedDepth = 0
+
+    def iterativeDeepening(self, state : GameState, maxDepth : int):
+        rootHeight = len(state.undoStack)
+        for depth in range(1, maxDepth + 1):
+            if self.skipsDepth(depth, maxDepth):
+                continue
+            try:
+                score = self.negamax(state, depth, -INFINITE_SCORE, INFINITE_SCORE, 0)
+            except SearchAborted:
+                # take back whatever moves were still made on the board when the budget ran out
+                while len(state.undoStack) > rootHeight:
+                    state.unmakeMove()
+                break
+            self.bestLine = list(self.pv[0])
+            if len(self.bestLine) < depth:
+                # a stored exact score ends the line at the node it cut off, so the rest of the PV is read back from the table
+                self.bestLine += self.tableLine(state, self.bestLine, depth - len(self.bestLine))
+            self.bestMove = self.bestLine[0] if self.bestLine else self.bestMove
+            self.bestScore = score
+            self.completedDepth = depth
+            if self.onIteration is not None:
+                self.onIteration(depth, score, self.nodes, time.perf_counter() - self.startTime, self.bestLine)
+            # a forced mate has been found; deeper iterations can't improve on it
+            if abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+
+    def tableLine(self, state : GameState, line : typing.List[int], length : int) -> typing.List[int]: # up to length stored best moves following line
+        for move in line:
+            state.makeMove(move)
+        found = []
+        seen = set()
+        while len(found) < length and state.positionKey not in seen:
+            entry = self.transpositionTable.probe(state.positionKey)
+            # the stored move is checked against the position, since another position can share the slot's key
+            if entry is None or entry[3] == 0 or entry[3] not in state.legalMoves():
+                break
+            seen.add(state.positionKey)
+            state.makeMove(entry[3])
+            found.append(entry[3])
+        for move in line + found:
+            state.unmakeMove()
+        return found
+
+    def skipsDepth(self, depth : int, maxDepth : int) -> bool: # helpers always search the last depth, so they can finish the search too
+        if self.helperIndex == 0 or depth >= maxDepth:
+            return False
+        index = (self.helperIndex - 1) % len(lazySMPSkipSize)
+        return (depth + lazySMPSkipPhase[index]) // lazySMPSkipSize[index] % 2 == 1
+
+    def checkLimits(self):
+        if self.stopRequested or (self.shouldStop is not None and self.shouldStop()):
+            raise SearchAborted()
+        if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            raise SearchAborted()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchAborted()
+
+    def orderMoves(self, state : GameState, moves : typing.List[int], ply : int, hashMove : int = 0) -> typing.List[int]:
+        mailbox = state.gameBoard.mailbox
+        pvMove = self.bestLine[ply] if ply < len(self.bestLine) else 0
+        killerOne, killerTwo = self.killers[ply]
+        history = self.history
+        scored = []
+        board = state.gameBoard
+        useStaticExchange = self.staticExchange
+        for move in moves:
+            toSquare = (move >> 6) & 63
+            flag = move >> 12
+            if move == hashMove:
+                score = 2000000
+            elif move == pvMove:
+                score = 1000000
+            elif flag & CAPTURE and useStaticExchange and (exchange := board.staticExchange(move)) < 0:
+                # captures which lose material go after the killers
+                score = 70000 + exchange
+            elif flag & CAPTURE:
+                # most valuable victim first, least valuable attacker breaks ties (an en passant victim is always a pawn)
+                victim = mailbox[toSquare] % 6 if flag != EN_PASSANT else PAWN
+                score = 100000 + pieceValues[victim] * 10 - mailbox[move & 63] % 6
+                if flag & PROMOTION:
+                    score += pieceValues[KNIGHT + (flag & 3)]
+            elif flag & PROMOTION:
+                score = 100000 + pieceValues[KNIGHT + (flag & 3)]
+            elif move == killerOne:
+                score = 90000
+            elif move == killerTwo:
+                score = 80000
+            else:
+                score = history[mailbox[move & 63]][toSquare]
+            scored.append((score, move))
+        scored.sort(reverse=True)
+        return [move for score, move in scored]
+
+    def negamax(self, state : GameState, depth : int, alpha : int, beta : int, ply : int) -> int:
+        if depth <= 0 and self.quiescence:
+            return self.quiesce(state, alpha, beta, ply)
+        self.nodes += 1
+        if self.nodes & 63 == 0:
+            self.checkLimits()
+        self.pv[ply] = []
+
+        # a repetition inside the search is scored as the draw it can be forced into
+        if ply > 0 and (state.halfmoveClock >= 100 or state.isRepetition()):
+            return 0
+        if ply > 0 and self.tablebases is not None:
+            found = self.tablebases.probe(state)
+            if found is not None:
+                result, distance = found
+                return result * (MATE_SCORE - ply - distance)
+        if depth <= 0 or ply >= MAX_PLY:
+            return self.evaluate(state)
+
+        # a stored result at least as deep as this search can answer the node outright (except at the root, which must produce a move)
+        key = state.positionKey
+        hashMove = 0
+        entry = self.transpositionTable.probe(key)
+        if entry is not None:
+            entryDepth, entryScore, bound, hashMove = entry
+            if ply > 0 and entryDepth >= depth:
+                # mate scores are stored relative to the node, so convert back to distance from the root
+                if entryScore >= MATE_SCORE - MAX_PLY:
+                    entryScore -= ply
+                elif entryScore <= -MATE_SCORE + MAX_PLY:
+                    entryScore += ply
+                if bound == BOUND_EXACT or (bound == BOUND_LOWER and entryScore >= beta) or (bound == BOUND_UPPER and entryScore <= alpha):
+                    return entryScore
+
+        moves = list(state.legalMoves())
+        if not moves:
+            if state.gameBoard.isInCheck(colourIndex[state.sideToMove]):
+                return -MATE_SCORE + ply
+            return 0    # stalemate
+
+        originalAlpha = alpha
+        bestScore = -INFINITE_SCORE
+        bestMove = 0
+        for move in self.orderMoves(state, moves, ply, hashMove):
+            state.makeMove(move)
+            score = -self.negamax(state, depth - 1, -beta, -alpha, ply + 1)
+            state.unmakeMove()
+            if score > bestScore:
+                bestScore = score
+                bestMove = move
+                if score > alpha:
+                    alpha = score
+                    self.pv[ply] = [move] + self.pv[ply + 1]
+                    if alpha >= beta:
+                        # quiet moves which cause a cutoff are remembered as killers for this ply and credited in the history table
+                        if not move >> 12 & (CAPTURE | PROMOTION):
+                            killers = self.killers[ply]
+                            if killers[0] != move:
+                                killers[1] = killers[0]
+                                killers[0] = move
+                            self.history[state.gameBoard.mailbox[move & 63]][(move >> 6) & 63] += depth * depth
+                        break
+
+        if bestScore >= beta:
+            bound = BOUND_LOWER
+        elif bestScore > originalAlpha:
+            bound = BOUND_EXACT
+        else:
+            bound = BOUND_UPPER
+            bestMove = 0    # no move beat alpha, so none of them is known to be best
+        storedScore = bestScore
+        if storedScore >= MATE_SCORE - MAX_PLY:
+            storedScore += ply
+        elif storedScore <= -MATE_SCORE + MAX_PLY:
+            storedScore -= ply
+        self.transpositionTable.store(key, depth, storedScore, bound, bestMove)
+        return bestScore
+
+    def quiesce(self, state : GameState, alpha : int, beta : int, ply : int) -> int:
+        # captures only, until the position is quiet. the side to move may always "stand pat" on the static evaluation instead of capturing,
+        # except in check, where every evasion is searched (and no evasion means mate)
+        self.nodes += 1
+        if self.nodes & 63 == 0:
+            self.checkLimits()
+        self.pv[ply] = []
+        board = state.gameBoard
+        us = colourIndex[state.sideToMove]
+        if ply >= MAX_PLY:
+            return self.evaluate(state)
+        inCheck = board.isInCheck(us)
+        if inCheck:
+            moves = self.orderMoves(state, list(state.legalMoves()), ply)
+            if not moves:
+                return -MATE_SCORE + ply
+            bestScore = -INFINITE_SCORE
+        else:
+            bestScore = self.evaluate(state)
+            if bestScore >= beta:
+                return bestScore
+            alpha = max(alpha, bestScore)
+            scored = []
+            for move in board.captureMoves(us):
+                if self.staticExchange:
+                    exchange = board.staticExchange(move)
+                    if exchange < 0:
+                        continue    # a capture that loses material can't raise the stand-pat score
+                else:
+                    flag = move >> 12
+                    victim = board.mailbox[(move >> 6) & 63] % 6 if flag != EN_PASSANT else PAWN
+                    exchange = pieceValues[victim] * 10 - board.mailbox[move & 63] % 6
+                scored.append((exchange, move))
+            scored.sort(reverse=True)
+            moves = [move for exchange, move in scored]
+
+        for move in moves:
+            if not inCheck and not board.isLegal(move):
+                continue
+            state.makeMove(move)
+            score = -self.quiesce(state, -beta, -alpha, ply + 1)
+            state.unmakeMove()
+            if score > bestScore:
+                bestScore = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return bestScore
+
+
+################################
+####    Tactical Suite      ####
+################################
+
+# positions from Win At Chess with a single best move, written in SAN. a fixed-depth search of each one measures how much the
+# quiescence search and static exchange evaluation change what the engine finds and how many nodes it needs to find it.
+
+tacticalSuite = (
+    ("WAC.001", "2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1", "Qg6"),
+    ("WAC.002", "8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1", "Rxb2"),
+    ("WAC.003", "5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - - 0 1", "Rg3"),
+    ("WAC.004", "r1bq2rk/pp3pbp/2p1p1pQ/7P/3P4/2PB1N2/PP3PPR/2KR4 w - - 0 1", "Qxh7+"),
+    ("WAC.005", "5k2/6pp/p1qN4/1p1p4/3P4/2PKP2Q/PP3r2/3R4 b - - 0 1", "Qc4+"),
+    ("WAC.006", "7k/p7/1R5K/6r1/6p1/6P1/8/8 w - - 0 1", "Rb7"),
+    ("WAC.007", "rnbqkb1r/pppp1ppp/8/4P3/6n1/7P/PPPNPPP1/R1BQKBNR b KQkq - 0 1", "Ne3"),
+    ("WAC.008", "r4q1k/p2bR1rp/2p2Q1N/5p2/5p2/2P5/PP3PPP/R5K1 w - - 0 1", "Rf7"),
+    ("WAC.009", "3q1rk1/p4pp1/2pb3p/3p4/6Pr/1PNQ4/P1PB1PP1/4RRK1 b - - 0 1", "Bh2+"),
+    ("WAC.010", "2br2k1/2q3rn/p2NppQ1/2p1P3/Pp5R/4P3/1P3PPP/3R2K1 w - - 0 1", "Rxh7"),
+    ("WAC.011", "r1b1kb1r/3q1ppp/pBp1pn2/8/Np3P2/5B2/PPP3PP/R2Q1RK1 w kq - 0 1", "Bxc6"),
+    ("WAC.012", "4k1r1/2p3r1/1pR1p3/3pP2p/3P2qP/P4N2/1PQ4P/5R1K b - - 0 1", "Qxf3+"),
+    ("WAC.013", "5rk1/pp4p1/2n1p2p/2Npq3/2p5/6P1/P3P1BP/R4Q1K w - - 0 1", "Qxf8+"),
+    ("WAC.014", "r2rb1k1/pp1q1p1p/2n1p1p1/2bp4/5P2/PP1BPR1Q/1BPN2PP/R5K1 w - - 0 1", "Qxh7+"),
+    ("WAC.015", "1R6/1brk2p1/4p2p/p1P1Pp2/P7/6P1/1P4P1/2R3K1 w - - 0 1", "Rxb7"),
+    ("WAC.016", "r4rk1/ppp2ppp/2n5/2bqp3/8/P2PB3/1PP1NPPP/R2Q1RK1 w - - 0 1", "Nc3"),
+)
+
+# (label, quiescence, staticExchange) for each engine configuration compared by runTacticalBenchmark
+tacticalConfigurations = (
+    ("plain", False, False),
+    ("quiescence", True, False),
+    ("quiescence + SEE", True, True),
+)
+
+def runTacticalBenchmark(depth : int = 4) -> typing.Dict[str, typing.Tuple[int, int, float]]: # (solved, nodes, seconds) for each configuration
+    results = {}
+    for label, quiescence, staticExchange in tacticalConfigurations:
+        solved = nodes = 0
+        elapsed = 0.0
+        print(f"{label}:")
+        for name, fen, bestMove in tacticalSuite:
+            state = GameState.fromFEN(fen)
+            expected = parseSAN(state, bestMove)
+            engine = SearchEngine(quiescence=quiescence, staticExchange=staticExchange, hashMegabytes=4)
+            startTime = time.perf_counter()
+            move = engine.findBestMove(state, depth)
+            seconds = time.perf_counter() - startTime
+            solved += move == expected
+            nodes += engine.nodes
+            elapsed += seconds
+            found = moveToSAN(state, move) if move is not None else "(none)"
+            print(f"  {name:<8} {bestMove:<7} {found:<7} {'ok' if move == expected else '--':<3} {engine.nodes:>8} nodes {seconds:>7.3f}s")
+        results[label] = (solved, nodes, elapsed)
+    print()
+    for label, (solved, nodes, elapsed) in results.items():
+        print(f"{label:<18} solved {solved}/{len(tacticalSuite)}  {nodes:>9} nodes  {elapsed:>8.3f}s  ({nodes / max(elapsed, 1e-9):.0f} nodes/second)")
+    return results
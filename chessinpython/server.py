@@ -0,0 +1,228 @@
+from __future__ import annotations
+import sys
+import typing
+import random
+import time
+import asyncio
+import json
+import itertools
+from .board import moveToUCI
+from .rules import GameState, parseUCIMove, STANDARD_FEN
+from .search import MAX_PLY, SearchEngine
+
+
+################################
+####    Game Server         ####
+################################
+
+# GameServer hosts many independent games in one process behind a JSON-lines protocol (one JSON object per line in each direction),
+# over a TCP socket or stdin/stdout. Each request names an "op":
+#   {"op": "new", "fen": optional}                       -> {"game": id, "fen": ...}
+#   {"op": "move", "game": id, "move": "e2e4"}           -> {"ok": true/false, "fen": ..., "status": ...}
+#   {"op": "legal", "game": id}                          -> {"moves": ["e2e4", ...]}
+#   {"op": "fen", "game": id}                            -> {"fen": ..., "status": ...}
+#   {"op": "engine", "game": id, "depth"/"nodes"/"movetime": n}  -> the engine plays a move for the side to move
+#   {"op": "close", "game": id}                          -> {"ok": true}
+#   {"op": "stats"}                                      -> {"games": n, "moves": n}
+# A request with a field of the wrong type (eg., a numeric fen), or one that fails in any other way, gets {"ok": false, "error": ...}.
+# An "id" field in a request is echoed back in its response. Requests for the same game are serialised by that game's lock;
+# requests for different games never wait on each other. Engine searches run in a worker thread so they don't block the event loop.
+
+_requestFieldTypes = {"fen": (str, "a string"), "move": (str, "a string"), "game": (int, "an integer"), "depth": (int, "an integer"),
+                      "nodes": (int, "an integer"), "movetime": ((int, float), "a number")}
+
+def gameStatus(state : GameState) -> str: # "ongoing", or the reason the game ended (eg., "checkmate", "threefold repetition")
+    outcome = state.gameOutcome()
+    return "ongoing" if outcome is None else outcome[1]
+
+
+class ServerGame:
+    def __init__(self, state : GameState):
+        self.state = state
+        self.lock = asyncio.Lock()
+
+
+class GameServer:
+    def __init__(self, hashMegabytes : float = 1):
+        self.games = {}
+        self.nextGameId = itertools.count(1)
+        self.movesPlayed = 0
+        self.hashMegabytes = hashMegabytes     # per engine search; kept small because thousands of games may be searching
+
+    async def handleRequest(self, request : dict) -> dict:
+        if not isinstance(request, dict):   # valid JSON, but not a request (eg., a list or a number)
+            return {"ok": False, "error": f"a request must be a JSON object, not {type(request).__name__}"}
+        for field, (types, description) in _requestFieldTypes.items():
+            if field in request and (not isinstance(request[field], types) or isinstance(request[field], bool)):
+                response = {"ok": False, "error": f"{field} must be {description}, not {type(request[field]).__name__}"}
+                break
+        else:
+            try:
+                response = await self.dispatch(request)
+            except (KeyError, ValueError, TypeError) as error:
+                response = {"ok": False, "error": str(error)}
+            except Exception as error:     # anything else is still this request's failure: the other games (and the stdin loop) carry on
+                response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+        if "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def dispatch(self, request : dict) -> dict:
+        op = request.get("op")
+        if op == "new":
+            gameId = next(self.nextGameId)
+            state = GameState.fromFEN(request.get("fen", STANDARD_FEN))
+            self.games[gameId] = ServerGame(state)
+            return {"ok": True, "game": gameId, "fen": state.toFEN()}
+        if op == "stats":
+            return {"ok": True, "games": len(self.games), "moves": self.movesPlayed}
+
+        game = self.games.get(request.get("game"))
+        if game is None:
+            return {"ok": False, "error": f"no game {request.get('game')!r}"}
+        if op == "close":
+            del self.games[request["game"]]
+            return {"ok": True}
+        async with game.lock:
+            state = game.state
+            if op == "move":
+                move = parseUCIMove(state, request["move"])
+                if move is None:
+                    return {"ok": False, "error": f"illegal move {request['move']}", "fen": state.toFEN()}
+                state.makeMove(move)
+                self.movesPlayed += 1
+                return {"ok": True, "fen": state.toFEN(), "status": gameStatus(state)}
+            if op == "legal":
+                return {"ok": True, "moves": [moveToUCI(move) for move in state.legalMoves()]}
+            if op == "fen":
+                return {"ok": True, "fen": state.toFEN(), "status": gameStatus(state)}
+            if op == "engine":
+                move = await asyncio.get_running_loop().run_in_executor(None, self.engineMove, state, request)
+                if move is None:
+                    return {"ok": False, "error": "no legal moves", "status": gameStatus(state)}
+                state.makeMove(move)
+                self.movesPlayed += 1
+                return {"ok": True, "move": moveToUCI(move), "fen": state.toFEN(), "status": gameStatus(state)}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def engineMove(self, state : GameState, request : dict) -> typing.Optional[int]:
+        engine = SearchEngine(hashMegabytes=self.hashMegabytes)
+        movetime = request.get("movetime")
+        return engine.findBestMove(state, request.get("depth", MAX_PLY - 1), movetime / 1000 if movetime else None, request.get("nodes", 20000 if movetime is None and "depth" not in request else None))
+
+    async def handleConnection(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+        # requests on one connection are answered as they complete, so a slow engine move doesn't hold up other games on the same connection
+        pending = set()
+        writeLock = asyncio.Lock()
+
+        async def answer(line : bytes):
+            try:
+                response = await self.handleRequest(json.loads(line))
+            except json.JSONDecodeError as error:
+                response = {"ok": False, "error": f"bad JSON: {error}"}
+            async with writeLock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(answer(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        writer.close()
+
+    async def serveTCP(self, host : str = "127.0.0.1", port : int = 8765):
+        server = await asyncio.start_server(self.handleConnection, host, port, limit=1 << 20)
+        async with server:
+            await server.serve_forever()
+
+    async def serveStdin(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                response = await self.handleRequest(json.loads(line))
+            except json.JSONDecodeError as error:
+                response = {"ok": False, "error": f"bad JSON: {error}"}
+            sys.stdout.write(json.dumps(response) + "\n")
+            sys.stdout.flush()
+
+
+class _LoadTestConnection: # one client socket carrying many games at once; responses can arrive out of order, so they are matched by "id"
+    def __init__(self, reader : asyncio.StreamReader, writer : asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = {}
+        self.requestIds = itertools.count()
+        self.receiver = asyncio.create_task(self.receive())
+
+    async def receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            self.waiting.pop(response["id"]).set_result(response)
+
+    async def call(self, request : dict) -> dict:
+        requestId = next(self.requestIds)
+        response = asyncio.get_running_loop().create_future()
+        self.waiting[requestId] = response
+        self.writer.write(json.dumps(dict(request, id=requestId)).encode() + b"\n")
+        await self.writer.drain()
+        return await response
+
+    async def close(self):
+        self.writer.close()
+        await self.receiver
+
+
+async def _loadTestGame(connection : _LoadTestConnection, movesPerGame : int, random : random.Random, latencies : typing.List[float], live : typing.List[int]):
+    gameId = (await connection.call({"op": "new"}))["game"]
+    live[0] += 1
+    live[1] = max(live[1], live[0])
+    for ply in range(movesPerGame):
+        moves = (await connection.call({"op": "legal", "game": gameId}))["moves"]
+        if not moves:
+            break
+        startTime = time.perf_counter()
+        await connection.call({"op": "move", "game": gameId, "move": random.choice(moves)})
+        latencies.append(time.perf_counter() - startTime)
+    live[0] -= 1
+    await connection.call({"op": "close", "game": gameId})
+
+async def runServerLoadTest(games : int = 1000, movesPerGame : int = 40, connections : int = 50):
+    # plays random legal moves in games concurrent games (spread over connections client sockets) against an in-process server on a
+    # local socket, and reports moves/second, latency percentiles and the most games that were actually live at once
+    server = GameServer()
+    listener = await asyncio.start_server(server.handleConnection, "127.0.0.1", 0, limit=1 << 20)
+    port = listener.sockets[0].getsockname()[1]
+    latencies = []
+    live = [0, 0]   # games open now, most games open at once
+    seed = random.Random(0)
+    connections = max(1, min(connections, games))
+    clients = []
+    for index in range(connections):
+        clients.append(_LoadTestConnection(*await asyncio.open_connection("127.0.0.1", port, limit=1 << 20)))
+
+    startTime = time.perf_counter()
+    await asyncio.gather(*(_loadTestGame(clients[game % connections], movesPerGame, random.Random(seed.random()), latencies, live) for game in range(games)))
+    elapsed = time.perf_counter() - startTime
+    for client in clients:
+        await client.close()
+    listener.close()
+    await listener.wait_closed()
+
+    latencies.sort()
+    percentile = lambda fraction: latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000 if latencies else 0.0
+    print(f"{games} games over {connections} connections (at most {live[1]} live at once), {len(latencies)} moves in {elapsed:.3f}s")
+    print(f"{len(latencies) / max(elapsed, 1e-9):.0f} moves/second, latency p50 {percentile(0.50):.2f}ms p99 {percentile(0.99):.2f}ms")
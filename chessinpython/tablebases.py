@@ -0,0 +1,436 @@
+from __future__ import annotations
+import typing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import time
+from .board import (
+    BISHOP, bishopAttacks, BLACK_INDEX, colourIndex, iterateBits, KING, kingTable, KNIGHT, knightTable, PAWN, pawnAttackTable, pieceLetters, QUEEN,
+    queenAttacks, ROOK, rookAttacks, WHITE_INDEX
+)
+from .eval import pieceValues
+from .rules import GameState
+from .io import _MappedFile
+
+
+################################
+####    Endgame Tablebases  ####
+################################
+
+# A tablebase holds the exact result of every position with a given material signature (eg., "KRvK": white king and rook against a lone
+# black king), as distance to mate in plies, so the engine plays those endings perfectly instead of searching them.
+# Files hold one byte per index: 0 is a draw, 255 an impossible position, and any other byte b is mate in b - 1 plies (odd distances are
+# wins for the side to move, even ones are losses). The index is the squares of the pieces in signature order, 6 bits each, then the side
+# to move, so a table is exactly 2 * 64**pieces bytes on disk and is probed through mmap without being read in.
+# Generation is retrograde: positions are resolved in order of distance to mate, starting from the checkmates, and every resolved position
+# walks its un-moves back to the positions that lead to it. Captures and promotions leave the table, so those moves are looked up in the
+# smaller tables (which are generated first). The one pass that looks at every index is split across worker processes; the propagation
+# after it runs in the main process. It is the larger part of the work (about 60% of KQvK), so --workers only speeds up the first pass.
+# Generation keeps four bytes per index and nothing else that grows with the table: the result, the remaining move count, and the fastest
+# win and slowest loss among the moves that leave the table. Each distance's positions are found again by scanning the results for that
+# distance rather than kept in lists, so tablebaseMemory is the whole footprint (besides the smaller tables it probes, which are mapped files).
+# Tables ignore castling, en passant and the 50-move rule: positions with castling rights or a possible en passant capture aren't probed.
+
+TABLEBASE_FILE_MAGIC = b"CIPTBL1\0"
+TABLEBASE_DRAW, TABLEBASE_INVALID = 0, 255
+drawnSignatures = ("KvK", "KNvK", "KBvK")    # no mate is possible at all, so these never need a table
+
+
+def _sideLetters(codes : typing.Iterable[int]) -> str:
+    return "".join(pieceLetters[code % 6] for code in sorted(codes, key=lambda code: -(code % 6)))
+
+def canonicalSignature(signature : str) -> str: # eg., "kvkr" -> "KRvK": letters in K, Q, R, B, N, P order and the stronger side as white
+    white, black = signature.upper().split("V")
+    sides = []
+    for letters in (white, black):
+        if letters.count("K") != 1 or any(letter not in pieceLetters for letter in letters):
+            raise ValueError(f"bad tablebase signature {signature!r}")
+        sides.append("".join(sorted(letters, key=lambda letter: -pieceLetters.index(letter))))
+    strength = lambda letters: (sum(pieceValues[pieceLetters.index(letter)] for letter in letters), letters)
+    if strength(sides[1]) > strength(sides[0]):
+        sides.reverse()
+    return sides[0] + "v" + sides[1]
+
+def signatureCodes(signature : str) -> typing.List[int]: # piece codes in index order for a canonical signature
+    white, black = signature.split("v")
+    return [WHITE_INDEX * 6 + pieceLetters.index(letter) for letter in white] + [BLACK_INDEX * 6 + pieceLetters.index(letter) for letter in black]
+
+def tablebaseMemory(signature : str) -> int: # bytes used while generating (the file itself is a quarter of this)
+    return 4 * 2 * 64 ** len(signatureCodes(canonicalSignature(signature)))
+
+def _canonicalPieces(codes : typing.List[int], squares : typing.List[int], side : int) -> typing.Tuple[str, typing.List[int], int]:
+    # (signature, squares in index order, side to move) for any piece list, mirroring the colours when black is the stronger side
+    signature = _sideLetters(code for code in codes if code < 6) + "v" + _sideLetters(code for code in codes if code >= 6)
+    canonical = canonicalSignature(signature)
+    if canonical != signature:
+        codes = [(code + 6) % 12 for code in codes]
+        squares = [square ^ 56 for square in squares]
+        side ^= 1
+    pieces = sorted(zip(codes, squares), key=lambda piece: (piece[0] // 6, -(piece[0] % 6), piece[1]))
+    return canonical, [square for code, square in pieces], side
+
+def tablebaseIndex(squares : typing.List[int], side : int) -> int:
+    index = 0
+    for square in squares:
+        index = (index << 6) | square
+    return (index << 1) | side
+
+def _tablebaseSquares(index : int, pieceCount : int) -> typing.List[int]:
+    squares = [0] * pieceCount
+    index >>= 1
+    for position in range(pieceCount - 1, -1, -1):
+        squares[position] = index & 63
+        index >>= 6
+    return squares
+
+def _tablebaseAttacked(codes : typing.List[int], squares : typing.List[int], occupied : int, target : int, attacker : int) -> bool:
+    for code, square in zip(codes, squares):
+        if code // 6 != attacker:
+            continue
+        pieceType = code % 6
+        if pieceType == PAWN:
+            attacks = pawnAttackTable[attacker][square]
+        elif pieceType == KNIGHT:
+            attacks = knightTable[square]
+        elif pieceType == BISHOP:
+            attacks = bishopAttacks(square, occupied)
+        elif pieceType == ROOK:
+            attacks = rookAttacks(square, occupied)
+        elif pieceType == QUEEN:
+            attacks = queenAttacks(square, occupied)
+        else:
+            attacks = kingTable[square]
+        if attacks >> target & 1:
+            return True
+    return False
+
+def _tablebaseKingAttacked(codes : typing.List[int], squares : typing.List[int], colourIdx : int) -> bool:
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    kingSquare = squares[codes.index(colourIdx * 6 + KING)]
+    return _tablebaseAttacked(codes, squares, occupied, kingSquare, colourIdx ^ 1)
+
+def _tablebaseValid(codes : typing.List[int], squares : typing.List[int], side : int) -> bool:
+    occupied = 0
+    for position, (code, square) in enumerate(zip(codes, squares)):
+        if occupied >> square & 1:
+            return False
+        occupied |= 1 << square
+        if code % 6 == PAWN and (square < 8 or square >= 56):
+            return False
+        # identical pieces are stored once, in ascending square order
+        if position and codes[position - 1] == code and squares[position - 1] > square:
+            return False
+    return not _tablebaseKingAttacked(codes, squares, side ^ 1)
+
+def _tablebaseMoves(codes : typing.List[int], squares : typing.List[int], side : int) -> typing.Iterator[typing.Tuple[typing.List[int], typing.List[int], bool]]:
+    # (codes, squares, stays in this table) after each legal move for side
+    occupied = own = 0
+    for code, square in zip(codes, squares):
+        occupied |= 1 << square
+        if code // 6 == side:
+            own |= 1 << square
+    for position, (code, square) in enumerate(zip(codes, squares)):
+        if code // 6 != side:
+            continue
+        pieceType = code % 6
+        if pieceType == PAWN:
+            step = -8 if side == WHITE_INDEX else 8
+            targets = pawnAttackTable[side][square] & occupied & ~own
+            if not occupied >> (square + step) & 1:
+                targets |= 1 << (square + step)
+                if square >> 3 == (6 if side == WHITE_INDEX else 1) and not occupied >> (square + 2 * step) & 1:
+                    targets |= 1 << (square + 2 * step)
+        elif pieceType == KNIGHT:
+            targets = knightTable[square] & ~own
+        elif pieceType == BISHOP:
+            targets = bishopAttacks(square, occupied) & ~own
+        elif pieceType == ROOK:
+            targets = rookAttacks(square, occupied) & ~own
+        elif pieceType == QUEEN:
+            targets = queenAttacks(square, occupied) & ~own
+        else:
+            targets = kingTable[square] & ~own
+        for target in iterateBits(targets):
+            newCodes = list(codes)
+            newSquares = list(squares)
+            newSquares[position] = target
+            capture = occupied >> target & 1
+            if capture:
+                victim = squares.index(target)
+                del newCodes[victim]
+                del newSquares[victim]
+            if _tablebaseKingAttacked(newCodes, newSquares, side):
+                continue
+            if pieceType == PAWN and (target < 8 or target >= 56):
+                mover = newSquares.index(target)
+                for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                    promotedCodes = list(newCodes)
+                    promotedCodes[mover] = side * 6 + promotion
+                    yield promotedCodes, newSquares, False
+            else:
+                yield newCodes, newSquares, not capture
+
+def _tablebaseUnmoves(codes : typing.List[int], squares : typing.List[int], side : int) -> typing.Iterator[typing.List[int]]:
+    # squares of every position one quiet move earlier (the other side to move) that this position could have come from
+    mover = side ^ 1
+    occupied = 0
+    for square in squares:
+        occupied |= 1 << square
+    for position, (code, square) in enumerate(zip(codes, squares)):
+        if code // 6 != mover:
+            continue
+        pieceType = code % 6
+        if pieceType == PAWN:
+            back = 8 if mover == WHITE_INDEX else -8
+            origins = 0
+            if 8 <= square + back < 56 and not occupied >> (square + back) & 1:
+                origins |= 1 << (square + back)
+                if square >> 3 == (4 if mover == WHITE_INDEX else 3) and not occupied >> (square + 2 * back) & 1:
+                    origins |= 1 << (square + 2 * back)
+        elif pieceType == KNIGHT:
+            origins = knightTable[square] & ~occupied
+        elif pieceType == BISHOP:
+            origins = bishopAttacks(square, occupied) & ~occupied
+        elif pieceType == ROOK:
+            origins = rookAttacks(square, occupied) & ~occupied
+        elif pieceType == QUEEN:
+            origins = queenAttacks(square, occupied) & ~occupied
+        else:
+            origins = kingTable[square] & ~occupied
+        for origin in iterateBits(origins):
+            newSquares = list(squares)
+            newSquares[position] = origin
+            yield newSquares
+
+def _sortGroups(codes : typing.List[int], squares : typing.List[int]) -> typing.List[int]: # puts identical pieces back in ascending square order
+    result = list(squares)
+    start = 0
+    while start < len(codes):
+        end = start + 1
+        while end < len(codes) and codes[end] == codes[start]:
+            end += 1
+        if end - start > 1:
+            result[start:end] = sorted(result[start:end])
+        start = end
+    return result
+
+def tablebaseDependencies(signature : str) -> typing.List[str]: # the tables reached by one capture or promotion, drawn material left out
+    codes = signatureCodes(canonicalSignature(signature))
+    found = set()
+    for position, code in enumerate(codes):
+        if code % 6 == KING:
+            continue
+        remaining = codes[:position] + codes[position + 1:]
+        found.add(_canonicalPieces(remaining, list(range(len(remaining))), 0)[0])
+        if code % 6 == PAWN:
+            for promotion in (QUEEN, ROOK, BISHOP, KNIGHT):
+                promoted = list(codes)
+                promoted[position] = (code // 6) * 6 + promotion
+                found.add(_canonicalPieces(promoted, list(range(len(promoted))), 0)[0])
+                # a promotion can also capture
+                for victim, victimCode in enumerate(codes):
+                    if victimCode // 6 != code // 6 and victimCode % 6 != KING:
+                        found.add(_canonicalPieces([c for i, c in enumerate(promoted) if i != victim], list(range(len(promoted) - 1)), 0)[0])
+    return sorted(found - set(drawnSignatures))
+
+
+class Tablebases:
+    def __init__(self, directory : str):
+        self.directory = directory
+        self.tables = {}    # signature -> _MappedFile, or None when there is no file
+        self.maxPieces = 0
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith(".cipt"):
+                    self.maxPieces = max(self.maxPieces, len(name) - len(".cipt") - 1)
+
+    def close(self):
+        for table in self.tables.values():
+            if table is not None:
+                table.close()
+        self.tables = {}
+
+    def table(self, signature : str) -> typing.Optional[_MappedFile]:
+        if signature not in self.tables:
+            path = os.path.join(self.directory, signature + ".cipt")
+            self.tables[signature] = _MappedFile(path, TABLEBASE_FILE_MAGIC) if os.path.exists(path) else None
+        return self.tables[signature]
+
+    def probePieces(self, codes : typing.List[int], squares : typing.List[int], side : int) -> typing.Optional[int]: # the raw table byte, or None if there is no table
+        signature, squares, side = _canonicalPieces(codes, squares, side)
+        if signature in drawnSignatures:
+            return TABLEBASE_DRAW
+        table = self.table(signature)
+        if table is None:
+            return None
+        return table.data[table.start + tablebaseIndex(squares, side)]
+
+    def probe(self, state : GameState) -> typing.Optional[typing.Tuple[int, int]]: # (1 win / 0 draw / -1 loss for the side to move, plies to mate), or None
+        board = state.gameBoard
+        occupied = board.colourBitboards[WHITE_INDEX] | board.colourBitboards[BLACK_INDEX]
+        if occupied.bit_count() > self.maxPieces or board.castlingRights:
+            return None
+        us = colourIndex[state.sideToMove]
+        if board.enPassantSquare >= 0 and pawnAttackTable[us ^ 1][board.enPassantSquare] & board.pieceBitboards[us * 6 + PAWN]:
+            return None
+        squares = list(iterateBits(occupied))
+        value = self.probePieces([board.mailbox[square] for square in squares], squares, us)
+        if value is None or value == TABLEBASE_INVALID:
+            return None
+        if value == TABLEBASE_DRAW:
+            return 0, 0
+        distance = value - 1
+        return (1 if distance & 1 else -1), distance
+
+    def bestMove(self, state : GameState) -> typing.Optional[int]: # the move that mates fastest (or loses slowest, or holds the draw), or None if state isn't covered
+        if self.probe(state) is None:
+            return None
+        bestMove, bestRank = None, None
+        for move in state.legalMoves():
+            state.makeMove(move)
+            child = self.probe(state)
+            state.unmakeMove()
+            if child is None:
+                continue
+            childResult, childDistance = child
+            # prefer the best result for us, then the shortest win or the longest loss
+            rank = (-childResult, -childDistance if childResult < 0 else childDistance)
+            if bestRank is None or rank > bestRank:
+                bestMove, bestRank = move, rank
+        return bestMove
+
+
+def _tablebaseFirstPass(signature : str, directory : str, start : int, stop : int) -> typing.Tuple[int, bytes, bytes, bytes, bytes]:
+    # looks at every index in [start, stop): marks impossible positions, checkmates and stalemates, counts the legal moves, and looks up the
+    # moves that leave the table. returns (start, results, move counts, exit wins, exit losses): an exit win is the smallest table byte of a
+    # lost position that a capture or promotion leads to, so the index wins at that distance; an exit loss is the largest table byte of a won
+    # one, the soonest the index can lose if every other move loses too. exits into won positions aren't counted as remaining moves
+    codes = signatureCodes(signature)
+    tablebases = Tablebases(directory)
+    values = bytearray(stop - start)
+    counters = bytearray(stop - start)
+    exitWins = bytearray(stop - start)
+    exitLosses = bytearray(stop - start)
+    for index in range(start, stop):
+        squares = _tablebaseSquares(index, len(codes))
+        side = index & 1
+        if not _tablebaseValid(codes, squares, side):
+            values[index - start] = TABLEBASE_INVALID
+            continue
+        count = 0
+        exitWin = exitLoss = lostExits = 0
+        for childCodes, childSquares, sameTable in _tablebaseMoves(codes, squares, side):
+            count += 1
+            if sameTable:
+                continue
+            childValue = tablebases.probePieces(childCodes, childSquares, side ^ 1)
+            if childValue is None:
+                raise ValueError(f"{signature} needs the tablebase for {_canonicalPieces(childCodes, childSquares, 0)[0]}")
+            if childValue == TABLEBASE_DRAW:
+                continue
+            # the child's side to move loses in (childValue - 1) plies -> we win one ply later; a child win just uses up one of our moves
+            if (childValue - 1) & 1 == 0:
+                exitWin = childValue if exitWin == 0 else min(exitWin, childValue)
+            else:
+                exitLoss = max(exitLoss, childValue)
+                lostExits += 1
+        counters[index - start] = min(count - lostExits, 254)
+        exitWins[index - start] = exitWin
+        exitLosses[index - start] = exitLoss
+        if count == 0 and _tablebaseKingAttacked(codes, squares, side):
+            values[index - start] = 1   # checkmated: a loss in 0 plies
+    tablebases.close()
+    return start, bytes(values), bytes(counters), bytes(exitWins), bytes(exitLosses)
+
+def generateTablebase(signature : str, directory : str, workers : int = 1) -> str: # writes directory/<signature>.cipt and returns its path
+    signature = canonicalSignature(signature)
+    codes = signatureCodes(signature)
+    size = 2 * 64 ** len(codes)
+    values = bytearray(size)
+    counters = bytearray(size)
+    exitWins = bytearray(size)
+    exitLosses = bytearray(size)
+    chunk = -(-size // max(1, workers * 8))
+    starts = list(range(0, size, chunk))
+    passArguments = ([signature] * len(starts), [directory] * len(starts), starts, [min(start + chunk, size) for start in starts])
+
+    def merge(results):     # chunks are copied in as they arrive, so only a few are ever held on top of the table
+        for start, chunkValues, chunkCounters, chunkWins, chunkLosses in results:
+            stop = start + len(chunkValues)
+            values[start:stop] = chunkValues
+            counters[start:stop] = chunkCounters
+            exitWins[start:stop] = chunkWins
+            exitLosses[start:stop] = chunkLosses
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            merge(pool.map(_tablebaseFirstPass, *passArguments))
+    else:
+        merge(map(_tablebaseFirstPass, *passArguments))
+
+    hasDuplicates = len(set(codes)) < len(codes)
+    lastExit = max(max(exitWins), max(exitLosses))
+    # positions resolved at a distance hold distance + 1, so each distance's positions are found by scanning values for that byte
+    distance = 0
+    pending = True      # some position holds distance + 1 (at distance 0, the checkmates from the first pass)
+    while pending or distance <= lastExit:
+        if distance:
+            # moves leaving the table: the fastest win through one, or the slowest loss once every move that stays in the table loses too
+            for exits, needsAllLost in ((exitWins, False), (exitLosses, True)):
+                index = exits.find(distance)
+                while index >= 0:
+                    if values[index] == TABLEBASE_DRAW and (not needsAllLost or counters[index] == 0):
+                        values[index] = distance + 1
+                        pending = True
+                    index = exits.find(distance, index + 1)
+        if pending and distance >= 253:
+            raise ValueError(f"{signature} has mates longer than a table byte can hold")
+        if pending:
+            pending = False
+            childWins = distance & 1 == 1
+            index = values.find(distance + 1)
+            while index >= 0:
+                squares = _tablebaseSquares(index, len(codes))
+                side = index & 1
+                for parentSquares in _tablebaseUnmoves(codes, squares, side):
+                    if _tablebaseKingAttacked(codes, parentSquares, side):
+                        continue    # side's king would be in check with the other side to move, so there is no such position
+                    parent = tablebaseIndex(_sortGroups(codes, parentSquares) if hasDuplicates else parentSquares, side ^ 1)
+                    if values[parent] != TABLEBASE_DRAW:
+                        continue
+                    # a move into a lost position wins; a move into a won position only uses up one of the parent's moves, and the parent
+                    # loses once they are all used up (or later, at its slowest losing exit, which the exit scan above picks up)
+                    if childWins:
+                        counters[parent] -= 1
+                        if counters[parent] or exitLosses[parent] > distance + 1:
+                            continue
+                    values[parent] = distance + 2
+                    pending = True
+                index = values.find(distance + 1, index + 1)
+        distance += 1
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, signature + ".cipt")
+    with open(path, "wb") as file:
+        file.write(TABLEBASE_FILE_MAGIC)
+        file.write(values)
+    return path
+
+def generateTablebases(signatures : typing.Iterable[str], directory : str, workers : int = 1): # generates each table after the smaller tables it depends on, skipping tables already on disk
+    done = set(drawnSignatures)
+    def generate(signature : str):
+        signature = canonicalSignature(signature)
+        if signature in done:
+            return
+        done.add(signature)
+        for dependency in tablebaseDependencies(signature):
+            generate(dependency)
+        if os.path.exists(os.path.join(directory, signature + ".cipt")):
+            return
+        print(f"generating {signature}: {2 * 64 ** len(signatureCodes(signature))} positions, about {tablebaseMemory(signature) / 2 ** 20:.1f}MB")
+        startTime = time.perf_counter()
+        path = generateTablebase(signature, directory, workers)
+        print(f"wrote {path} in {time.perf_counter() - startTime:.1f}s")
+    for signature in signatures:
+        generate(signature)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+import sys
+import typing
+import threading
+from .board import Colour, moveToUCI
+from .rules import GameState, parseUCIMove, STANDARD_FEN
+from .io import OpeningBook
+from .search import MATE_SCORE, MAX_PLY, SearchEngine, TranspositionTable
+
+
+################################
+####    UCI Engine Server   ####
+################################
+
+# UCIServer speaks the Universal Chess Interface on stdin/stdout so GUIs and match runners can drive the engine.
+# Commands are read on the calling thread; "go" starts the search on a background thread, so "stop" and "ponderhit" are handled while it runs.
+# SearchEngine checks its stop flag every 64 nodes: "stop" is answered with bestmove in a few milliseconds (under 10ms when measured).
+# The search's limits are set up by startSearch on the command thread before the search thread starts, and changed afterwards only through
+# the engine's stop and setTimeLimit, so a "stop" or "ponderhit" arriving before the search thread gets going still applies to it.
+
+class UCIServer:
+    name = "Chess in Python"
+
+    def __init__(self, inputStream : typing.TextIO = None, outputStream : typing.TextIO = None):
+        self.inputStream = inputStream if inputStream is not None else sys.stdin
+        self.outputStream = outputStream if outputStream is not None else sys.stdout
+        self.outputLock = threading.Lock()
+        self.hashMegabytes = 16
+        self.engine = SearchEngine(hashMegabytes=self.hashMegabytes)
+        self.engine.onIteration = self.sendIterationInfo
+        self.state = GameState.fromFEN(STANDARD_FEN)
+        self.searchThread = None
+        self.pondering = False
+        self.infinite = False
+        self.searchTimeLimit = None
+        self.releaseBestMove = threading.Event()   # set when an infinite or ponder search may report its best move
+        self.openingBook = None
+
+    def send(self, line : str):
+        with self.outputLock:
+            self.outputStream.write(line + "\n")
+            self.outputStream.flush()
+
+    def run(self):
+        for line in self.inputStream:
+            if not self.handle(line.strip()):
+                break
+        self.stopSearch()
+
+    def handle(self, line : str) -> bool: # returns False on "quit"
+        tokens = line.split()
+        if not tokens:
+            return True
+        command = tokens[0]
+        if command == "uci":
+            self.send(f"id name {self.name}")
+            self.send("id author cicadatree")
+            self.send("option name Hash type spin default 16 min 1 max 4096")
+            self.send("option name Ponder type check default false")
+            self.send("option name BookFile type string default <empty>")
+            self.send("option name TablebasePath type string default <empty>")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stopSearch()
+            self.engine.transpositionTable.clear()
+            self.state = GameState.fromFEN(STANDARD_FEN)
+        elif command == "setoption":
+            self.setOption(tokens[1:])
+        elif command == "position":
+            self.stopSearch()
+            self.setPosition(tokens[1:])
+        elif command == "go":
+            self.stopSearch()
+            self.go(tokens[1:])
+        elif command == "stop":
+            self.stopSearch()
+        elif command == "ponderhit":
+            self.ponderHit()
+        elif command == "quit":
+            return False
+        return True
+
+    def setOption(self, tokens : typing.List[str]):
+        if "name" not in tokens or "value" not in tokens:
+            return
+        name = " ".join(tokens[tokens.index("name") + 1:tokens.index("value")])
+        value = " ".join(tokens[tokens.index("value") + 1:])
+        if name.lower() == "hash":
+            if not value.isdigit():
+                self.send(f"info string bad Hash value {value}")
+                return
+            self.stopSearch()
+            self.hashMegabytes = max(1, int(value))
+            self.engine.transpositionTable = TranspositionTable(self.hashMegabytes)
+        elif name.lower() == "bookfile":
+            if self.openingBook is not None:
+                self.openingBook.close()
+            self.openingBook = None
+            if value and value != "<empty>":
+                try:
+                    self.openingBook = OpeningBook(value)
+                except (OSError, ValueError) as error:
+                    self.send(f"info string cannot open book {value}: {error}")
+        elif name.lower() == "tablebasepath":
+            from .tablebases import Tablebases     # only imported once a path is set, so the engine starts without the generator's process pool
+            self.stopSearch()
+            self.engine.tablebases = Tablebases(value) if value and value != "<empty>" else None
+
+    def setPosition(self, tokens : typing.List[str]):
+        movesAt = tokens.index("moves") if "moves" in tokens else len(tokens)
+        if tokens and tokens[0] == "fen":
+            try:
+                state = GameState.fromFEN(" ".join(tokens[1:movesAt]))
+            except ValueError as error:
+                self.send(f"info string bad fen: {error}")    # the previous position stays
+                return
+        else:
+            state = GameState.fromFEN(STANDARD_FEN)
+        for text in tokens[movesAt + 1:]:
+            move = parseUCIMove(state, text)
+            if move is None:
+                self.send(f"info string illegal move {text}")
+                break
+            state.makeMove(move)
+        self.state = state
+
+    def go(self, tokens : typing.List[str]):
+        options = {}
+        index = 0
+        while index < len(tokens):
+            if tokens[index] in ("infinite", "ponder"):
+                options[tokens[index]] = True
+                index += 1
+            elif index + 1 < len(tokens) and tokens[index + 1].lstrip("-").isdigit():
+                options[tokens[index]] = int(tokens[index + 1])
+                index += 2
+            else:
+                index += 1  # options this engine doesn't support (eg., searchmoves) are skipped
+
+        self.infinite = options.get("infinite", False)
+        self.pondering = options.get("ponder", False)
+        # a book move is answered straight away, unless the GUI wants an open-ended search
+        if self.openingBook is not None and not self.infinite and not self.pondering:
+            move = self.openingBook.chooseMove(self.state)
+            if move is not None:
+                self.send("info string book move")
+                self.send(f"bestmove {moveToUCI(move)}")
+                return
+        self.releaseBestMove.clear()
+        self.searchTimeLimit = self.allocateTime(options)
+        # while pondering or searching "infinite" there is no deadline; ponderhit installs searchTimeLimit later
+        timeLimit = None if (self.infinite or self.pondering) else self.searchTimeLimit
+        maxDepth = options.get("depth", MAX_PLY - 1)
+        nodeLimit = options.get("nodes")
+        self.engine.startSearch(timeLimit, nodeLimit)
+        self.searchThread = threading.Thread(target=self.searchAndReport, args=(maxDepth,), daemon=True)
+        self.searchThread.start()
+
+    def allocateTime(self, options : typing.Dict[str, int]) -> typing.Optional[float]: # seconds to spend on this move, or None for no limit
+        if "movetime" in options:
+            return options["movetime"] / 1000
+        remaining = options.get("wtime" if self.state.sideToMove == Colour.WHITE else "btime")
+        if remaining is None:
+            return None
+        increment = options.get("winc" if self.state.sideToMove == Colour.WHITE else "binc", 0)
+        movesToGo = options.get("movestogo", 30)
+        # spend an even share of the remaining time plus most of the increment, keeping a safety margin for move overhead
+        budget = remaining / max(movesToGo, 1) + increment * 0.75
+        return max(0.01, min(budget, remaining * 0.5) / 1000)
+
+    def searchAndReport(self, maxDepth : int):
+        move = self.engine.findBestMove(self.state, maxDepth, started=True)
+        # UCI forbids sending bestmove during "go infinite" or an unanswered ponder until the GUI says stop / ponderhit
+        if (self.infinite or self.pondering) and not self.engine.stopRequested:
+            self.releaseBestMove.wait()
+        if move is None:
+            self.send("bestmove 0000")
+            return
+        line = f"bestmove {moveToUCI(move)}"
+        if len(self.engine.bestLine) > 1 and self.engine.bestLine[0] == move:
+            line += f" ponder {moveToUCI(self.engine.bestLine[1])}"
+        self.send(line)
+
+    def ponderHit(self):
+        # the opponent played the expected move: keep searching, now on the clock
+        if self.pondering:
+            self.pondering = False
+            if self.searchTimeLimit is not None:
+                self.engine.setTimeLimit(self.searchTimeLimit)
+            if not self.infinite:
+                self.releaseBestMove.set()
+
+    def stopSearch(self):
+        if self.searchThread is not None:
+            self.engine.stop()
+            self.releaseBestMove.set()
+            self.searchThread.join()
+            self.searchThread = None
+        self.pondering = False
+        self.infinite = False
+
+    def sendIterationInfo(self, depth : int, score : int, nodes : int, seconds : float, pv : typing.List[int]):
+        if abs(score) >= MATE_SCORE - MAX_PLY:
+            plies = MATE_SCORE - abs(score)
+            scoreText = f"mate {(plies + 1) // 2 if score > 0 else -((plies + 1) // 2)}"
+        else:
+            scoreText = f"cp {score}"
+        milliseconds = int(seconds * 1000)
+        nps = int(nodes / seconds) if seconds > 0 else nodes
+        self.send(f"info depth {depth} score {scoreText} nodes {nodes} nps {nps} time {milliseconds} hashfull {self.engine.transpositionTable.hashfull()} pv {' '.join(moveToUCI(move) for move in pv)}")
@@ -0,0 +1,58 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from chessinpython import cache
+
+
+def writeBuilder(path, values): # a module whose build() returns values and counts its calls
+    with open(path, "w") as file:
+        file.write(f"calls = 0\ndef build():\n    global calls\n    calls += 1\n    return {{'values': {values!r}}}\n")
+
+def loadBuilder(path):
+    spec = importlib.util.spec_from_file_location("_cacheTestBuilder", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TableCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cachePath = os.path.join(self.directory, "tables.marshal")
+        self.oldEnvironment = os.environ.get("CIP_TABLE_CACHE")
+        os.environ["CIP_TABLE_CACHE"] = self.cachePath
+        cache._loadedSections.clear()
+
+    def tearDown(self):
+        cache._builtSections.pop("test", None)
+        cache._loadedSections.clear()
+        if self.oldEnvironment is None:
+            del os.environ["CIP_TABLE_CACHE"]
+        else:
+            os.environ["CIP_TABLE_CACHE"] = self.oldEnvironment
+        for name in os.listdir(self.directory):
+            os.remove(os.path.join(self.directory, name))
+        os.rmdir(self.directory)
+
+    def testEditedBuilderRebuilds(self):
+        builderPath = os.path.join(self.directory, "builder.py")
+        writeBuilder(builderPath, [1, 2, 3])
+        builder = loadBuilder(builderPath)
+        self.assertEqual(cache.cachedTables("test", (1,), builder.build), {"values": [1, 2, 3]})
+        cache.writeTableCache(self.cachePath)
+
+        # the same builder and key load from the file without building
+        cache._loadedSections.clear()
+        builder = loadBuilder(builderPath)
+        self.assertEqual(cache.cachedTables("test", (1,), builder.build), {"values": [1, 2, 3]})
+        self.assertEqual(builder.calls, 0)
+
+        # an edited builder with the same key must not get the old tables back
+        cache._loadedSections.clear()
+        modified = os.stat(builderPath).st_mtime_ns
+        writeBuilder(builderPath, [4, 5, 6])     # same size, so only the modification time tells them apart
+        os.utime(builderPath, ns=(modified + 1,) * 2)
+        builder = loadBuilder(builderPath)
+        self.assertEqual(cache.cachedTables("test", (1,), builder.build), {"values": [4, 5, 6]})
+        self.assertEqual(builder.calls, 1)
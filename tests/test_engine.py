@@ -0,0 +1,150 @@
+import pickle
+import random
+import unittest
+from chessinpython.board import moveToUCI
+from chessinpython.eval import computeEvaluation
+from chessinpython.io import parseSAN
+from chessinpython.perft import perft, perftSuite
+from chessinpython.rules import GameState, parseUCIMove, STANDARD_FEN
+from chessinpython.search import BOUND_EXACT, BOUND_LOWER, MATE_SCORE, SearchEngine, SharedTranspositionTable, tacticalSuite
+
+
+# Fixed positions for the search: best moves, and node counts which only change when the search itself does.
+# A node count moving is not necessarily a bug, but it should only ever happen in a commit which means to change the search.
+
+BACK_RANK_FEN = "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1"
+KIWIPETE_FEN = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"
+PROMOTION_FEN = "n1n5/PPPk4/8/8/8/8/4Kppp/5N1N b - - 0 1"
+
+class SearchTests(unittest.TestCase):
+    def testBackRankMate(self):
+        engine = SearchEngine()
+        self.assertEqual(moveToUCI(engine.findBestMove(GameState.fromFEN(BACK_RANK_FEN), 3)), "a1a8")
+
+    def testStartPositionNodeCounts(self):
+        for depth, move, nodes in ((1, "g1f3", 21), (2, "g1f3", 106), (3, "g1f3", 679), (4, "g1f3", 2206)):
+            engine = SearchEngine()
+            self.assertEqual(moveToUCI(engine.findBestMove(GameState.fromFEN(STANDARD_FEN), depth)), move)
+            self.assertEqual(engine.nodes, nodes, f"depth {depth}")
+
+    def testStartPositionNodeCountsWithoutQuiescence(self):
+        engine = SearchEngine(quiescence=False, staticExchange=False)
+        self.assertEqual(moveToUCI(engine.findBestMove(GameState.fromFEN(STANDARD_FEN), 3)), "g1f3")
+        self.assertEqual(engine.nodes, 686)
+
+    def testPerftSuite(self):
+        # every reference position (castling, en passant, promotions, checks and pins between them) to each depth under 10000 leaves
+        for name, fen, expectedCounts in perftSuite:
+            state = GameState.fromFEN(fen)
+            for depth, expected in enumerate(expectedCounts, start=1):
+                if expected > 10000:
+                    break
+                with self.subTest(position=name, depth=depth):
+                    self.assertEqual(perft(state, depth), expected)
+            self.assertEqual(state.toFEN(), fen)
+
+
+# makeMove and unmakeMove keep the evaluation and the Zobrist key up to date incrementally; computeEvaluation and computePositionKey
+# are the full recomputes they must agree with. Random games from positions with castling, en passant and promotions cover every move type.
+
+class IncrementalStateTests(unittest.TestCase):
+    def assertConsistent(self, state : GameState):
+        self.assertEqual(state.evaluation, computeEvaluation(state.gameBoard), state.toFEN())
+        self.assertEqual(state.positionKey, state.computePositionKey(), state.toFEN())
+
+    def testRandomGames(self):
+        chooser = random.Random(0)
+        for fen in (STANDARD_FEN, KIWIPETE_FEN, PROMOTION_FEN):
+            for game in range(10):
+                state = GameState.fromFEN(fen)
+                played = 0
+                for ply in range(60):
+                    moves = list(state.legalMoves())
+                    if not moves:
+                        break
+                    state.makeMove(chooser.choice(moves))
+                    played += 1
+                    self.assertConsistent(state)
+                for ply in range(played):
+                    state.unmakeMove()
+                    self.assertConsistent(state)
+                self.assertEqual(state.toFEN(), GameState.fromFEN(fen).toFEN())
+
+
+class StaticExchangeTests(unittest.TestCase):
+    def exchange(self, fen, text):
+        state = GameState.fromFEN(fen)
+        return state.gameBoard.staticExchange(parseUCIMove(state, text))
+
+    def testKnownExchanges(self):
+        self.assertEqual(self.exchange("4k3/8/8/4p3/8/8/8/4QK2 w - - 0 1", "e1e5"), 100)      # a free pawn
+        self.assertEqual(self.exchange("4k3/8/3p4/4p3/8/8/8/4QK2 w - - 0 1", "e1e5"), -800)   # the queen takes a defended pawn
+        self.assertEqual(self.exchange("4k3/8/3p4/4n3/8/8/8/4RK2 w - - 0 1", "e1e5"), -180)   # rook for a knight
+        # a second rook behind the first recaptures through it, which wins the knight outright
+        self.assertEqual(self.exchange("4r1k1/8/8/4n3/8/8/4R3/4R1K1 w - - 0 1", "e2e5"), 320)
+        self.assertEqual(self.exchange("4r1k1/8/8/4n3/8/8/4R3/6K1 w - - 0 1", "e2e5"), -180)
+        # the king can't take back on a square the other side still attacks
+        self.assertEqual(self.exchange("6k1/5p2/8/3B4/8/8/8/5QK1 w - - 0 1", "d5f7"), 100)
+        self.assertEqual(self.exchange("6k1/5p2/8/3B4/8/8/8/6K1 w - - 0 1", "d5f7"), -230)
+
+
+class QuiescenceTests(unittest.TestCase):
+    def testHorizonEffectPositions(self):
+        # at depth 2 the plain search stops in the middle of an exchange and misses the move; the capture search sees it through
+        positions = {name: (fen, bestMove) for name, fen, bestMove in tacticalSuite}
+        for name in ("WAC.003", "WAC.010"):
+            fen, bestMove = positions[name]
+            expected = parseSAN(GameState.fromFEN(fen), bestMove)
+            for staticExchange in (False, True):
+                engine = SearchEngine(quiescence=True, staticExchange=staticExchange)
+                self.assertEqual(engine.findBestMove(GameState.fromFEN(fen), 2), expected, f"{name}, staticExchange {staticExchange}")
+            engine = SearchEngine(quiescence=False, staticExchange=False)
+            self.assertNotEqual(engine.findBestMove(GameState.fromFEN(fen), 2), expected, name)
+
+
+class SharedTranspositionTableTests(unittest.TestCase):
+    def setUp(self):
+        self.table = SharedTranspositionTable(1)
+        self.attached = pickle.loads(pickle.dumps(self.table))     # what a Lazy SMP worker gets: the same block, found by name
+
+    def tearDown(self):
+        self.attached.close()
+        self.table.unlink()
+
+    def testStoreAndProbe(self):
+        key = 0x123456789ABCDEF0
+        self.table.store(key, 7, -MATE_SCORE + 3, BOUND_LOWER, 0x1234)
+        self.assertEqual(self.table.probe(key), (7, -MATE_SCORE + 3, BOUND_LOWER, 0x1234))
+        self.assertEqual(self.attached.probe(key), (7, -MATE_SCORE + 3, BOUND_LOWER, 0x1234))
+        self.assertIsNone(self.attached.probe(key ^ (1 << 63)))     # same slot, another position
+        # a store without a move keeps the one already there
+        self.attached.store(key, 9, 25, BOUND_EXACT, 0)
+        self.assertEqual(self.table.probe(key), (9, 25, BOUND_EXACT, 0x1234))
+
+    def testTornEntriesAreMisses(self):
+        # a slot whose key word and entry word come from different writes must not be read as either position
+        key = 0x0FEDCBA987654321
+        self.table.store(key, 5, 100, BOUND_EXACT, 0x0042)
+        slot = (key & self.table.bucketMask) << 1
+        self.attached.entries[slot] ^= 1 << 30        # the entry rewritten (eg., another score) without its key word
+        self.assertIsNone(self.table.probe(key))
+        self.table.store(key, 5, 100, BOUND_EXACT, 0x0042)
+        self.assertIsNotNone(self.table.probe(key))
+        self.attached.keys[slot] ^= 1                 # the key word from another position's write
+        self.assertIsNone(self.table.probe(key))
+
+    def testStopSignal(self):
+        self.assertFalse(self.attached.stopSignalled())
+        self.table.signalStop()
+        self.assertTrue(self.attached.stopSignalled())
+        # the header is separate from the slots: filling and clearing the table leave the signal alone
+        for key in range(1, 5000):
+            self.attached.store(key * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF, 1, 0, BOUND_EXACT, 1)
+        self.table.clear()
+        self.assertTrue(self.attached.stopSignalled())
+        self.attached.resetStopSignal()
+        self.assertFalse(self.table.stopSignalled())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import importlib.util
+import random
+import unittest
+from chessinpython.board import colourIndex
+from chessinpython.eval import evaluatePosition
+from chessinpython.perft import perftSuite
+from chessinpython.rules import GameState
+
+
+def randomPositions(count, seed=0): # positions from random games out of each perft-suite position
+    chooser = random.Random(seed)
+    states = []
+    while len(states) < count:
+        for name, fen, expectedCounts in perftSuite:
+            state = GameState.fromFEN(fen)
+            for ply in range(chooser.randrange(1, 40)):
+                moves = list(state.legalMoves())
+                if not moves:
+                    break
+                state.makeMove(chooser.choice(moves))
+            states.append(GameState.fromFEN(state.toFEN()))
+    return states[:count]
+
+
+@unittest.skipUnless(importlib.util.find_spec("numpy"), "the batch evaluation API needs numpy")
+class BatchEvaluationTests(unittest.TestCase):
+    def testAgreesWithScalarPath(self):
+        import numpy as np
+        from chessinpython.eval import batchEvaluate, batchInCheck, statesToArray
+        states = randomPositions(60)
+        boards, sides = statesToArray(states)
+        expectedEvaluations = [evaluatePosition(state) for state in states]
+        expectedChecks = [state.gameBoard.isInCheck(colourIndex[state.sideToMove]) for state in states]
+        self.assertTrue(any(expectedChecks))
+
+        result = batchEvaluate(boards, sides)
+        self.assertEqual(result["evaluation"].tolist(), expectedEvaluations)
+        self.assertEqual(result["inCheck"].tolist(), expectedChecks)
+        self.assertTrue(result["valid"].all())
+        self.assertEqual(batchInCheck(boards, sides).tolist(), expectedChecks)
+
+        # the same positions given as piece bitboards
+        bitboards = np.array([state.gameBoard.pieceBitboards for state in states], dtype=np.uint64)
+        result = batchEvaluate(bitboards, sides, bitboards=True)
+        self.assertEqual(result["evaluation"].tolist(), expectedEvaluations)
+        self.assertEqual(result["inCheck"].tolist(), expectedChecks)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from chessinpython.board import DOUBLE_PAWN_PUSH, encodeMove
+from chessinpython.io import BOOK_FILE_MAGIC, bookEntryStruct, OpeningBook, PositionFileReader, readPGNGames, replayGame, writePositions
+from chessinpython.perft import perftSuite
+from chessinpython.rules import GameState, STANDARD_FEN
+
+
+class OpeningBookTests(unittest.TestCase):
+    def testBadBookMovesAreSkipped(self):
+        # entries a key collision or another build's book could hand back: from an empty square, a black pawn with white to move,
+        # a pawn move the position doesn't allow, and one real move
+        state = GameState.fromFEN(STANDARD_FEN)
+        bitboards = list(state.gameBoard.pieceBitboards)
+        moves = (encodeMove(36, 28), encodeMove(12, 28, DOUBLE_PAWN_PUSH), encodeMove(52, 28), encodeMove(52, 36, DOUBLE_PAWN_PUSH))
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "book.cipb")
+        try:
+            with open(path, "wb") as file:
+                file.write(BOOK_FILE_MAGIC)
+                for move in sorted(moves):
+                    file.write(bookEntryStruct.pack(state.positionKey, move, 1, 0))
+            with OpeningBook(path) as book:
+                self.assertEqual(book.entries(state), [(encodeMove(52, 36, DOUBLE_PAWN_PUSH), 1)])
+        finally:
+            os.remove(path)
+            os.rmdir(directory)
+        self.assertEqual(list(state.gameBoard.pieceBitboards), bitboards)
+        self.assertEqual(state.positionKey, state.computePositionKey())
+
+
+class PGNTests(unittest.TestCase):
+    def testCommentsInsideMovetext(self):
+        lines = ['[Event "test"]', '[Result "1-0"]', "", "1. e4 e5 ; a note with a { in it", "2. Nf3 {a brace comment; with a semicolon",
+                 "over two lines} Nc6 3. Bb5 ; another note", "3... a6 1-0"]
+        games = list(readPGNGames(lines))
+        self.assertEqual(len(games), 1)
+        self.assertEqual(games[0].moves, ["e4", "e5", "Nf3", "Nc6", "Bb5", "a6"])
+        self.assertEqual(games[0].result, "1-0")
+
+    def testZeroStyleCastling(self):
+        lines = ['[Event "test"]', '[Result "*"]', "", "1. e4 e5 2. Nf3 Nc6 3. Bc4 Bc5 4.0-0 d6 5. d3 Bg4 6. Nc3 Qd7 7. a3 0-0-0 *"]
+        games = list(readPGNGames(lines))
+        self.assertEqual(games[0].moves[6], "0-0")
+        self.assertEqual(games[0].moves[13], "0-0-0")
+        state = None
+        for state, move in replayGame(games[0]):
+            pass
+        self.assertEqual(state.toFEN(), "2kr2nr/pppq1ppp/2np4/2b1p3/2B1P1b1/P1NP1N2/1PP2PPP/R1BQ1RK1 w - - 1 8")
+
+
+class PositionFileTests(unittest.TestCase):
+    def testFENRoundTrip(self):
+        for name, fen, expectedCounts in perftSuite:
+            self.assertEqual(GameState.fromFEN(fen).toFEN(), fen)
+        # the clocks are optional: both missing means 0 1, and a lone halfmove clock is kept
+        self.assertEqual(GameState.fromFEN("4k3/8/8/8/8/8/8/4K3 w - -").toFEN(), "4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertEqual(GameState.fromFEN("4k3/8/8/8/8/8/8/4K3 w - - 37").toFEN(), "4k3/8/8/8/8/8/8/4K3 w - - 37 1")
+        with self.assertRaises(ValueError):
+            GameState.fromFEN("4k3/8/8/8/8/8/8/4K3 w - - x 1")
+
+    def testWriteAndReadBack(self):
+        # every suite position and a few plies after each (so changed castling rights are stored too), and an en passant square
+        states = ["rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 3"]
+        for name, fen, expectedCounts in perftSuite:
+            state = GameState.fromFEN(fen)
+            states.append(state.toFEN())
+            for ply in range(3):
+                state.makeMove(min(state.legalMoves()))
+                states.append(state.toFEN())
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "positions.cipp")
+        try:
+            self.assertEqual(writePositions(path, (GameState.fromFEN(fen) for fen in states)), len(states))
+            with PositionFileReader(path) as reader:
+                self.assertEqual(len(reader), len(states))
+                self.assertEqual([state.toFEN() for state in reader], states)
+                self.assertEqual(reader[5].toFEN(), states[5])
+                self.assertEqual(reader[5].positionKey, GameState.fromFEN(states[5]).positionKey)
+                with self.assertRaises(IndexError):
+                    reader[len(states)]
+        finally:
+            os.remove(path)
+            os.rmdir(directory)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+from chessinpython.board import KNIGHT, NO_PIECE, Position, WHITE_INDEX
+from chessinpython.perft import perftSuite
+from chessinpython.rules import GameState, parseUCIMove, RESULT_BLACK_WINS, RESULT_DRAW, STANDARD_FEN
+
+
+def position(name): # eg., "e4" -> the Position of e4
+    return Position().setByFileRank(name[0], name[1])
+
+def isValid(state, text): # isValidMove of the piece on the first square, for a move given as eg., "e1g1"
+    piece = state.gameBoard.getPieceFromBoard(position(text[:2]))
+    return bool(piece.isValidMove(state.gameBoard, position(text[2:4])))
+
+def play(state, *texts):
+    for text in texts:
+        move = parseUCIMove(state, text)
+        if move is None:
+            raise ValueError(f"illegal move {text} in {state.toFEN()}")
+        state.makeMove(move)
+    return state
+
+
+class MoveValidationTests(unittest.TestCase):
+    def testCastlingThroughCheck(self):
+        state = GameState.fromFEN("4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1")
+        self.assertFalse(isValid(state, "e1g1"))    # f1 is attacked by the rook on f2
+        self.assertTrue(isValid(state, "e1c1"))
+        inCheck = GameState.fromFEN("4k3/8/8/8/8/8/4r3/R3K2R w KQ - 0 1")
+        self.assertFalse(isValid(inCheck, "e1g1"))
+        self.assertFalse(isValid(inCheck, "e1c1"))
+
+    def testEnPassantAndItsExpiry(self):
+        state = play(GameState.fromFEN("4k3/3p4/8/4P3/8/8/8/4K3 b - - 0 1"), "d7d5")
+        self.assertTrue(isValid(state, "e5d6"))
+        play(state, "e5d6")
+        self.assertEqual(state.gameBoard.mailbox[position("d5").square], NO_PIECE)
+
+        # one move later the capture is gone
+        state = play(GameState.fromFEN("4k3/3p4/8/4P3/8/8/8/4K3 b - - 0 1"), "d7d5", "e1e2", "e8e7")
+        self.assertFalse(isValid(state, "e5d6"))
+        self.assertIsNone(parseUCIMove(state, "e5d6"))
+
+    def testPromotion(self):
+        state = GameState.fromFEN("8/P3k3/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertTrue(isValid(state, "a7a8"))
+        self.assertTrue(state.movePiece(state.gameBoard.getPieceFromBoard(position("a7")), position("a8"), KNIGHT))
+        self.assertEqual(state.gameBoard.mailbox[position("a8").square], WHITE_INDEX * 6 + KNIGHT)
+        self.assertEqual(state.toFEN(), "N7/4k3/8/8/8/8/8/4K3 b - - 0 1")
+
+    def testPinnedPieces(self):
+        state = GameState.fromFEN("4k3/4r3/8/8/8/8/4N3/4K3 w - - 0 1")
+        self.assertFalse(isValid(state, "e2c3"))
+        state = GameState.fromFEN("4k3/4r3/8/8/8/8/4R3/4K3 w - - 0 1")
+        self.assertTrue(isValid(state, "e2e5"))     # along the pin
+        self.assertTrue(isValid(state, "e2e7"))
+        self.assertFalse(isValid(state, "e2d2"))    # off it
+
+    def testAgreesWithMoveGeneration(self):
+        # every piece of the side to move, every target square: isValidMove says yes exactly for the generated legal moves
+        for name, fen, expectedCounts in perftSuite:
+            state = GameState.fromFEN(fen)
+            legal = {(move & 63, (move >> 6) & 63) for move in state.legalMoves()}
+            us = 0 if fen.split()[1] == "w" else 1
+            valid = set()
+            for fromSquare in range(64):
+                code = state.gameBoard.mailbox[fromSquare]
+                if code == NO_PIECE or code // 6 != us:
+                    continue
+                piece = state.gameBoard.getPieceFromBoard(Position(fromSquare % 8, fromSquare // 8))
+                valid |= {(fromSquare, toSquare) for toSquare in range(64) if piece.isValidMove(state.gameBoard, Position(toSquare % 8, toSquare // 8))}
+            self.assertEqual(valid, legal, name)
+
+
+class GameOutcomeTests(unittest.TestCase):
+    def testCheckmate(self):
+        state = play(GameState.fromFEN(STANDARD_FEN), "f2f3", "e7e5", "g2g4", "d8h4")
+        self.assertEqual(state.gameOutcome(), (RESULT_BLACK_WINS, "checkmate"))
+
+    def testStalemate(self):
+        self.assertEqual(GameState.fromFEN("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1").gameOutcome(), (RESULT_DRAW, "stalemate"))
+
+    def testFiftyMoveRule(self):
+        state = GameState.fromFEN("4k3/8/8/8/8/8/8/R3K3 w - - 98 80")
+        play(state, "a1a2")
+        self.assertIsNone(state.gameOutcome())
+        play(state, "e8e7")
+        self.assertEqual(state.gameOutcome(), (RESULT_DRAW, "fifty-move rule"))
+
+    def testThreefoldRepetition(self):
+        state = GameState.fromFEN(STANDARD_FEN)
+        play(state, "g1f3", "g8f6", "f3g1", "f6g8")
+        self.assertIsNone(state.gameOutcome())     # the start position has been seen twice
+        play(state, "g1f3", "g8f6", "f3g1")
+        self.assertIsNone(state.gameOutcome())
+        play(state, "f6g8")
+        self.assertEqual(state.gameOutcome(), (RESULT_DRAW, "threefold repetition"))
+
+    def testInsufficientMaterial(self):
+        for fen in ("4k3/8/8/8/8/8/8/4K3 w - - 0 1", "4k3/8/8/8/8/8/8/2B1K3 w - - 0 1", "4k3/8/8/8/8/8/8/1N2K3 b - - 0 1",
+                    "2b1k3/8/8/8/8/8/8/3BK3 w - - 0 1"):
+            self.assertEqual(GameState.fromFEN(fen).gameOutcome(), (RESULT_DRAW, "insufficient material"), fen)
+        # bishops on both colours of square, a pawn, or two knights can still mate (or be mated)
+        for fen in ("3bk3/8/8/8/8/8/8/3BK3 w - - 0 1", "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1", "4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1"):
+            self.assertIsNone(GameState.fromFEN(fen).gameOutcome(), fen)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import asyncio
+import unittest
+from chessinpython.server import GameServer
+
+
+class GameServerTests(unittest.TestCase):
+    def testRequestsMustBeObjects(self):
+        server = GameServer()
+        for request in ([1, 2], "new", 3, None):
+            self.assertFalse(asyncio.run(server.handleRequest(request))["ok"])
+        self.assertTrue(asyncio.run(server.handleRequest({"op": "stats"}))["ok"])
+
+    def testBadFieldTypes(self):
+        server = GameServer()
+        gameId = asyncio.run(server.handleRequest({"op": "new"}))["game"]
+        for request in ({"op": "new", "fen": 5}, {"op": "new", "fen": None}, {"op": "move", "game": gameId, "move": ["e2e4"]},
+                        {"op": "fen", "game": "1"}, {"op": "fen", "game": [gameId]}, {"op": "engine", "game": gameId, "depth": "3"},
+                        {"op": "engine", "game": gameId, "movetime": True}):
+            response = asyncio.run(server.handleRequest(dict(request, id=7)))
+            self.assertFalse(response["ok"], request)
+            self.assertEqual(response["id"], 7)
+        self.assertEqual(len(server.games), 1)
+        self.assertTrue(asyncio.run(server.handleRequest({"op": "move", "game": gameId, "move": "e2e4"}))["ok"])
+
+
+if __name__ == "__main__":
+    unittest.main()
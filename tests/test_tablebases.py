@@ -0,0 +1,76 @@
+import random
+import shutil
+import tempfile
+import unittest
+from chessinpython.board import moveToUCI
+from chessinpython.rules import GameState, RESULT_WHITE_WINS
+from chessinpython.tablebases import generateTablebases, Tablebases
+
+
+class KQvKTests(unittest.TestCase):
+    # KQvK is generated once for the whole class (about 45s on one core; it is the smallest table which isn't drawn outright)
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp()
+        generateTablebases(["KQvK"], cls.directory)
+        cls.tablebases = Tablebases(cls.directory)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tablebases.close()
+        shutil.rmtree(cls.directory)
+
+    def testMateInOne(self):
+        state = GameState.fromFEN("k7/8/1K6/8/8/8/7Q/8 w - - 0 1")
+        self.assertEqual(self.tablebases.probe(state), (1, 1))
+        move = self.tablebases.bestMove(state)
+        self.assertEqual(moveToUCI(move), "h2h8")
+        state.makeMove(move)
+        self.assertEqual(state.gameOutcome(), (RESULT_WHITE_WINS, "checkmate"))
+        self.assertEqual(self.tablebases.probe(state), (-1, 0))
+
+    def testLosingSide(self):
+        # the same material with black to move, and with the colours swapped
+        result, distance = self.tablebases.probe(GameState.fromFEN("k7/8/2K5/8/8/8/7Q/8 b - - 0 1"))
+        self.assertEqual(result, -1)
+        self.assertEqual(distance % 2, 0)
+        self.assertEqual(self.tablebases.probe(GameState.fromFEN("8/7q/8/8/8/1k6/8/K7 b - - 0 1")), (1, 1))
+
+    def testDraws(self):
+        self.assertEqual(self.tablebases.probe(GameState.fromFEN("k7/1Q6/8/8/8/8/8/7K b - - 0 1")), (0, 0))    # the queen hangs
+        self.assertEqual(self.tablebases.probe(GameState.fromFEN("k7/2Q5/1K6/8/8/8/8/8 b - - 0 1")), (0, 0))   # stalemate
+        self.assertEqual(self.tablebases.probe(GameState.fromFEN("k7/8/1K6/8/8/8/7Q/8 b - - 0 1")), (0, 0))    # the mate in one, but black to move: stalemate
+        self.assertIsNone(self.tablebases.probe(GameState.fromFEN("k7/8/1K6/8/8/8/7Q/6R1 w - - 0 1")))          # no KQRvK table
+
+    def testDistancesAgreeWithChildren(self):
+        # a win in d plies has a move to a loss in d - 1, and every move from a loss in d leads to a win in at most d - 1
+        chooser = random.Random(0)
+        checked = 0
+        while checked < 100:
+            squares = chooser.sample(range(64), 3)
+            board = ["1"] * 64
+            board[squares[0]], board[squares[1]], board[squares[2]] = "K", "Q", "k"
+            placement = "/".join("".join(board[rank * 8:rank * 8 + 8]) for rank in range(8))
+            try:
+                state = GameState.fromFEN(f"{placement} {chooser.choice('wb')} - - 0 1")
+            except ValueError:
+                continue
+            probe = self.tablebases.probe(state)
+            if probe is None or probe == (0, 0) or probe[1] == 0:
+                continue
+            result, distance = probe
+            children = []
+            for move in state.legalMoves():
+                state.makeMove(move)
+                children.append(self.tablebases.probe(state))
+                state.unmakeMove()
+            if result == 1:
+                self.assertIn((-1, distance - 1), children, state.toFEN())
+            else:
+                self.assertTrue(all(child[0] == 1 and child[1] <= distance - 1 for child in children), state.toFEN())
+                self.assertIn((1, distance - 1), children, state.toFEN())
+            checked += 1
+
+
+if __name__ == "__main__":
+    unittest.main()
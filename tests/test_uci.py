@@ -0,0 +1,59 @@
+import io
+import threading
+import unittest
+from chessinpython.rules import STANDARD_FEN
+from chessinpython.uci import UCIServer
+
+
+class UCIServerTests(unittest.TestCase):
+    def search(self, server : UCIServer, output : io.StringIO, command : str) -> str: # the output of one go command, once it has finished
+        output.seek(0)
+        output.truncate()
+        server.handle(command)
+        server.searchThread.join()
+        return output.getvalue()
+
+    def testBadOptionsAndPositionsAreReported(self):
+        output = io.StringIO()
+        server = UCIServer(io.StringIO(), output)
+        self.assertTrue(server.handle("setoption name Hash value abc"))
+        self.assertTrue(server.handle("position fen not a fen"))
+        self.assertEqual(server.state.toFEN(), STANDARD_FEN)
+        self.assertEqual(output.getvalue().count("info string"), 2)
+
+    def testWarmTableKeepsTheWholeLine(self):
+        # the second search answers the root's children from the table, and must still report a full PV and a ponder move
+        output = io.StringIO()
+        server = UCIServer(io.StringIO(), output)
+        server.handle("position startpos")
+        for search in range(2):
+            lines = self.search(server, output, "go depth 4").splitlines()
+            depthFour = [line for line in lines if line.startswith("info depth 4 ")]
+            self.assertEqual(len(depthFour[0].split(" pv ")[1].split()), 4)
+            self.assertIn(" ponder ", lines[-1])
+
+    def testPonderhitBeforeTheSearchStarts(self):
+        # hold the search thread back until ponderhit has been handled: the move must still be made on the clock, not searched forever
+        output = io.StringIO()
+        server = UCIServer(io.StringIO(), output)
+        released = threading.Event()
+        findBestMove = server.engine.findBestMove
+
+        def lateFindBestMove(*arguments, **keywords):
+            released.wait()
+            return findBestMove(*arguments, **keywords)
+
+        server.engine.findBestMove = lateFindBestMove
+        server.handle("position startpos")
+        server.handle("go ponder movetime 100")
+        server.handle("ponderhit")
+        released.set()
+        server.searchThread.join(5)
+        finished = not server.searchThread.is_alive()
+        server.handle("stop")
+        self.assertTrue(finished)
+        self.assertIn("bestmove ", output.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()